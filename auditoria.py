@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""Log de auditoria estruturado: um arquivo JSON por linha por dia, com índice invertido.
+
+Cada dia tem dois arquivos no diretório de auditoria:
+
+    auditoria-2025-03-14.jsonl  registros completos, um JSON por linha
+    auditoria-2025-03-14.idx    índice invertido: posições por conta, tipo e status
+
+Cada lote gravado anexa ao .idx uma linha JSON com as posições (em bytes no
+.jsonl) dos seus registros por conta, por tipo da operação (sem acentos, em
+minúsculas) e por status, e o fim do .jsonl já indexado:
+
+    {"fim":1834,"conta":{"1":[0,412]},"tipo":{"saque":[412]},"status":{"OK":[0,412]}}
+
+Uma consulta junta as listas de posições das chaves pedidas, faz a interseção
+e só lê do .jsonl os registros encontrados, indo direto à posição de cada um.
+A consulta não altera os arquivos: registros ainda sem índice são lidos do
+fim do .jsonl, e quem os indexa é a escritora (no próximo lote do dia) ou
+`reindexar`.
+
+Consulta pela linha de comando:
+
+    python auditoria.py --conta 42 --tipo Saque --status ERRO --desde 2025-03-07 --ate 2025-03-14
+    python auditoria.py --reindexar --desde 2025-03-14   # refaz o índice a partir do .jsonl
+"""
+
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+from escritor_log import EscritorLogAssincrono
+from persistencia import gravar_atomico
+
+PREFIXO = "auditoria-"
+EXTENSAO_DADOS = ".jsonl"
+EXTENSAO_INDICE = ".idx"
+
+
+def arquivos_do_dia(diretorio, dia):
+    """(dados, índice) do dia `dia` ("aaaa-mm-dd") em `diretorio`."""
+    base = Path(diretorio) / f"{PREFIXO}{dia}"
+    return base.with_name(base.name + EXTENSAO_DADOS), base.with_name(base.name + EXTENSAO_INDICE)
+
+
+def _normalizar_tipo(tipo):
+    from utils import normalizar_texto  # utils importa este módulo
+
+    return normalizar_texto(tipo)
+
+
+def _linha_indice(registros, fim):
+    """Linha do índice para os pares (posição, registro) de um lote, com o fim já indexado."""
+    indice = {"fim": fim, "conta": {}, "tipo": {}, "status": {}}
+    for posicao, registro in registros:
+        for numero in registro.get("contas") or ():
+            indice["conta"].setdefault(str(numero), []).append(posicao)
+        indice["tipo"].setdefault(_normalizar_tipo(registro["tipo"]), []).append(posicao)
+        indice["status"].setdefault(registro["status"], []).append(posicao)
+    return (json.dumps(indice, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _ler_registros(dados, inicio):
+    """Pares (posição, registro) das linhas completas de `dados` (.jsonl aberto em bytes) a partir de `inicio`."""
+    dados.seek(inicio)
+    posicao = inicio
+    for linha in dados:
+        if not linha.endswith(b"\n"):
+            break  # registro ainda sendo gravado
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            registro = None  # linha interrompida por uma queda
+        if registro is not None:
+            yield posicao, registro
+        posicao += len(linha)
+
+
+def _terminar_linha(arquivo):
+    """Termina com "\\n" a última linha de `arquivo` (aberto em "ab+") se uma queda a deixou incompleta."""
+    if arquivo.seek(0, 2):
+        arquivo.seek(-1, 2)
+        if arquivo.read(1) != b"\n":
+            arquivo.write(b"\n")
+    return arquivo.seek(0, 2)
+
+
+class EscritorAuditoria(EscritorLogAssincrono):
+    """Grava registros de auditoria (dicts) em segundo plano, no arquivo do dia de cada um.
+
+    Usa a mesma fila e o mesmo agrupamento em lotes do log em texto; a
+    serialização e a atualização do índice acontecem na thread escritora.
+    Cada registro precisa de "ts" (ISO 8601), "tipo" e "status". `obter_arquivo`
+    devolve o diretório de auditoria.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fim_indexado = {}  # .jsonl -> fim já indexado no .idx
+
+    def _gravar(self, registros):
+        if not registros:
+            return
+        try:
+            diretorio = Path(self.obter_arquivo())
+            por_dia = {}
+            for registro in registros:
+                por_dia.setdefault(registro["ts"][:10], []).append(registro)
+            with self._lock_gravacao:
+                diretorio.mkdir(parents=True, exist_ok=True)
+                for dia, do_dia in por_dia.items():
+                    self._gravar_dia(diretorio, dia, do_dia)
+        except Exception as e:
+            print(f"[AVISO] Não foi possível registrar auditoria: {e}")
+
+    def _gravar_dia(self, diretorio, dia, registros):
+        arquivo_dados, arquivo_indice = arquivos_do_dia(diretorio, dia)
+        with open(arquivo_dados, "ab+") as dados:
+            posicao = _terminar_linha(dados)
+            fim_indexado = self._fim_indexado.get(arquivo_dados)
+            if fim_indexado is None or fim_indexado > posicao:
+                fim_indexado, _ = _ler_indice(arquivo_indice, ())
+            # Registros sem entrada no índice (queda entre os dois arquivos, índice
+            # apagado, outro processo) entram no índice junto com este lote
+            indexados = list(_ler_registros(dados, fim_indexado)) if fim_indexado < posicao else []
+            linhas = []
+            for registro in registros:
+                linha = (json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                linhas.append(linha)
+                indexados.append((posicao, registro))
+                posicao += len(linha)
+            dados.write(b"".join(linhas))
+        # O índice é gravado depois dos dados: uma entrada sempre aponta para um registro completo
+        with open(arquivo_indice, "ab+") as f:
+            _terminar_linha(f)
+            f.write(_linha_indice(indexados, posicao))
+        self._fim_indexado[arquivo_dados] = posicao
+
+
+# ============= CONSULTA =============
+
+def _ler_indice(arquivo_indice, chaves):
+    """(fim já indexado do .jsonl, {chave: posições}) para as chaves ("conta", "42") pedidas.
+
+    Só lê o índice: uma última linha incompleta (lote sendo gravado) é ignorada.
+    """
+    fim = 0
+    posicoes = {chave: set() for chave in chaves}
+    try:
+        with open(arquivo_indice, "rb") as f:
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break
+                try:
+                    lote = json.loads(linha)
+                except ValueError:
+                    continue
+                fim = max(fim, lote["fim"])
+                for campo, valor in chaves:
+                    posicoes[campo, valor].update(lote[campo].get(valor, ()))
+    except FileNotFoundError:
+        pass
+    return fim, posicoes
+
+
+def _atende(registro, conta, tipo, status, funcao):
+    return ((conta is None or conta in (registro.get("contas") or ()))
+            and (tipo is None or _normalizar_tipo(registro["tipo"]) == tipo)
+            and (status is None or registro["status"] == status)
+            and (funcao is None or registro.get("funcao") == funcao))
+
+
+def dias_com_registros(diretorio):
+    """Dias ("aaaa-mm-dd") que têm arquivo de auditoria, em ordem."""
+    return sorted(caminho.name[len(PREFIXO):-len(EXTENSAO_DADOS)]
+                  for caminho in Path(diretorio).glob(f"{PREFIXO}*{EXTENSAO_DADOS}"))
+
+
+def _dias(diretorio, desde, ate):
+    return [dia for dia in dias_com_registros(diretorio) if not (desde and dia < desde) and not (ate and dia > ate)]
+
+
+def consultar(diretorio, conta=None, tipo=None, status=None, funcao=None, desde=None, ate=None):
+    """Registros de auditoria que atendem aos filtros, em ordem cronológica.
+
+    `desde`/`ate` são datas "aaaa-mm-dd" (inclusivas). `tipo` compara com o
+    tipo da operação ("Saque", "Depósito"...) sem diferenciar maiúsculas nem
+    acentos. Conta, tipo e status são buscados no índice; `funcao` é conferido
+    no registro lido. Sem nenhum filtro do índice, o dia é lido por inteiro.
+    """
+    tipo = _normalizar_tipo(tipo) if tipo else None
+    chaves = [(campo, valor) for campo, valor in (("conta", None if conta is None else str(conta)),
+                                                  ("tipo", tipo), ("status", status)) if valor is not None]
+    for dia in _dias(diretorio, desde, ate):
+        arquivo_dados, arquivo_indice = arquivos_do_dia(diretorio, dia)
+        fim, posicoes = _ler_indice(arquivo_indice, chaves) if chaves else (0, {})
+        with open(arquivo_dados, "rb") as dados:
+            if chaves:
+                for posicao in sorted(set.intersection(*posicoes.values())):
+                    dados.seek(posicao)
+                    registro = json.loads(dados.readline())
+                    if funcao is None or registro.get("funcao") == funcao:
+                        yield registro
+            # Registros ainda não indexados ficam no fim do .jsonl
+            for _, registro in _ler_registros(dados, fim):
+                if _atende(registro, conta, tipo, status, funcao):
+                    yield registro
+
+
+def reindexar(diretorio, dia):
+    """Refaz o índice do dia a partir do .jsonl; devolve o número de registros indexados.
+
+    Para índices apagados ou corrompidos. Deve rodar com a escritora parada
+    (ou sem gravar neste dia), pois o índice é substituído por inteiro.
+    """
+    arquivo_dados, arquivo_indice = arquivos_do_dia(diretorio, dia)
+    with open(arquivo_dados, "rb") as dados:
+        registros = list(_ler_registros(dados, 0))
+        fim = 0
+        if registros:
+            dados.seek(registros[-1][0])
+            fim = registros[-1][0] + len(dados.readline())
+    gravar_atomico(arquivo_indice, [_linha_indice(registros, fim)], manter_backup=False)
+    return len(registros)
+
+
+def main(argv=None):
+    import utils
+
+    parser = argparse.ArgumentParser(description="Consulta o log de auditoria estruturado.")
+    parser.add_argument("--diretorio", default=str(utils.DIRETORIO_AUDITORIA))
+    parser.add_argument("--conta", type=int)
+    parser.add_argument("--tipo", help='tipo da operação, ex.: "Saque", "Depósito", "Transferência"')
+    parser.add_argument("--status", choices=("OK", "ERRO"))
+    parser.add_argument("--funcao", help="nome da função registrada, ex.: sacar_obj")
+    parser.add_argument("--desde", metavar="AAAA-MM-DD")
+    parser.add_argument("--ate", metavar="AAAA-MM-DD")
+    parser.add_argument("--dias", type=int, help="últimos N dias (alternativa a --desde)")
+    parser.add_argument("--reindexar", action="store_true", help="refaz o índice dos dias do período e sai")
+    args = parser.parse_args(argv)
+
+    desde = args.desde
+    if args.dias:
+        desde = (date.today() - timedelta(days=args.dias - 1)).isoformat()
+    if args.reindexar:
+        for dia in _dias(args.diretorio, desde, args.ate):
+            print(f"{dia}: {reindexar(args.diretorio, dia)} registro(s) indexado(s).", file=sys.stderr)
+        return
+    total = 0
+    for registro in consultar(args.diretorio, args.conta, args.tipo, args.status, args.funcao, desde, args.ate):
+        print(json.dumps(registro, ensure_ascii=False))
+        total += 1
+    print(f"{total} registro(s) encontrado(s).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
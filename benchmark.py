@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmarks do sistema bancário.
+
+Uso:
+    python benchmark.py dinheiro [--operacoes N]
+    python benchmark.py salvamento [--usuarios N] [--contas M] [--transacoes K] [--repeticoes R]
+    python benchmark.py memoria [--usuarios N] [--contas M] [--transacoes K]
+    python benchmark.py carregamento [--usuarios N] [--contas M] [--transacoes K]
+    python benchmark.py servidor [--clientes C] [--requisicoes R] [--contas M] [--persistencia MODO]
+    python benchmark.py nucleo [--usuarios N] [--contas M] [--transacoes K] [--iteracoes I]
+                               [--persistencia MODO] [--salvar RELATORIO.json] [--comparar BASE.json]
+    python benchmark.py mascaramento [--textos N] [--repeticoes R]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+
+from dinheiro import para_centavos, formatar_centavos
+from persistencia import BackendJSON, montar_estado, serializar_conta
+import utils
+import models
+from repositorio import Repositorio
+
+
+def _medir(func, *args):
+    """Executa `func` e retorna (resultado, segundos decorridos)."""
+    inicio = time.perf_counter()
+    resultado = func(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def _percentil(amostras, p):
+    ordenadas = sorted(amostras)
+    indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+    return ordenadas[indice]
+
+
+# ============= DADOS SINTÉTICOS =============
+
+def _gerar_cpf(rng):
+    """Gera um CPF válido (com dígitos verificadores corretos)."""
+    digitos = [rng.randint(0, 9) for _ in range(9)]
+    for tamanho in (9, 10):
+        soma = sum(d * (tamanho + 1 - i) for i, d in enumerate(digitos[:tamanho]))
+        digito = 11 - (soma % 11)
+        digitos.append(0 if digito > 9 else digito)
+    return "".join(map(str, digitos))
+
+
+def gerar_dados_sinteticos(n_usuarios, n_contas, n_transacoes, semente=42):
+    """Gera (usuarios, contas, proximo_numero_conta) no formato atual de persistência.
+
+    As `n_transacoes` são depósitos e saques distribuídos aleatoriamente entre
+    as `n_contas`; os saldos finais são coerentes com o extrato.
+    """
+    rng = random.Random(semente)
+    usuarios = []
+    cpfs = set()
+    while len(usuarios) < n_usuarios:
+        cpf = _gerar_cpf(rng)
+        if cpf in cpfs:
+            continue
+        cpfs.add(cpf)
+        usuarios.append({
+            "nome": f"Cliente {len(usuarios) + 1}",
+            "cpf": cpf,
+            "data_nascimento": "01-01-1990",
+            "endereco": f"Rua {len(usuarios) + 1}, 100 - Centro - Cidade/SP",
+            "data_criacao": "2025-01-01T00:00:00",
+        })
+    contas = []
+    for numero in range(1, n_contas + 1):
+        contas.append({
+            "agencia": "0001",
+            "numero_conta": numero,
+            "usuario": usuarios[(numero - 1) % n_usuarios],
+            "saldo_centavos": 0,
+            "transacoes": [],
+            "saques_realizados": 0,
+            "data_criacao": "2025-01-01T00:00:00",
+        })
+    inicio = datetime(2025, 1, 1)
+    for i in range(n_transacoes):
+        conta = contas[rng.randrange(n_contas)]
+        valor = rng.randint(100, 50000)
+        if conta["saldo_centavos"] >= valor and rng.random() < 0.4:
+            tipo = "Saque"
+            conta["saldo_centavos"] -= valor
+        else:
+            tipo = "Depósito"
+            conta["saldo_centavos"] += valor
+        momento = inicio + timedelta(seconds=i * 37)
+        conta["transacoes"].append({
+            "timestamp": momento.strftime("%d/%m/%Y %H:%M:%S"),
+            "tipo": tipo,
+            "valor_centavos": valor,
+            "contraparte": None,
+            "descricao": "",
+        })
+    return usuarios, contas, n_contas + 1
+
+
+def gerar_estado_sintetico(n_usuarios, n_contas, n_transacoes, semente=42):
+    """Como `gerar_dados_sinteticos`, mas já como entidades (Usuario/Conta), igual ao carregamento."""
+    usuarios, contas, proximo = gerar_dados_sinteticos(n_usuarios, n_contas, n_transacoes, semente)
+    usuarios, contas = montar_estado(usuarios, [serializar_conta(conta) for conta in contas])
+    return usuarios, contas, proximo
+
+
+# ============= DINHEIRO =============
+
+def _saldo_centavos(valores):
+    saldo = 0
+    for i, valor in enumerate(valores):
+        if i % 2:
+            saldo -= valor
+        else:
+            saldo += valor
+    return formatar_centavos(saldo)
+
+
+def _saldo_decimal(valores):
+    saldo = Decimal(0)
+    for i, valor in enumerate(valores):
+        if i % 2:
+            saldo -= valor
+        else:
+            saldo += valor
+    return str(saldo.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+def _saldo_float(valores):
+    saldo = 0.0
+    for i, valor in enumerate(valores):
+        if i % 2:
+            saldo -= valor
+        else:
+            saldo += valor
+    return f"{saldo:.2f}"
+
+
+def benchmark_dinheiro(operacoes=1_000_000, semente=42):
+    """Compara a aritmética de saldo em centavos inteiros, Decimal e float.
+
+    Aplica `operacoes` depósitos/saques alternados e formata o saldo final.
+    A conversão da entrada (reais -> representação) é medida à parte.
+    """
+    rng = random.Random(semente)
+    reais = [f"{rng.randint(1, 50000) / 100:.2f}" for _ in range(operacoes)]
+
+    centavos, t_conv_centavos = _medir(lambda: [para_centavos(v) for v in reais])
+    decimais, t_conv_decimal = _medir(lambda: [Decimal(v) for v in reais])
+    floats, t_conv_float = _medir(lambda: [float(v) for v in reais])
+
+    linhas = []
+    for nome, func, valores, t_conv in (
+        ("centavos (int)", _saldo_centavos, centavos, t_conv_centavos),
+        ("Decimal", _saldo_decimal, decimais, t_conv_decimal),
+        ("float", _saldo_float, floats, t_conv_float),
+    ):
+        saldo, t_arit = _medir(func, valores)
+        linhas.append((nome, operacoes / t_arit, operacoes / t_conv, saldo))
+
+    print(f"\n==== Dinheiro: {operacoes} operações ====")
+    print(f"{'representação':16} | {'aritmética ops/s':>17} | {'conversão ops/s':>16} | saldo final")
+    for nome, ops_arit, ops_conv, saldo in linhas:
+        print(f"{nome:16} | {ops_arit:17,.0f} | {ops_conv:16,.0f} | {saldo}")
+    return linhas
+
+
+# ============= SALVAMENTO =============
+
+def _salvar_direto(arquivo, usuarios, contas, proximo_numero_conta):
+    """Gravação antiga: abre o arquivo com "w" e escreve por cima (sem proteção contra quedas)."""
+    dados = {"usuarios": usuarios, "contas": contas, "proximo_numero_conta": proximo_numero_conta}
+    with open(arquivo, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+def benchmark_salvamento(n_usuarios=1000, n_contas=2000, n_transacoes=20000, repeticoes=20):
+    """Mede a latência de salvar o snapshot JSON: gravação direta vs. atômica (com e sem fsync)."""
+    usuarios, contas, proximo = gerar_dados_sinteticos(n_usuarios, n_contas, n_transacoes)
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = Path(diretorio) / "dados_bancarios.json"
+        sem_fsync = BackendJSON(arquivo, fsync=False)
+        com_fsync = BackendJSON(arquivo, fsync=True)
+        variantes = (
+            ("direto (antigo)", lambda: _salvar_direto(arquivo, usuarios, contas, proximo)),
+            ("atômico sem fsync", lambda: sem_fsync.salvar(usuarios, contas, proximo)),
+            ("atômico + fsync", lambda: com_fsync.salvar(usuarios, contas, proximo)),
+        )
+        for nome, salvar in variantes:
+            amostras = [_medir(salvar)[1] * 1000 for _ in range(repeticoes)]
+            resultados.append((nome, statistics.mean(amostras), _percentil(amostras, 50), _percentil(amostras, 95)))
+        tamanho = arquivo.stat().st_size
+
+    print(f"\n==== Salvamento: {n_contas} contas, {n_transacoes} transações ({tamanho / 1024:.0f} KiB) ====")
+    print(f"{'variante':20} | {'média ms':>9} | {'p50 ms':>9} | {'p95 ms':>9}")
+    for nome, media, p50, p95 in resultados:
+        print(f"{nome:20} | {media:9.2f} | {p50:9.2f} | {p95:9.2f}")
+    return resultados
+
+
+# ============= MEMÓRIA =============
+
+def _memoria_alocada(construir):
+    """Executa `construir` e retorna (resultado, bytes que continuam alocados)."""
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        resultado = construir()
+        return resultado, tracemalloc.get_traced_memory()[0] - antes
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_memoria(n_usuarios=1000, n_contas=10000, n_transacoes=100000):
+    """Compara a memória do estado carregado como dicts e como entidades com __slots__."""
+    usuarios, contas, _ = gerar_dados_sinteticos(n_usuarios, n_contas, n_transacoes)
+    texto = json.dumps({"usuarios": usuarios, "contas": [serializar_conta(conta) for conta in contas]})
+    del usuarios, contas
+
+    def como_dicts():
+        return json.loads(texto)
+
+    def como_entidades():
+        dados = json.loads(texto)
+        return montar_estado(dados["usuarios"], dados["contas"])
+
+    resultados = []
+    for nome, construir in (("dicts", como_dicts), ("__slots__", como_entidades)):
+        _, alocado = _memoria_alocada(construir)
+        resultados.append((nome, alocado, alocado / n_contas))
+
+    print(f"\n==== Memória: {n_contas} contas, {n_transacoes} transações ====")
+    print(f"{'representação':14} | {'total MiB':>10} | {'bytes/conta':>12}")
+    for nome, alocado, por_conta in resultados:
+        print(f"{nome:14} | {alocado / 2**20:10.2f} | {por_conta:12,.0f}")
+    return resultados
+
+
+# ============= MASCARAMENTO =============
+
+def mascarar_referencia(valor):
+    """Implementação anterior de `mascarar_dados_sensiveis` (três re.sub por valor), para comparação."""
+    if valor is None:
+        return "None"
+    valor_str = str(valor)
+    valor_str = re.sub(r'\b(\d{3})\.?(\d{3})\.?(\d{3})\-?(\d{2})\b', r'\1.***.***-**', valor_str)
+    valor_str = re.sub(r'\b\d{4,}\b', '****', valor_str)
+    if 'endereco' in valor_str.lower():
+        valor_str = re.sub(r'(rua|avenida|av\.|r\.)\s+[^,]+', r'\1 ****', valor_str, flags=re.IGNORECASE)
+    return valor_str
+
+
+def gerar_valores_log(n, semente=42):
+    """Valores parecidos com os que passam por registrar_log: mensagens, valores, CPFs e endereços."""
+    rng = random.Random(semente)
+    geradores = (
+        lambda: f"Depósito de R$ {rng.randint(1, 99999) / 100:.2f} realizado com sucesso!",
+        lambda: "Transferência realizada com sucesso!",
+        lambda: rng.randint(1, 999),
+        lambda: rng.randint(1, 10**6) / 100,
+        lambda: _gerar_cpf(rng),
+        lambda: f"{rng.randint(100, 999)}.{rng.randint(100, 999)}.{rng.randint(100, 999)}-{rng.randint(10, 99)}",
+        lambda: f"endereco: Rua {rng.randint(1, 500)}, {rng.randint(1, 9999)} - Centro - Cidade/SP",
+        lambda: "Saldo insuficiente.",
+        lambda: f"Cliente {rng.randint(1, 100000)}",
+    )
+    return [rng.choice(geradores)() for _ in range(n)]
+
+
+def benchmark_mascaramento(n_textos=20000, repeticoes=5):
+    """Compara o mascaramento antigo (três passadas) com o motor pré-compilado de passada única."""
+    valores = gerar_valores_log(n_textos)
+    divergentes = sum(1 for valor in valores if utils.mascarar_dados_sensiveis(valor) != mascarar_referencia(valor))
+    resultados = []
+    for nome, mascarar in (("três passadas (antigo)", mascarar_referencia),
+                           ("passada única", utils.mascarar_dados_sensiveis)):
+        tempo = min(_medir(lambda: [mascarar(valor) for valor in valores])[1] for _ in range(repeticoes))
+        resultados.append((nome, n_textos / tempo, tempo / n_textos * 1e6))
+
+    print(f"\n==== Mascaramento: {n_textos} valores ====")
+    print(f"{'variante':24} | {'valores/s':>12} | {'µs/valor':>9}")
+    for nome, por_segundo, micros in resultados:
+        print(f"{nome:24} | {por_segundo:12,.0f} | {micros:9.2f}")
+    print(f"Saídas diferentes da implementação anterior: {divergentes}")
+    return resultados, divergentes
+
+
+# ============= CARREGAMENTO =============
+
+def medir_carregamento(arquivo, preguicoso):
+    """Carrega `arquivo` e imprime, em JSON, tempos e pico de RSS do processo atual.
+
+    Executado em um subprocesso por `benchmark_carregamento`, para que o pico
+    de memória de um modo não contamine o outro.
+    """
+    inicio = time.perf_counter()
+    _, contas, _ = BackendJSON(arquivo, preguicoso=preguicoso).carregar()
+    t_carga = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    len(contas[len(contas) // 2]["transacoes"])
+    t_primeiro_extrato = time.perf_counter() - inicio
+    print(json.dumps({"carga": t_carga, "primeiro_extrato": t_primeiro_extrato, "pico_kib": _pico_rss_kib()}))
+
+
+def _pico_rss_kib():
+    """Pico de memória residente do processo atual em KiB (None se indisponível)."""
+    try:
+        # VmHWM é zerado no exec; ru_maxrss herdaria o pico do processo pai
+        with open("/proc/self/status", encoding="ascii") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == "darwin" else pico
+
+
+def benchmark_carregamento(n_usuarios=10000, n_contas=20000, n_transacoes=1_000_000):
+    """Compara a inicialização (tempo e pico de RSS) com carregamento completo e preguiçoso."""
+    usuarios, contas, proximo = gerar_dados_sinteticos(n_usuarios, n_contas, n_transacoes)
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = Path(diretorio) / "dados_bancarios.json"
+        BackendJSON(arquivo, fsync=False).salvar(usuarios, contas, proximo)
+        del usuarios, contas
+        tamanho = arquivo.stat().st_size
+        codigo = "import sys, benchmark; benchmark.medir_carregamento(sys.argv[1], sys.argv[2] == '1')"
+        for nome, preguicoso in (("completo", False), ("preguiçoso", True)):
+            saida = subprocess.run(
+                [sys.executable, "-c", codigo, str(arquivo), "1" if preguicoso else "0"],
+                cwd=Path(__file__).resolve().parent, capture_output=True, text=True, check=True,
+            ).stdout
+            medidas = json.loads(saida.strip().splitlines()[-1])
+            resultados.append((nome, medidas["carga"], medidas["primeiro_extrato"], medidas["pico_kib"]))
+
+    print(f"\n==== Carregamento: {n_contas} contas, {n_transacoes} transações ({tamanho / 2**20:.0f} MiB) ====")
+    print(f"{'modo':12} | {'carga s':>8} | {'1º extrato ms':>13} | {'pico RSS MiB':>12}")
+    for nome, carga, primeiro, pico_kib in resultados:
+        pico = f"{pico_kib / 1024:12.1f}" if pico_kib is not None else f"{'n/d':>12}"
+        print(f"{nome:12} | {carga:8.2f} | {primeiro * 1000:13.2f} | {pico}")
+    return resultados
+
+
+# ============= SERVIDOR =============
+
+async def _requisitar(leitor, escritor, requisicao):
+    escritor.write(json.dumps(requisicao).encode("utf-8") + b"\n")
+    await escritor.drain()
+    return json.loads(await leitor.readline())
+
+
+async def _preparar_contas(host, porta, n_contas):
+    """Cria um titular e `n_contas` contas com saldo inicial; retorna os números."""
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    cpf = _gerar_cpf(random.Random(0))
+    await _requisitar(leitor, escritor, {"op": "criar_usuario", "nome": "Carga", "cpf": cpf,
+                                         "data_nascimento": "01-01-1990", "endereco": "Rua 1"})
+    numeros = []
+    for _ in range(n_contas):
+        resposta = await _requisitar(leitor, escritor, {"op": "criar_conta", "cpf": cpf})
+        numeros.append(resposta["resultado"])
+        await _requisitar(leitor, escritor, {"op": "depositar", "conta": numeros[-1], "valor": 10000})
+    escritor.close()
+    return numeros
+
+
+async def _cliente_carga(host, porta, numeros, n_requisicoes, semente, latencias):
+    """Um cliente: envia `n_requisicoes` (depósitos, transferências e extratos), uma por vez."""
+    rng = random.Random(semente)
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    for _ in range(n_requisicoes):
+        sorteio = rng.random()
+        origem, destino = rng.sample(numeros, 2)
+        if sorteio < 0.4:
+            requisicao = {"op": "depositar", "conta": origem, "valor": rng.randint(1, 500)}
+        elif sorteio < 0.9:
+            requisicao = {"op": "transferir", "conta": origem, "destino": destino, "valor": rng.randint(1, 500)}
+        else:
+            requisicao = {"op": "extrato", "conta": origem}
+        inicio = time.perf_counter()
+        await _requisitar(leitor, escritor, requisicao)
+        latencias.append(time.perf_counter() - inicio)
+    escritor.close()
+
+
+async def _gerar_carga(host, porta, n_clientes, n_requisicoes, n_contas):
+    numeros = await _preparar_contas(host, porta, n_contas)
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente_carga(host, porta, numeros, n_requisicoes, semente, latencias)
+        for semente in range(n_clientes)
+    ))
+    return latencias, time.perf_counter() - inicio
+
+
+def benchmark_servidor(n_clientes=50, n_requisicoes=200, n_contas=100, persistencia="journal"):
+    """Sobe `servidor.py` num diretório temporário e mede ops/s e latência com clientes simultâneos."""
+    with tempfile.TemporaryDirectory() as diretorio:
+        ambiente = dict(os.environ, BANCO_PERSISTENCIA=persistencia)
+        processo = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve().parent / "servidor.py"), "--porta", "0"],
+            cwd=diretorio, env=ambiente, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            endereco = processo.stdout.readline().strip().rsplit(" ", 1)[-1]
+            host, porta = endereco.rsplit(":", 1)
+            latencias, total = asyncio.run(_gerar_carga(host, int(porta), n_clientes, n_requisicoes, n_contas))
+        finally:
+            processo.send_signal(signal.SIGINT if os.name != "nt" else signal.SIGTERM)
+            processo.wait(timeout=30)
+
+    latencias_ms = [latencia * 1000 for latencia in latencias]
+    print(f"\n==== Servidor: {n_clientes} clientes x {n_requisicoes} requisições ({persistencia}) ====")
+    print(f"ops/s: {len(latencias) / total:,.0f}")
+    print(f"latência ms: p50 {_percentil(latencias_ms, 50):.2f} | p99 {_percentil(latencias_ms, 99):.2f} "
+          f"| máx {max(latencias_ms):.2f}")
+    return len(latencias) / total, _percentil(latencias_ms, 50), _percentil(latencias_ms, 99)
+
+
+# ============= NÚCLEO (CAMINHOS QUENTES) =============
+
+def _casos_nucleo(usuarios, contas, proximo, repositorio, rng):
+    """Casos medidos: nome -> (preparar, executar, iterações relativas).
+
+    `preparar()` roda fora da medição e devolve o argumento de `executar`.
+    """
+    numeros = [conta["numero_conta"] for conta in contas]
+    cpfs = [usuario["cpf"] for usuario in usuarios]
+
+    def conta_para_saque():
+        conta = repositorio.buscar_conta(rng.choice(numeros))
+        conta["saques_realizados"] = 0  # o limite diário não interessa aqui
+        conta["saldo_centavos"] += 1000
+        return conta
+
+    def par_de_contas():
+        origem, destino = rng.sample(numeros, 2)
+        repositorio.buscar_conta(origem)["saldo_centavos"] += 1000
+        return origem, destino
+
+    return {
+        "depositar_obj": (
+            lambda: repositorio.buscar_conta(rng.choice(numeros)),
+            lambda conta: models.depositar_obj(conta, "10.00", usuarios, contas), 1.0),
+        "sacar_obj": (
+            conta_para_saque,
+            lambda conta: models.sacar_obj(conta, "10.00", usuarios, contas), 1.0),
+        "transferir_obj": (
+            par_de_contas,
+            lambda par: models.transferir_obj(par[0], par[1], "10.00", usuarios, contas, repositorio), 1.0),
+        "gerar_transacoes": (
+            lambda: repositorio.buscar_conta(rng.choice(numeros)),
+            lambda conta: sum(1 for _ in models.gerar_transacoes(conta)), 1.0),
+        "gerar_transacoes(filtro)": (
+            lambda: repositorio.buscar_conta(rng.choice(numeros)),
+            lambda conta: sum(1 for _ in models.gerar_transacoes(conta, "saque")), 1.0),
+        "gerar_transacoes(limite=5)": (
+            lambda: repositorio.buscar_conta(rng.choice(numeros)),
+            lambda conta: sum(1 for _ in models.gerar_transacoes(conta, limite=5)), 1.0),
+        "salvar_dados": (
+            lambda: None,
+            lambda _: utils.salvar_dados(usuarios, contas, proximo), 0.1),
+        "carregar_dados": (
+            lambda: None,
+            lambda _: utils.carregar_dados(), 0.1),
+        "filtrar_usuario_por_cpf": (
+            lambda: rng.choice(cpfs),
+            lambda cpf: utils.filtrar_usuario_por_cpf(usuarios, cpf), 1.0),
+        "registrar_log": (
+            lambda: repositorio.buscar_conta(rng.choice(numeros)),
+            lambda conta: utils.registrar_log("Depósito", "depositar_obj", "OK", 0.001,
+                                              (conta, "10.00", usuarios, contas), {}, resultado="ok"), 1.0),
+    }
+
+
+def _medir_caso(preparar, executar, iteracoes):
+    """Retorna (latências em segundos, pico de memória alocada em bytes)."""
+    for _ in range(min(3, iteracoes)):  # aquecimento
+        executar(preparar())
+    latencias = []
+    for _ in range(iteracoes):
+        argumento = preparar()
+        inicio = time.perf_counter_ns()
+        executar(argumento)
+        latencias.append((time.perf_counter_ns() - inicio) / 1e9)
+    # A memória é medida numa passada curta à parte: o tracemalloc distorce os tempos
+    tracemalloc.start()
+    try:
+        for _ in range(min(20, iteracoes)):
+            executar(preparar())
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return latencias, pico
+
+
+def benchmark_nucleo(n_usuarios=500, n_contas=1000, n_transacoes=10000, iteracoes=200,
+                     persistencia="json", semente=42):
+    """Mede os caminhos quentes do sistema sobre dados sintéticos num diretório temporário.
+
+    Retorna o relatório (dict serializável em JSON) com ops/s, latências
+    p50/p95/p99 em microssegundos e pico de memória alocada por caso.
+    """
+    rng = random.Random(semente)
+    originais = (utils.ARQUIVO_DADOS, utils.ARQUIVO_JOURNAL, utils.ARQUIVO_SQLITE, utils.ARQUIVO_LOG)
+    casos = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        diretorio = Path(diretorio)
+        utils.ARQUIVO_DADOS = diretorio / "dados_bancarios.json"
+        utils.ARQUIVO_JOURNAL = diretorio / "dados_bancarios.journal"
+        utils.ARQUIVO_SQLITE = diretorio / "dados_bancarios.db"
+        utils.ARQUIVO_LOG = diretorio / "log.txt"
+        try:
+            utils.configurar_persistencia(persistencia)
+            usuarios, contas, proximo = gerar_estado_sintetico(n_usuarios, n_contas, n_transacoes, semente)
+            utils.salvar_dados(usuarios, contas, proximo)
+            repositorio = Repositorio(usuarios, contas)
+            for nome, (preparar, executar, fator) in _casos_nucleo(
+                    usuarios, contas, proximo, repositorio, rng).items():
+                n = max(5, int(iteracoes * fator))
+                latencias, pico = _medir_caso(preparar, executar, n)
+                micros = [latencia * 1e6 for latencia in latencias]
+                casos[nome] = {
+                    "iteracoes": n,
+                    "ops_s": n / sum(latencias),
+                    "p50_us": _percentil(micros, 50),
+                    "p95_us": _percentil(micros, 95),
+                    "p99_us": _percentil(micros, 99),
+                    "pico_kib": pico / 1024,
+                }
+            utils.descarregar_log()
+        finally:
+            utils.configurar_persistencia()
+            utils.ARQUIVO_DADOS, utils.ARQUIVO_JOURNAL, utils.ARQUIVO_SQLITE, utils.ARQUIVO_LOG = originais
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {"usuarios": n_usuarios, "contas": n_contas, "transacoes": n_transacoes,
+                       "iteracoes": iteracoes, "persistencia": persistencia, "semente": semente},
+        "casos": casos,
+    }
+
+
+def imprimir_relatorio(relatorio, base=None, tolerancia=0.2):
+    """Imprime o relatório; com `base`, compara ops/s e marca quedas acima de `tolerancia`.
+
+    Retorna a lista de casos com regressão.
+    """
+    parametros = relatorio["parametros"]
+    print(f"\n==== Núcleo: {parametros['contas']} contas, {parametros['transacoes']} transações "
+          f"({parametros['persistencia']}, Python {relatorio['python']}) ====")
+    cabecalho = f"{'caso':26} | {'ops/s':>11} | {'p50 µs':>9} | {'p95 µs':>9} | {'p99 µs':>9} | {'pico KiB':>9}"
+    print(cabecalho + (" | vs base" if base else ""))
+    regressoes = []
+    for nome, caso in relatorio["casos"].items():
+        linha = (f"{nome:26} | {caso['ops_s']:11,.0f} | {caso['p50_us']:9.1f} | {caso['p95_us']:9.1f} | "
+                 f"{caso['p99_us']:9.1f} | {caso['pico_kib']:9.1f}")
+        anterior = (base or {}).get("casos", {}).get(nome)
+        if anterior:
+            variacao = caso["ops_s"] / anterior["ops_s"] - 1
+            linha += f" | {variacao:+7.1%}"
+            if variacao < -tolerancia:
+                linha += " REGRESSÃO"
+                regressoes.append(nome)
+        print(linha)
+    if base and base.get("parametros") != parametros:
+        print("[AVISO] Parâmetros diferentes dos da base; a comparação é apenas indicativa.")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do sistema bancário.")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p_dinheiro = sub.add_parser("dinheiro", help="centavos inteiros vs Decimal vs float")
+    p_dinheiro.add_argument("--operacoes", type=int, default=1_000_000)
+
+    p_salvamento = sub.add_parser("salvamento", help="latência de salvar o snapshot JSON")
+    p_salvamento.add_argument("--usuarios", type=int, default=1000)
+    p_salvamento.add_argument("--contas", type=int, default=2000)
+    p_salvamento.add_argument("--transacoes", type=int, default=20000)
+    p_salvamento.add_argument("--repeticoes", type=int, default=20)
+
+    p_memoria = sub.add_parser("memoria", help="memória por conta: dicts vs __slots__")
+    p_memoria.add_argument("--usuarios", type=int, default=1000)
+    p_memoria.add_argument("--contas", type=int, default=10000)
+    p_memoria.add_argument("--transacoes", type=int, default=100000)
+
+    p_carregamento = sub.add_parser("carregamento", help="inicialização: carregamento completo vs preguiçoso")
+    p_carregamento.add_argument("--usuarios", type=int, default=10000)
+    p_carregamento.add_argument("--contas", type=int, default=20000)
+    p_carregamento.add_argument("--transacoes", type=int, default=1_000_000)
+
+    p_servidor = sub.add_parser("servidor", help="gerador de carga para servidor.py (ops/s e p99)")
+    p_servidor.add_argument("--clientes", type=int, default=50)
+    p_servidor.add_argument("--requisicoes", type=int, default=200)
+    p_servidor.add_argument("--contas", type=int, default=100)
+    p_servidor.add_argument("--persistencia", choices=("json", "journal", "sqlite"), default="journal")
+
+    p_nucleo = sub.add_parser("nucleo", help="caminhos quentes: operações, extrato, persistência, busca e log")
+    p_nucleo.add_argument("--usuarios", type=int, default=500)
+    p_nucleo.add_argument("--contas", type=int, default=1000)
+    p_nucleo.add_argument("--transacoes", type=int, default=10000)
+    p_nucleo.add_argument("--iteracoes", type=int, default=200)
+    p_nucleo.add_argument("--persistencia", choices=("json", "journal", "sqlite"), default="json")
+    p_nucleo.add_argument("--salvar", metavar="RELATORIO", help="grava o relatório em JSON")
+    p_nucleo.add_argument("--comparar", metavar="BASE", help="compara com um relatório gravado antes")
+    p_nucleo.add_argument("--tolerancia", type=float, default=0.2,
+                          help="queda de ops/s aceita antes de acusar regressão (padrão 0.2 = 20%%)")
+
+    p_mascaramento = sub.add_parser("mascaramento", help="mascaramento do log: três passadas vs passada única")
+    p_mascaramento.add_argument("--textos", type=int, default=20000)
+    p_mascaramento.add_argument("--repeticoes", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    if args.benchmark == "dinheiro":
+        benchmark_dinheiro(args.operacoes)
+    elif args.benchmark == "salvamento":
+        benchmark_salvamento(args.usuarios, args.contas, args.transacoes, args.repeticoes)
+    elif args.benchmark == "memoria":
+        benchmark_memoria(args.usuarios, args.contas, args.transacoes)
+    elif args.benchmark == "carregamento":
+        benchmark_carregamento(args.usuarios, args.contas, args.transacoes)
+    elif args.benchmark == "servidor":
+        benchmark_servidor(args.clientes, args.requisicoes, args.contas, args.persistencia)
+    elif args.benchmark == "mascaramento":
+        benchmark_mascaramento(args.textos, args.repeticoes)
+    elif args.benchmark == "nucleo":
+        relatorio = benchmark_nucleo(args.usuarios, args.contas, args.transacoes, args.iteracoes, args.persistencia)
+        base = None
+        if args.comparar:
+            with open(args.comparar, encoding="utf-8") as f:
+                base = json.load(f)
+        if args.salvar:
+            with open(args.salvar, "w", encoding="utf-8") as f:
+                json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        if imprimir_relatorio(relatorio, base, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""Motor de transações seguro para uso por várias threads."""
+
+import queue
+import threading
+
+from datetime import datetime
+
+from utils import log_transacao, salvar_dados, validar_cpf, validar_data, AGENCIA_PADRAO
+from models import _aplicar_deposito, _aplicar_saque, _aplicar_transferencia, criar_usuario_obj
+from entidades import Conta
+from persistencia import serializar_conta
+from repositorio import Repositorio
+
+_PARAR = object()
+
+
+class MotorConcorrente:
+    """Aplica depósitos, saques e transferências vindos de várias threads.
+
+    Cada conta tem sua própria trava; uma transferência trava as duas contas
+    sempre em ordem crescente de `numero_conta`, o que impede deadlocks entre
+    transferências cruzadas (A->B e B->A). As alterações não são gravadas pela
+    thread que operou: vão para uma fila consumida por uma única thread
+    escritora, que junta até `tamanho_lote` operações por salvamento.
+
+    Durante o salvamento a escritora segura todas as travas (na mesma ordem),
+    de modo que o snapshot gravado nunca contém uma transferência pela metade;
+    usuários e contas novos são criados sob a mesma trava global da escritora.
+    Use `descarregar()` para esperar a gravação do que já foi enfileirado e
+    `fechar()` ao final.
+    """
+    def __init__(self, usuarios, contas, repositorio=None, proximo_numero_conta=None, tamanho_lote=500,
+                 salvar=salvar_dados):
+        self.usuarios = usuarios
+        self.contas = contas
+        self.repositorio = repositorio if repositorio is not None else Repositorio(usuarios, contas)
+        self.proximo_numero_conta = proximo_numero_conta or len(contas) + 1
+        self.tamanho_lote = tamanho_lote
+        self.salvar = salvar
+        self.falhas_gravacao = 0
+        self._travas = {}
+        self._trava_travas = threading.Lock()
+        self._fila = queue.Queue()
+        self._escritora = threading.Thread(target=self._executar, name="motor-escritor", daemon=True)
+        self._escritora.start()
+
+    def _travas_existentes(self, numeros):
+        """Travas das contas existentes entre `numeros`, em ordem crescente (exige `_trava_travas`).
+
+        Números sem conta não ganham trava: chegam de clientes do servidor e
+        fariam a tabela de travas crescer sem limite.
+        """
+        travas = []
+        for numero in sorted(set(numeros)):
+            trava = self._travas.get(numero)
+            if trava is None and self.repositorio.buscar_conta(numero):
+                trava = self._travas[numero] = threading.Lock()
+            if trava is not None:
+                travas.append(trava)
+        return travas
+
+    def _travas_das_contas(self, *numeros):
+        """Travas das contas informadas que existem, em ordem crescente de número (sem repetição)."""
+        with self._trava_travas:
+            return self._travas_existentes(numeros)
+
+    def _com_travas(self, numeros, operacao):
+        travas = self._travas_das_contas(*numeros)
+        if len(travas) < len(set(numeros)):
+            # Alguma conta não existe e a operação deve falhar com a mensagem dela;
+            # sob a trava global, nenhuma conta é criada no meio da operação
+            with self._trava_travas:
+                return self._aplicar_com_travas(self._travas_existentes(numeros), operacao)
+        return self._aplicar_com_travas(travas, operacao)
+
+    def _aplicar_com_travas(self, travas, operacao):
+        for trava in travas:
+            trava.acquire()
+        try:
+            mensagem, alteracoes = operacao()
+            # Enfileirado ainda sob as travas: operações na mesma conta chegam à
+            # escritora na ordem em que foram aplicadas (cada movimento grava o
+            # saldo absoluto)
+            self._fila.put(alteracoes)
+        finally:
+            for trava in reversed(travas):
+                trava.release()
+        return mensagem
+
+    def _buscar(self, numero_conta):
+        conta = self.repositorio.buscar_conta(numero_conta)
+        if not conta:
+            raise ValueError("Conta não encontrada.")
+        return conta
+
+    @log_transacao("Depósito")
+    def depositar(self, numero_conta, valor):
+        """Realiza depósito na conta `numero_conta`. `valor` é informado em reais."""
+        conta = self._buscar(numero_conta)
+        return self._com_travas([numero_conta], lambda: _aplicar_deposito(conta, valor))
+
+    @log_transacao("Saque")
+    def sacar(self, numero_conta, valor):
+        """Realiza saque da conta `numero_conta`. `valor` é informado em reais."""
+        conta = self._buscar(numero_conta)
+        return self._com_travas([numero_conta], lambda: _aplicar_saque(conta, valor))
+
+    @log_transacao("Transferência")
+    def transferir(self, numero_origem, numero_destino, valor):
+        """Realiza transferência entre contas. `valor` é informado em reais."""
+        return self._com_travas(
+            [numero_origem, numero_destino],
+            lambda: _aplicar_transferencia(numero_origem, numero_destino, valor, self.repositorio),
+        )
+
+    def criar_usuario(self, nome, cpf, data_nascimento, endereco):
+        """Cadastra um usuário, com as mesmas validações do CLI e da GUI."""
+        if not validar_cpf(cpf):
+            raise ValueError("CPF inválido!")
+        if not validar_data(data_nascimento):
+            raise ValueError("Data inválida! Use formato dd-mm-aaaa")
+        with self._trava_travas:
+            if self.repositorio.buscar_usuario(cpf):
+                raise ValueError("CPF já cadastrado!")
+            usuario = criar_usuario_obj(nome, cpf, data_nascimento, endereco)
+            self.repositorio.adicionar_usuario(usuario)
+            self._fila.put([{"op": "usuario", "dados": usuario.para_dict()}])
+        return "Usuário criado com sucesso!"
+
+    @log_transacao("Criação de Conta")
+    def criar_conta(self, cpf):
+        """Abre uma conta para o titular `cpf`; retorna o número da conta criada."""
+        with self._trava_travas:
+            usuario = self.repositorio.buscar_usuario(cpf)
+            if not usuario:
+                raise ValueError("Usuário não encontrado.")
+            conta = Conta(
+                agencia=AGENCIA_PADRAO,
+                numero_conta=self.proximo_numero_conta,
+                usuario=usuario,
+                data_criacao=datetime.now().isoformat(),
+            )
+            self.repositorio.adicionar_conta(conta)
+            self.proximo_numero_conta += 1
+            self._travas[conta["numero_conta"]] = threading.Lock()
+            # Cópia serializada: a escritora grava a conta como foi criada, sem os
+            # movimentos posteriores (que têm seus próprios registros)
+            self._fila.put([{"op": "conta", "dados": serializar_conta(conta)}])
+        return conta["numero_conta"]
+
+    def extrato(self, numero_conta):
+        """Retorna (saldo_centavos, cópia da lista de transações) lidos sob a trava da conta."""
+        conta = self._buscar(numero_conta)
+        trava, = self._travas_das_contas(numero_conta)
+        with trava:
+            return conta["saldo_centavos"], list(conta["transacoes"])
+
+    def descarregar(self):
+        """Bloqueia até que todas as operações já realizadas tenham sido gravadas."""
+        self._fila.join()
+
+    def fechar(self):
+        """Grava as alterações pendentes e encerra a thread escritora."""
+        if self._escritora.is_alive():
+            self._fila.put(_PARAR)
+            self._escritora.join()
+
+    def _executar(self):
+        while True:
+            item = self._fila.get()
+            lotes = []
+            while item is not _PARAR:
+                lotes.append(item)
+                if len(lotes) >= self.tamanho_lote:
+                    break
+                try:
+                    item = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+            parar = item is _PARAR
+            recebidos = len(lotes) + parar
+            if lotes:
+                adicionais, parar_depois = self._gravar(lotes)
+                recebidos += adicionais
+                parar = parar or parar_depois
+            for _ in range(recebidos):
+                self._fila.task_done()
+            if parar:
+                return
+
+    def _gravar(self, lotes):
+        """Grava os lotes e tudo o que for enfileirado até a escritora obter as travas.
+
+        Com todas as travas seguras, nenhuma operação está em andamento e a fila
+        contém exatamente as operações já aplicadas e ainda não gravadas; elas
+        entram neste mesmo salvamento. Assim um snapshot (JSON, ou a compactação
+        do journal) nunca inclui operações que depois seriam gravadas de novo.
+        Retorna (itens adicionais retirados da fila, se um pedido de parada veio junto).
+        """
+        adicionais, parar = 0, False
+        # Nenhuma trava nova é criada enquanto a escritora segura todas as existentes
+        with self._trava_travas:
+            travas = [self._travas[numero] for numero in sorted(self._travas)]
+            for trava in travas:
+                trava.acquire()
+            try:
+                while True:
+                    try:
+                        item = self._fila.get_nowait()
+                    except queue.Empty:
+                        break
+                    adicionais += 1
+                    if item is _PARAR:
+                        parar = True
+                    else:
+                        lotes.append(item)
+                alteracoes = [alteracao for lote in lotes for alteracao in lote]
+                self.salvar(self.usuarios, self.contas, self.proximo_numero_conta, alteracoes=alteracoes)
+            except Exception as e:
+                self.falhas_gravacao += 1
+                print(f"[AVISO] Não foi possível gravar {len(alteracoes)} alterações: {e}")
+            finally:
+                for trava in reversed(travas):
+                    trava.release()
+        return adicionais, parar
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""Representação monetária em centavos inteiros."""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+def para_centavos(valor):
+    """Converte um valor em reais (int, float, str ou Decimal) para centavos inteiros.
+
+    Floats e strings passam por Decimal a partir do texto para evitar erros de
+    representação binária (ex.: 0.285 vira 29 centavos, e não 28).
+    Arredonda meio para cima.
+    """
+    if isinstance(valor, bool):
+        raise ValueError("Valor monetário inválido.")
+    if isinstance(valor, int):
+        return valor * 100
+    try:
+        if isinstance(valor, str):
+            valor = Decimal(valor.strip().replace(",", "."))
+        elif not isinstance(valor, Decimal):
+            valor = Decimal(str(valor))
+        return int(valor.scaleb(2).to_integral_value(ROUND_HALF_UP))
+    except (InvalidOperation, ValueError, OverflowError):
+        raise ValueError("Valor monetário inválido.") from None
+
+
+def formatar_centavos(centavos):
+    """Formata centavos como reais com duas casas (ex.: 123456 -> "1234.56")."""
+    sinal = "-" if centavos < 0 else ""
+    inteiro, resto = divmod(abs(centavos), 100)
+    return f"{sinal}{inteiro}.{resto:02d}"
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Entidades de domínio compactas (__slots__) com acesso no estilo dict."""
+
+from resumos import acumular, calcular_resumos
+
+
+class RegistroCompacto:
+    """Base para registros com `__slots__`.
+
+    Sem o `__dict__` por instância, cada objeto ocupa bem menos memória que um
+    dict com as mesmas chaves. O acesso `registro["campo"]`, `get`, `in` e a
+    comparação com dicts continuam funcionando, de modo que o código escrito
+    para os dicts antigos segue válido. `para_dict`/`de_dict` fazem a ponte com
+    o formato JSON de armazenamento.
+
+    Os campos públicos ficam em `_campos` (por padrão, os próprios `__slots__`).
+    """
+    __slots__ = ()
+    _campos = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "_campos" not in cls.__dict__:
+            cls._campos = cls.__slots__
+
+    def __getitem__(self, chave):
+        try:
+            return getattr(self, chave)
+        except (AttributeError, TypeError):
+            raise KeyError(chave) from None
+
+    def __setitem__(self, chave, valor):
+        if chave not in self._campos:
+            raise KeyError(chave)
+        setattr(self, chave, valor)
+
+    def __contains__(self, chave):
+        return chave in self._campos
+
+    def get(self, chave, padrao=None):
+        if chave in self._campos:
+            return getattr(self, chave, padrao)
+        return padrao
+
+    def keys(self):
+        return self._campos
+
+    def items(self):
+        return [(chave, getattr(self, chave)) for chave in self._campos]
+
+    def para_dict(self):
+        return {chave: getattr(self, chave) for chave in self._campos}
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(**{chave: dados[chave] for chave in cls._campos if chave in dados})
+
+    def __eq__(self, outro):
+        if isinstance(outro, RegistroCompacto):
+            return type(self) is type(outro) and self.para_dict() == outro.para_dict()
+        if isinstance(outro, dict):
+            return self.para_dict() == outro
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        campos = ", ".join(f"{chave}={getattr(self, chave)!r}" for chave in self._campos)
+        return f"{type(self).__name__}({campos})"
+
+
+class Usuario(RegistroCompacto):
+    __slots__ = ("nome", "cpf", "data_nascimento", "endereco", "data_criacao")
+
+    def __init__(self, nome=None, cpf=None, data_nascimento=None, endereco=None, data_criacao=None):
+        self.nome = nome
+        self.cpf = cpf
+        self.data_nascimento = data_nascimento
+        self.endereco = endereco
+        self.data_criacao = data_criacao
+
+
+class Transacao(RegistroCompacto):
+    """Entrada do extrato. `contraparte` é None ou {"agencia", "numero_conta"}."""
+    __slots__ = ("timestamp", "tipo", "valor_centavos", "contraparte", "descricao")
+
+    def __init__(self, timestamp=None, tipo="Transação", valor_centavos=None, contraparte=None, descricao=""):
+        self.timestamp = timestamp
+        self.tipo = tipo
+        self.valor_centavos = valor_centavos
+        self.contraparte = contraparte
+        self.descricao = descricao
+
+
+class Conta(RegistroCompacto):
+    """Conta bancária; `usuario` é o objeto Usuario compartilhado do titular.
+
+    As transações podem ser adiadas com `adiar_transacoes(fonte)`: a lista só é
+    montada, via `fonte.carregar()`, no primeiro acesso a `transacoes`.
+
+    `resumos` guarda os totais por mês/dia (ver resumos.py), atualizados por
+    `registrar_transacao`; contas gravadas sem eles têm os resumos calculados
+    a partir do histórico no primeiro acesso.
+    """
+    __slots__ = ("agencia", "numero_conta", "usuario", "saldo_centavos", "_transacoes",
+                 "saques_realizados", "ultimo_reset_saques", "data_criacao", "fonte_transacoes", "_resumos")
+    _campos = ("agencia", "numero_conta", "usuario", "saldo_centavos", "transacoes",
+               "saques_realizados", "ultimo_reset_saques", "data_criacao", "resumos")
+
+    def __init__(self, agencia=None, numero_conta=None, usuario=None, saldo_centavos=0, transacoes=None,
+                 saques_realizados=0, ultimo_reset_saques="", data_criacao=None, resumos=None):
+        self.agencia = agencia
+        self.numero_conta = numero_conta
+        self.usuario = usuario
+        self.saldo_centavos = saldo_centavos
+        self.fonte_transacoes = None
+        self._transacoes = transacoes if transacoes is not None else []
+        self.saques_realizados = saques_realizados
+        self.ultimo_reset_saques = ultimo_reset_saques
+        self.data_criacao = data_criacao
+        # Conta nova (sem histórico) já começa com resumos vazios
+        self._resumos = resumos if resumos is not None or transacoes is not None else {}
+
+    @property
+    def transacoes(self):
+        if self.fonte_transacoes is not None:
+            self._transacoes = self.fonte_transacoes.carregar()
+            self.fonte_transacoes = None
+        return self._transacoes
+
+    @transacoes.setter
+    def transacoes(self, transacoes):
+        self._transacoes = transacoes
+        self.fonte_transacoes = None
+
+    def adiar_transacoes(self, fonte):
+        """Adia a leitura das transações até o primeiro acesso."""
+        self._transacoes = None
+        self.fonte_transacoes = fonte
+
+    @property
+    def resumos(self):
+        if self._resumos is None:
+            self._resumos = calcular_resumos(self.transacoes)
+        return self._resumos
+
+    @resumos.setter
+    def resumos(self, resumos):
+        self._resumos = resumos
+
+    def registrar_transacao(self, transacao):
+        """Acrescenta a transação ao extrato e aos resumos (use após atualizar o saldo)."""
+        self.transacoes.append(transacao)
+        if self._resumos is not None:
+            acumular(self._resumos, transacao, self.saldo_centavos)
+
+
+class ResumoConta(RegistroCompacto):
+    """Linha de listagem de contas produzida por ContaIterador."""
+    __slots__ = ("numero_conta", "agencia", "titular", "cpf", "saldo_centavos", "data_criacao")
+
+    def __init__(self, numero_conta=None, agencia=None, titular=None, cpf=None, saldo_centavos=0, data_criacao=None):
+        self.numero_conta = numero_conta
+        self.agencia = agencia
+        self.titular = titular
+        self.cpf = cpf
+        self.saldo_centavos = saldo_centavos
+        self.data_criacao = data_criacao
+
+
+class LimiteConta(RegistroCompacto):
+    """Limites de saque de uma conta: valor máximo por saque e saques por dia."""
+    __slots__ = ("valor_maximo_centavos", "saques_diarios")
+
+    def __init__(self, valor_maximo_centavos=None, saques_diarios=None):
+        self.valor_maximo_centavos = valor_maximo_centavos
+        self.saques_diarios = saques_diarios
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""Escritor assíncrono de log: fila limitada + thread dedicada gravando em lote, com rotação."""
+
+import atexit
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+POLITICA_BLOQUEAR = "bloquear"
+POLITICA_DESCARTAR = "descartar"
+
+_DESCARREGAR = object()
+_PARAR = object()
+
+
+class RotacaoLog:
+    """Rotação do arquivo de log por tamanho e/ou por período, com retenção.
+
+    O arquivo é rotacionado quando passa de `tamanho_maximo` bytes ou quando
+    muda o período de `intervalo` segundos (contado desde a época Unix, em
+    UTC; 86400 = um por dia) entre a última gravação e a atual. O segmento
+    rotacionado é renomeado para "<arquivo>.AAAAMMDD-HHMMSS-ffffff" e, com
+    `comprimir`, compactado em .gz numa thread própria, assim como a remoção
+    dos segmentos além dos `manter` mais recentes: quem grava o log só paga
+    pela renomeação. `tamanho_maximo`/`intervalo` None desativam o critério.
+    A partir da primeira rotação, o encerramento do interpretador espera
+    essas threads (`aguardar`), para não deixar segmentos sem compactar.
+    """
+    def __init__(self, tamanho_maximo=None, intervalo=None, manter=5, comprimir=True):
+        self.tamanho_maximo = tamanho_maximo
+        self.intervalo = intervalo
+        self.manter = manter
+        self.comprimir = comprimir
+        self.rotacoes = 0
+        self._lock = threading.Lock()
+        self._threads = []
+        self._aguardar_no_encerramento = False
+
+    def periodo(self, instante):
+        return int(instante // self.intervalo) if self.intervalo else None
+
+    def deve_rotacionar(self, tamanho, periodo_arquivo, agora):
+        """Se um arquivo com `tamanho` bytes, gravado pela última vez no período `periodo_arquivo`, deve rodar."""
+        if self.tamanho_maximo and tamanho >= self.tamanho_maximo:
+            return True
+        return tamanho > 0 and self.intervalo is not None and periodo_arquivo != self.periodo(agora)
+
+    @staticmethod
+    def segmentos(caminho):
+        """Segmentos rotacionados de `caminho` (comprimidos ou não), do mais antigo ao mais novo."""
+        caminho = Path(caminho)
+        return sorted(caminho.parent.glob(caminho.name + ".[0-9]*"),
+                      key=lambda segmento: segmento.name[:-3] if segmento.suffix == ".gz" else segmento.name)
+
+    def rotacionar(self, caminho):
+        """Renomeia o arquivo atual para um segmento e agenda compressão e retenção."""
+        caminho = Path(caminho)
+        base = f"{caminho.name}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        destino, sequencia = caminho.with_name(base), 1
+        while destino.exists() or destino.with_name(destino.name + ".gz").exists():
+            destino, sequencia = caminho.with_name(f"{base}-{sequencia}"), sequencia + 1
+        os.replace(caminho, destino)
+        self.rotacoes += 1
+        thread = threading.Thread(target=self._finalizar, args=(caminho, destino), name="rotacao-log", daemon=True)
+        self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+        if not self._aguardar_no_encerramento:
+            self._aguardar_no_encerramento = True
+            atexit.register(self.aguardar)
+        thread.start()
+        return destino
+
+    def aguardar(self):
+        """Espera a compressão e a limpeza dos segmentos já rotacionados."""
+        while True:
+            pendentes = [thread for thread in self._threads if thread.is_alive()]
+            if not pendentes:
+                return
+            for thread in pendentes:
+                thread.join()
+
+    def _finalizar(self, caminho, segmento):
+        with self._lock:
+            try:
+                if self.comprimir:
+                    temporario = segmento.with_name(segmento.name + ".gz.tmp")
+                    with open(segmento, "rb") as origem, gzip.open(temporario, "wb") as destino:
+                        shutil.copyfileobj(origem, destino)
+                    os.replace(temporario, segmento.with_name(segmento.name + ".gz"))
+                    os.remove(segmento)
+                segmentos = self.segmentos(caminho)
+                for antigo in segmentos[:max(len(segmentos) - self.manter, 0)]:
+                    os.remove(antigo)
+            except OSError as e:
+                print(f"[AVISO] Não foi possível concluir a rotação do log: {e}")
+
+
+class EscritorLogAssincrono:
+    """Grava linhas de log em segundo plano.
+
+    As linhas enviadas vão para uma fila limitada a `tamanho_fila`. A thread
+    escritora acumula até `tamanho_lote` linhas (ou espera no máximo
+    `intervalo` segundos) e as grava de uma vez, mantendo o arquivo aberto
+    entre os lotes. Com a fila cheia, a política "bloquear" faz o chamador
+    esperar e "descartar" abandona a linha, contabilizando em `descartadas`.
+
+    `obter_arquivo` é chamado a cada lote e deve retornar o caminho atual do
+    log; se o caminho mudar, o arquivo é reaberto. Com `rotacao` (RotacaoLog),
+    o arquivo é rotacionado antes do lote que o encontrar cheio ou vencido.
+    """
+    def __init__(self, obter_arquivo, tamanho_fila=10000, tamanho_lote=200, intervalo=0.5,
+                 politica=POLITICA_BLOQUEAR, rotacao=None):
+        if politica not in (POLITICA_BLOQUEAR, POLITICA_DESCARTAR):
+            raise ValueError(f"Política de fila desconhecida: {politica}")
+        self.obter_arquivo = obter_arquivo
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.politica = politica
+        self.rotacao = rotacao
+        self.descartadas = 0
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._lock_gravacao = threading.Lock()
+        self._caminho = None
+        self._handle = None
+        self._tamanho = 0
+        self._periodo = None
+
+    def _iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._executar, name="escritor-log", daemon=True)
+                    self._thread.start()
+
+    def enviar(self, linha):
+        """Enfileira uma linha (sem quebra de linha final) para gravação."""
+        self._iniciar()
+        if self.politica == POLITICA_DESCARTAR:
+            try:
+                self._fila.put_nowait(linha)
+            except queue.Full:
+                self.descartadas += 1
+        else:
+            self._fila.put(linha)
+
+    def gravar(self, linhas):
+        """Grava as linhas imediatamente, na thread de quem chamou (modo síncrono)."""
+        self._gravar(linhas)
+
+    def descarregar(self):
+        """Bloqueia até que todas as linhas enfileiradas tenham sido gravadas."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._fila.put(_DESCARREGAR)
+        self._fila.join()
+
+    def fechar(self):
+        """Grava as linhas pendentes, encerra a thread escritora e espera as rotações em andamento."""
+        if self._thread is not None and self._thread.is_alive():
+            self._fila.put(_PARAR)
+            self._thread.join()
+        self._thread = None
+        if self.rotacao is not None:
+            self.rotacao.aguardar()
+
+    def _executar(self):
+        while True:
+            item = self._fila.get()
+            lote = []
+            recebidos = 1
+            limite = time.monotonic() + self.intervalo
+            while item is not _DESCARREGAR and item is not _PARAR:
+                lote.append(item)
+                if len(lote) >= self.tamanho_lote:
+                    break
+                restante = limite - time.monotonic()
+                try:
+                    item = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                recebidos += 1
+            self._gravar(lote)
+            for _ in range(recebidos):
+                self._fila.task_done()
+            if item is _PARAR:
+                self._fechar_arquivo()
+                return
+
+    def _gravar(self, linhas):
+        if not linhas:
+            return
+        with self._lock_gravacao:
+            try:
+                caminho = self.obter_arquivo()
+                if caminho != self._caminho:
+                    self._fechar_arquivo()
+                if self._handle is None:
+                    self._abrir(caminho)
+                if self.rotacao is not None:
+                    agora = time.time()
+                    if self.rotacao.deve_rotacionar(self._tamanho, self._periodo, agora):
+                        self._fechar_arquivo()
+                        self.rotacao.rotacionar(caminho)
+                        self._abrir(caminho)
+                    self._periodo = self.rotacao.periodo(agora)
+                texto = "\n".join(linhas) + "\n"
+                self._handle.write(texto)
+                self._handle.flush()
+                self._tamanho += len(texto.encode("utf-8"))
+            except Exception as e:
+                self._fechar_arquivo()
+                print(f"[AVISO] Não foi possível registrar log: {e}")
+
+    def _abrir(self, caminho):
+        self._handle = open(caminho, "a", encoding="utf-8")
+        self._caminho = caminho
+        self._tamanho = self._handle.tell()
+        if self.rotacao is not None:
+            self._periodo = self.rotacao.periodo(os.path.getmtime(caminho)) if self._tamanho else None
+
+    def _fechar_arquivo(self):
+        if self._handle is not None:
+            self._handle.close()
+        self._handle = None
+        self._caminho = None
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Limites de saque: contador diário por data, limites por conta e consulta de contas no limite."""
+
+import json
+import threading
+from datetime import date
+
+from dinheiro import para_centavos, formatar_centavos
+from entidades import LimiteConta
+from persistencia import gravar_json_atomico
+
+
+def dia_atual():
+    """Data de hoje no formato usado em `ultimo_reset_saques` (aaaa-mm-dd)."""
+    return date.today().isoformat()
+
+
+def saques_do_dia(conta, hoje=None):
+    """Saques realizados pela conta em `hoje`, sem alterar a conta.
+
+    `saques_realizados` vale apenas para o dia gravado em `ultimo_reset_saques`;
+    se a data for outra, o contador de hoje é zero.
+    """
+    hoje = hoje or dia_atual()
+    if conta.get("ultimo_reset_saques", "") != hoje:
+        return 0
+    return conta.get("saques_realizados", 0)
+
+
+class ControleLimites:
+    """Aplica os limites de saque e mantém o índice dos saques do dia.
+
+    O contador de cada conta é o par (`ultimo_reset_saques`, `saques_realizados`):
+    a consulta não grava nada e a virada do dia não exige salvamento, pois o
+    contador só muda junto com o próprio saque, que já é persistido.
+
+    Limites específicos por conta ficam em um arquivo JSON à parte
+    (`obter_arquivo()` devolve o caminho, lido no primeiro uso); as demais
+    contas usam os limites padrão.
+
+    Para responder "quais contas estão perto do limite" sem percorrer todas as
+    contas, o controle guarda apenas as contas que sacaram no dia corrente. O
+    índice é montado uma vez por dia a partir das contas e atualizado a cada
+    saque registrado.
+    """
+    def __init__(self, obter_arquivo=None, valor_maximo=500, saques_diarios=3):
+        self.obter_arquivo = obter_arquivo
+        self.padrao = LimiteConta(para_centavos(valor_maximo), saques_diarios)
+        self._limites = None
+        self._dia = None
+        self._saques_hoje = {}
+        self._lock = threading.Lock()
+
+    # ----- limites por conta -----
+
+    def _carregar_limites(self):
+        if self._limites is not None:
+            return self._limites
+        limites = {}
+        caminho = self.obter_arquivo() if self.obter_arquivo else None
+        if caminho is not None:
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    dados = json.load(f)
+                limites = {int(numero): LimiteConta.de_dict(valores) for numero, valores in dados.items()}
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"[AVISO] Não foi possível carregar limites das contas: {e}")
+        self._limites = limites
+        return limites
+
+    def limite(self, numero_conta):
+        """Limites efetivos da conta (os específicos, completados pelos padrão)."""
+        especifico = self._carregar_limites().get(numero_conta)
+        if especifico is None:
+            return self.padrao
+        return LimiteConta(
+            especifico["valor_maximo_centavos"] if especifico["valor_maximo_centavos"] is not None
+            else self.padrao["valor_maximo_centavos"],
+            especifico["saques_diarios"] if especifico["saques_diarios"] is not None
+            else self.padrao["saques_diarios"],
+        )
+
+    def definir_limite(self, numero_conta, valor_maximo=None, saques_diarios=None):
+        """Define limites específicos para uma conta (None mantém o padrão) e grava o arquivo."""
+        if valor_maximo is not None and para_centavos(valor_maximo) <= 0:
+            raise ValueError("Limite de valor deve ser maior que zero.")
+        if saques_diarios is not None and int(saques_diarios) < 0:
+            raise ValueError("Limite de saques diários não pode ser negativo.")
+        limites = self._carregar_limites()
+        if valor_maximo is None and saques_diarios is None:
+            limites.pop(numero_conta, None)
+        else:
+            limites[numero_conta] = LimiteConta(
+                para_centavos(valor_maximo) if valor_maximo is not None else None,
+                int(saques_diarios) if saques_diarios is not None else None,
+            )
+        caminho = self.obter_arquivo() if self.obter_arquivo else None
+        if caminho is not None:
+            gravar_json_atomico(caminho, {str(numero): limite.para_dict() for numero, limite in limites.items()},
+                                manter_backup=False)
+        return self.limite(numero_conta)
+
+    # ----- saques -----
+
+    def validar_saque(self, conta, centavos, hoje=None):
+        """Levanta ValueError se o saque ultrapassar algum limite da conta."""
+        limite = self.limite(conta["numero_conta"])
+        if centavos > limite["valor_maximo_centavos"]:
+            raise ValueError(f"Limite de saque é R$ {formatar_centavos(limite['valor_maximo_centavos'])}")
+        if saques_do_dia(conta, hoje) >= limite["saques_diarios"]:
+            raise ValueError("Limite de saques diários atingido.")
+
+    def registrar_saque(self, conta, hoje=None):
+        """Conta um saque no contador do dia (chamado junto com o saque)."""
+        hoje = hoje or dia_atual()
+        conta["saques_realizados"] = saques_do_dia(conta, hoje) + 1
+        conta["ultimo_reset_saques"] = hoje
+        with self._lock:
+            if self._dia is None:
+                return  # índice ainda não montado; será lido das contas
+            if self._dia != hoje:
+                # Novo dia: nenhuma conta sacou hoje além desta
+                self._dia, self._saques_hoje = hoje, {}
+            self._saques_hoje[conta["numero_conta"]] = conta["saques_realizados"]
+
+    def indexar(self, contas, hoje=None):
+        """Monta o índice de saques do dia a partir das contas."""
+        hoje = hoje or dia_atual()
+        saques_hoje = {}
+        for conta in contas:
+            quantidade = saques_do_dia(conta, hoje)
+            if quantidade:
+                saques_hoje[conta["numero_conta"]] = quantidade
+        with self._lock:
+            self._dia, self._saques_hoje = hoje, saques_hoje
+
+    def proximos_do_limite(self, contas, margem=1, hoje=None):
+        """Contas com no máximo `margem` saques restantes hoje, das mais próximas do limite.
+
+        Retorna dicts com "numero_conta", "saques" e "limite". São examinadas as
+        contas que já sacaram hoje e as que têm limite específico (um limite de
+        0 ou 1 saque pode estar no limite sem nenhum saque no dia); `contas` é
+        lido apenas para montar o índice na primeira consulta do dia, ou por
+        inteiro se a margem alcançar o limite padrão.
+        """
+        hoje = hoje or dia_atual()
+        if self._dia != hoje:
+            self.indexar(contas, hoje)
+        with self._lock:
+            saques_hoje = dict(self._saques_hoje)
+        candidatas = set(saques_hoje)
+        candidatas.update(numero for numero, limite in self._carregar_limites().items()
+                          if limite["saques_diarios"] is not None)
+        if self.padrao["saques_diarios"] <= margem:
+            candidatas.update(conta["numero_conta"] for conta in contas)
+        resultado = []
+        for numero_conta in candidatas:
+            quantidade = saques_hoje.get(numero_conta, 0)
+            limite = self.limite(numero_conta)["saques_diarios"]
+            if limite - quantidade <= margem:
+                resultado.append({"numero_conta": numero_conta, "saques": quantidade, "limite": limite})
+        resultado.sort(key=lambda item: (item["limite"] - item["saques"], item["numero_conta"]))
+        return resultado
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Mascaramento de dados sensíveis do log em uma única passada."""
+
+import re
+
+from entidades import Conta
+
+
+class RegraMascara:
+    """Uma regra de mascaramento: `padrao` (regex) trocado por `substituicao`.
+
+    `substituicao` aceita referências a grupos nomeados do padrão (\\g<nome>).
+    Com `gatilho`, a regra só vale quando o texto contém essa palavra
+    (sem diferenciar maiúsculas). Regras sem gatilho devem casar apenas com
+    textos que tenham dígitos, o que permite pular textos sem nenhum dígito.
+    """
+    __slots__ = ("nome", "padrao", "substituicao", "gatilho")
+
+    def __init__(self, nome, padrao, substituicao, gatilho=None):
+        self.nome = nome
+        self.padrao = padrao
+        self.substituicao = substituicao
+        self.gatilho = gatilho
+
+
+# Início de número: um dígito não precedido de letra/dígito (equivale a \b\d).
+# Começar o padrão pelo dígito deixa o regex saltar direto para os dígitos do texto.
+_INICIO_NUMERO = r"\d(?<!\w\d)"
+
+REGRAS_PADRAO = (
+    # CPF (123.456.789-00 ou 12345678900): mantém só os 3 primeiros dígitos
+    RegraMascara("cpf", rf"(?P<cpf_inicio>{_INICIO_NUMERO}\d\d)\.?\d{{3}}\.?\d{{3}}\-?\d{{2}}\b",
+                 r"\g<cpf_inicio>.***.***-**"),
+    # Números com 4 ou mais dígitos (saldos, valores, contas longas)
+    RegraMascara("numero", rf"{_INICIO_NUMERO}\d{{3,}}\b", "****"),
+    # Logradouro de endereços: mantém apenas o tipo (rua, avenida...)
+    RegraMascara("endereco", r"(?i:(?P<logradouro>rua|avenida|av\.|r\.)\s+[^,]+)", r"\g<logradouro> ****",
+                 gatilho="endereco"),
+)
+
+_REFERENCIA_GRUPO = re.compile(r"\\g<(\w+)>")
+
+
+def _compilar_substituicao(substituicao):
+    """Função match -> texto para uma substituição com referências \\g<nome>.
+
+    Feita uma vez por regra, evita interpretar o modelo (match.expand) a cada ocorrência.
+    """
+    partes = _REFERENCIA_GRUPO.split(substituicao)
+    if len(partes) == 1:
+        return lambda match: substituicao
+    if len(partes) == 3:
+        antes, grupo, depois = partes
+        return lambda match: antes + match.group(grupo) + depois
+    # Partes pares são literais, ímpares são nomes de grupos
+    return lambda match: "".join(parte if i % 2 == 0 else match.group(parte) for i, parte in enumerate(partes))
+
+
+class MotorMascaramento:
+    """Aplica as regras de mascaramento com um único regex pré-compilado.
+
+    As regras viram alternativas de um só padrão, testadas na ordem em que
+    foram declaradas, e o texto é percorrido uma vez. As substituições são
+    preparadas na criação do motor. O padrão das regras sem gatilho é
+    compilado de imediato; os que incluem regras com gatilho, no primeiro
+    texto que contiver os gatilhos. Textos sem dígitos e sem gatilho são
+    devolvidos sem passar pelo regex.
+    """
+    def __init__(self, regras=REGRAS_PADRAO):
+        self.regras = tuple(regras)
+        self._tem_digito = re.compile(r"\d").search
+        self._gatilhos = tuple(dict.fromkeys(regra.gatilho.lower() for regra in self.regras if regra.gatilho))
+        self._combinados = {}
+        self._base = self._combinado(())
+
+    def _combinado(self, gatilhos):
+        """regex.sub já ligado à função de substituição das regras ativas com estes gatilhos."""
+        combinado = self._combinados.get(gatilhos)
+        if combinado is None:
+            ativas = [regra for regra in self.regras if regra.gatilho is None or regra.gatilho.lower() in gatilhos]
+            if not ativas:
+                self._combinados[gatilhos] = str
+                return str
+            padrao = re.compile("|".join(f"(?P<_regra{i}>{regra.padrao})" for i, regra in enumerate(ativas)))
+            substituicoes = {f"_regra{i}": _compilar_substituicao(regra.substituicao)
+                             for i, regra in enumerate(ativas)}
+
+            def substituir(match):
+                return substituicoes[match.lastgroup](match)
+
+            sub = padrao.sub
+            combinado = self._combinados[gatilhos] = lambda texto: sub(substituir, texto)
+        return combinado
+
+    def mascarar_texto(self, texto):
+        if self._gatilhos:
+            minusculo = texto.lower()
+            gatilhos = tuple(gatilho for gatilho in self._gatilhos if gatilho in minusculo)
+            if gatilhos:
+                return self._combinado(gatilhos)(texto)
+        if not self._tem_digito(texto):
+            return texto
+        return self._base(texto)
+
+    def mascarar(self, valor):
+        """Versão mascarada de `valor` como texto (None vira "None")."""
+        if valor is None:
+            return "None"
+        if type(valor) is int and -1000 < valor < 1000:
+            return str(valor)  # até 3 dígitos: nenhuma regra se aplica
+        return self.mascarar_texto(valor if type(valor) is str else str(valor))
+
+    def descrever_argumento(self, arg):
+        """Representação de um argumento de operação para o log, conforme o tipo."""
+        if isinstance(arg, (dict, Conta)) and arg.get("numero_conta"):
+            usuario = arg.get("usuario", {})
+            return f"conta={arg.get('numero_conta')} titular={usuario.get('nome', 'Desconhecido')}"
+        if isinstance(arg, (int, str, float)) and len(str(arg)) < 50:
+            return self.mascarar(arg)
+        if isinstance(arg, list):
+            return f"lista({len(arg)} items)"
+        return type(arg).__name__
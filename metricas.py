@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Métricas de latência das operações: histogramas em memória medidos com perf_counter_ns."""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Subdivisões por potência de 2 nos histogramas: cada faixa cobre no máximo
+# 1/16 (6,25%) do seu valor, o que limita o erro dos percentis
+_BITS_SUBFAIXA = 4
+_SUBFAIXAS = 1 << _BITS_SUBFAIXA
+
+
+def _faixa(nanossegundos):
+    """Índice da faixa do histograma para uma duração em ns."""
+    bits = nanossegundos.bit_length()
+    if bits <= _BITS_SUBFAIXA + 1:
+        return nanossegundos
+    deslocamento = bits - _BITS_SUBFAIXA - 1
+    return (deslocamento << _BITS_SUBFAIXA) + (nanossegundos >> deslocamento)
+
+
+def _limites_faixa(faixa):
+    """(início, fim) em ns da faixa, inverso de `_faixa`."""
+    if faixa < 2 * _SUBFAIXAS:
+        return faixa, faixa + 1
+    deslocamento = (faixa >> _BITS_SUBFAIXA) - 1
+    inicio = (faixa - (deslocamento << _BITS_SUBFAIXA)) << deslocamento
+    return inicio, inicio + (1 << deslocamento)
+
+
+class HistogramaLatencia:
+    """Contagem, soma, máximo e faixas logarítmicas das durações de uma operação.
+
+    A memória não cresce com o número de amostras: cada duração só incrementa
+    o contador da sua faixa. Os percentis são estimados pelo meio da faixa
+    (erro relativo de até ~3%); contagem, média e máximo são exatos.
+    """
+    __slots__ = ("contagem", "total_ns", "maximo_ns", "faixas")
+
+    def __init__(self):
+        self.contagem = 0
+        self.total_ns = 0
+        self.maximo_ns = 0
+        self.faixas = {}
+
+    def registrar(self, nanossegundos):
+        self.contagem += 1
+        self.total_ns += nanossegundos
+        if nanossegundos > self.maximo_ns:
+            self.maximo_ns = nanossegundos
+        faixa = _faixa(nanossegundos)
+        self.faixas[faixa] = self.faixas.get(faixa, 0) + 1
+
+    def percentil(self, fracao):
+        """Duração (ns) abaixo da qual está a `fracao` (0 a 1) das amostras."""
+        if not self.contagem:
+            return 0
+        alvo = max(1, round(fracao * self.contagem))
+        acumulado = 0
+        for faixa in sorted(self.faixas):
+            acumulado += self.faixas[faixa]
+            if acumulado >= alvo:
+                inicio, fim = _limites_faixa(faixa)
+                return min((inicio + fim - 1) // 2, self.maximo_ns)
+        return self.maximo_ns
+
+    def resumo(self):
+        """Dict com contagem e média/p50/p95/p99/máximo em microssegundos."""
+        return {
+            "contagem": self.contagem,
+            "media_us": round(self.total_ns / self.contagem / 1000, 3) if self.contagem else 0.0,
+            "p50_us": round(self.percentil(0.50) / 1000, 3),
+            "p95_us": round(self.percentil(0.95) / 1000, 3),
+            "p99_us": round(self.percentil(0.99) / 1000, 3),
+            "max_us": round(self.maximo_ns / 1000, 3),
+        }
+
+
+class ColetorMetricas:
+    """Histogramas de latência por nome de operação, seguros entre threads.
+
+    As operações medidas pelo decorador `log_transacao` usam o nome da
+    função; etapas internas (como a gravação em disco) são registradas como
+    "<operação>.<etapa>", com a operação corrente da thread obtida por
+    `operacao_atual`.
+    """
+    def __init__(self, ativo=True):
+        self.ativo = ativo
+        self._histogramas = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def registrar(self, nome, nanossegundos):
+        with self._lock:
+            histograma = self._histogramas.get(nome)
+            if histograma is None:
+                histograma = self._histogramas[nome] = HistogramaLatencia()
+            histograma.registrar(nanossegundos)
+
+    def operacao_atual(self):
+        """Nome da operação medida em andamento nesta thread (ou None)."""
+        return getattr(self._local, "operacao", None)
+
+    def iniciar_operacao(self, nome):
+        """Marca `nome` como operação corrente da thread; devolve a anterior (para `concluir_operacao`)."""
+        anterior = getattr(self._local, "operacao", None)
+        self._local.operacao = nome
+        return anterior
+
+    def concluir_operacao(self, nome, nanossegundos, anterior):
+        """Registra a duração da operação e restaura a operação corrente anterior."""
+        self._local.operacao = anterior
+        self.registrar(nome, nanossegundos)
+
+    @contextmanager
+    def medir(self, nome):
+        """Mede o bloco e registra a duração em `nome`."""
+        if not self.ativo:
+            yield
+            return
+        inicio = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter_ns() - inicio)
+
+    def medir_etapa(self, etapa):
+        """Mede uma etapa interna como "<operação>.<etapa>" (só `etapa` fora de operações)."""
+        operacao = self.operacao_atual()
+        return self.medir(f"{operacao}.{etapa}" if operacao else etapa)
+
+    def relatorio(self):
+        """{nome: resumo do histograma}, em ordem alfabética de nome."""
+        with self._lock:
+            return {nome: self._histogramas[nome].resumo() for nome in sorted(self._histogramas)}
+
+    def formatar_relatorio(self):
+        """Relatório em tabela de texto."""
+        relatorio = self.relatorio()
+        if not relatorio:
+            return "Nenhuma operação medida."
+        largura = max(24, max(len(nome) for nome in relatorio))
+        linhas = [f"{'operação':{largura}} | {'qtd':>7} | {'média µs':>10} | {'p50 µs':>10} | "
+                  f"{'p95 µs':>10} | {'p99 µs':>10} | {'máx µs':>10}"]
+        for nome, resumo in relatorio.items():
+            linhas.append(f"{nome:{largura}} | {resumo['contagem']:7} | {resumo['media_us']:10.1f} | "
+                          f"{resumo['p50_us']:10.1f} | {resumo['p95_us']:10.1f} | {resumo['p99_us']:10.1f} | "
+                          f"{resumo['max_us']:10.1f}")
+        return "\n".join(linhas)
+
+    def salvar(self, caminho):
+        """Grava o relatório em JSON."""
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.relatorio(), f, ensure_ascii=False, indent=2)
+
+    def limpar(self):
+        with self._lock:
+            self._histogramas = {}
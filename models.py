@@ -1,12 +1,19 @@
 # -*- coding: utf-8 -*-
 """Modelos de negócio - Lógica principal do sistema bancário."""
 
-import re
 from datetime import datetime
+from itertools import islice
 from utils import (
     log_transacao, filtrar_usuario_por_cpf, validar_cpf, validar_data,
-    salvar_dados, normalizar_texto, AGENCIA_PADRAO, LIMITE_SAQUE, LIMITE_SAQUES_DIARIOS
+    salvar_dados, normalizar_texto, controle_limites, AGENCIA_PADRAO,
+    TAMANHO_PAGINA_EXTRATO
 )
+from dinheiro import para_centavos, formatar_centavos
+from entidades import Conta, ResumoConta, Transacao, Usuario
+from limites import dia_atual
+from perfil import perfilavel
+from resumos import CATEGORIAS, SINAIS, calcular_resumos
+from repositorio import Repositorio
 
 
 class ContaIterador:
@@ -24,151 +31,393 @@ class ContaIterador:
             raise StopIteration
         conta = self._contas[self._indice]
         self._indice += 1
-        usuario = conta.get("usuario", {})
-        return {
-            "numero_conta": conta.get("numero_conta"),
-            "agencia": conta.get("agencia"),
-            "titular": usuario.get("nome"),
-            "cpf": usuario.get("cpf"),
-            "saldo": conta.get("saldo", 0.0),
-            "data_criacao": conta.get("data_criacao"),
-        }
-
-
-def gerar_transacoes(conta, tipo=None):
-    """Gerador que percorre o extrato e opcionalmente filtra por tipo."""
-    extrato = conta.get("extrato", "")
-    if not extrato:
-        return
-    for linha in extrato.strip().splitlines():
-        if not linha.strip():
-            continue
-        match = re.match(r"^\[(?P<timestamp>[^\]]+)\]\s*(?P<tipo>[^:]+):\s*(?P<rest>.+)$", linha)
-        timestamp = match.group("timestamp") if match else None
-        tipo_tx = match.group("tipo").strip() if match else "Transação"
-        descricao = match.group("rest") if match else linha
-        valor = None
-        valor_match = re.search(r"R\$\s*([\d.,]+)", descricao)
-        if valor_match:
-            valor_texto = valor_match.group(1)
-            if "." in valor_texto and "," in valor_texto:
-                valor_texto = valor_texto.replace(".", "").replace(",", ".")
+        usuario = conta.get("usuario") or {}
+        return ResumoConta(
+            numero_conta=conta.get("numero_conta"),
+            agencia=conta.get("agencia"),
+            titular=usuario.get("nome"),
+            cpf=usuario.get("cpf"),
+            saldo_centavos=conta.get("saldo_centavos", 0),
+            data_criacao=conta.get("data_criacao"),
+        )
+
+
+class ListagemContas:
+    """Índice para a tela de listagem: busca por CPF/nome e ordenação por coluna.
+
+    As linhas (ResumoConta) e as chaves de busca são montadas uma vez; cada
+    ordenação é calculada na primeira vez que é pedida e reaproveitada depois.
+    `consultar` devolve só as posições das linhas, para que a tela exiba
+    apenas o trecho visível.
+    """
+    # "titular" é ordenado pelos nomes normalizados (veja `nomes`)
+    CHAVES_ORDENACAO = {
+        "agencia": lambda linha: linha["agencia"] or "",
+        "numero": lambda linha: linha["numero_conta"] or 0,
+        "saldo": lambda linha: linha["saldo_centavos"] or 0,
+    }
+
+    def __init__(self, lista_contas):
+        self.linhas = list(ContaIterador(lista_contas))
+        self._nomes = None
+        self._ordens = {}
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def ordem(self, coluna):
+        """Posições das linhas em ordem crescente de `coluna` (calculada uma vez)."""
+        posicoes = self._ordens.get(coluna)
+        if posicoes is None:
+            if coluna == "titular":
+                nomes = self.nomes()
+                posicoes = sorted(range(len(nomes)), key=nomes.__getitem__)
             else:
-                valor_texto = valor_texto.replace(",", ".")
-            try:
-                valor = float(valor_texto)
-                # Remove o valor da descrição para evitar duplicação
-                descricao = re.sub(r"R\$\s*[\d.,]+", "", descricao).strip()
-            except ValueError:
-                valor = None
-        transacao = {
-            "timestamp": timestamp,
-            "tipo": tipo_tx,
-            "valor": valor,
-            "descricao": descricao.strip(),
-        }
-        tipo_normalizado = normalizar_texto(tipo_tx)
-        filtro_normalizado = normalizar_texto(tipo) if tipo else None
-        if filtro_normalizado is None or tipo_normalizado.startswith(filtro_normalizado):
-            yield transacao
+                chave = self.CHAVES_ORDENACAO[coluna]
+                linhas = self.linhas
+                posicoes = sorted(range(len(linhas)), key=lambda i: chave(linhas[i]))
+            self._ordens[coluna] = posicoes
+        return posicoes
+
+    def nomes(self):
+        """Nomes dos titulares normalizados (sem acentos, minúsculos), montados no primeiro uso."""
+        if self._nomes is None:
+            normalizados = {}
+            self._nomes = []
+            for linha in self.linhas:
+                nome = linha["titular"] or ""
+                normalizado = normalizados.get(nome)
+                if normalizado is None:
+                    normalizado = normalizados[nome] = normalizar_texto(nome)
+                self._nomes.append(normalizado)
+        return self._nomes
+
+    def buscar(self, termo):
+        """Posições das contas cujo CPF começa com `termo` ou cujo titular o contém."""
+        termo = normalizar_texto(termo.strip())
+        if not termo:
+            return range(len(self.linhas))
+        digitos = termo.replace(".", "").replace("-", "")
+        if digitos.isdigit():
+            return [i for i, linha in enumerate(self.linhas) if (linha["cpf"] or "").startswith(digitos)]
+        return [i for i, nome in enumerate(self.nomes()) if termo in nome]
+
+    def consultar(self, termo="", coluna=None, decrescente=False):
+        """Posições das linhas que atendem à busca, na ordem pedida (None = ordem de criação)."""
+        encontradas = self.buscar(termo)
+        if coluna is not None:
+            ordem = self.ordem(coluna)
+            if len(encontradas) == len(self.linhas):
+                encontradas = ordem
+            else:
+                selecionadas = set(encontradas)
+                encontradas = [i for i in ordem if i in selecionadas]
+        encontradas = list(encontradas)
+        if decrescente:
+            encontradas.reverse()
+        return encontradas
+
+
+FORMATO_TIMESTAMP = "%d/%m/%Y %H:%M:%S"
+
+_tipos_normalizados = {}
+
+
+def _tipo_normalizado(tipo):
+    """normalizar_texto com cache: os rótulos de tipo se repetem em todo o extrato."""
+    normalizado = _tipos_normalizados.get(tipo)
+    if normalizado is None:
+        normalizado = _tipos_normalizados[tipo] = normalizar_texto(tipo)
+    return normalizado
+
+
+def _instante(transacao):
+    """Data/hora da transação; entradas sem timestamp (migradas) contam como as mais antigas."""
+    timestamp = transacao.get("timestamp")
+    if not timestamp:
+        return datetime.min
+    try:
+        return datetime.strptime(timestamp, FORMATO_TIMESTAMP)
+    except ValueError:
+        return datetime.min
+
+
+def _como_datetime(momento, fim_do_dia=False):
+    if isinstance(momento, datetime):
+        return momento
+    return datetime.combine(momento, datetime.max.time() if fim_do_dia else datetime.min.time())
+
+
+def _primeira_posicao(transacoes, momento, inclusive=True):
+    """Busca binária: primeira posição cujo instante é >= `momento` (> se não `inclusive`).
+
+    As transações são acrescentadas em ordem cronológica, então só O(log n)
+    timestamps são interpretados.
+    """
+    inicio, fim = 0, len(transacoes)
+    while inicio < fim:
+        meio = (inicio + fim) // 2
+        instante = _instante(transacoes[meio])
+        if instante < momento or (not inclusive and instante == momento):
+            inicio = meio + 1
+        else:
+            fim = meio
+    return inicio
+
+
+def _filtro_tipo(tipo):
+    """Função que diz se uma transação atende ao filtro de tipo (None = sem filtro).
+
+    O filtro é normalizado uma única vez e o resultado por rótulo de tipo
+    fica em cache, já que o filtro não muda durante a varredura.
+    """
+    if not tipo:
+        return None
+    filtro = normalizar_texto(tipo)
+    aceitos = {}
+    
+    def atende(transacao):
+        rotulo = transacao["tipo"]
+        resultado = aceitos.get(rotulo)
+        if resultado is None:
+            resultado = aceitos[rotulo] = _tipo_normalizado(rotulo).startswith(filtro)
+        return resultado
+    return atende
+
+
+def gerar_transacoes(conta, tipo=None, limite=None, desde=None, ate=None):
+    """Gerador que percorre as transações da conta em ordem cronológica.
+
+    - `tipo`: filtra pelo início do tipo, sem acentos ("saque", "transferencia"...);
+    - `desde`/`ate`: datetime ou date (inclusivos; uma date vale o dia inteiro),
+      localizados por busca binária em vez de percorrer o histórico;
+    - `limite`: apenas as `limite` transações mais recentes que atendem aos filtros,
+      encontradas percorrendo o histórico de trás para frente.
+    """
+    transacoes = conta.get("transacoes", [])
+    inicio = _primeira_posicao(transacoes, _como_datetime(desde)) if desde is not None else 0
+    fim = (_primeira_posicao(transacoes, _como_datetime(ate, fim_do_dia=True), inclusive=False)
+           if ate is not None else len(transacoes))
+    atende = _filtro_tipo(tipo)
+    
+    if limite is None:
+        faixa = transacoes if (inicio, fim) == (0, len(transacoes)) else islice(transacoes, inicio, fim)
+        yield from (faixa if atende is None else filter(atende, faixa))
+        return
+    
+    recentes = []
+    for indice in range(fim - 1, inicio - 1, -1):
+        if len(recentes) >= limite:
+            break
+        transacao = transacoes[indice]
+        if atende is None or atende(transacao):
+            recentes.append(transacao)
+    yield from reversed(recentes)
+
+
+def _coletar(transacoes, indices, atende, quantidade):
+    """Percorre `indices` e devolve até `quantidade` pares (índice, transação) que atendem ao filtro."""
+    encontrados = []
+    if quantidade <= 0:
+        return encontrados
+    for indice in indices:
+        transacao = transacoes[indice]
+        if atende is None or atende(transacao):
+            encontrados.append((indice, transacao))
+            if len(encontrados) >= quantidade:
+                break
+    return encontrados
+
+
+@perfilavel()
+def pagina_extrato(conta, tamanho=TAMANHO_PAGINA_EXTRATO, cursor=None, tipo=None, recentes_primeiro=True):
+    """Uma página do extrato, lendo apenas as transações necessárias.
+
+    Retorna um dict com "transacoes" (no máximo `tamanho`, na ordem de
+    exibição), "proximo" e "anterior": cursores da página seguinte e da
+    anterior, ou None quando não existem. Sem `cursor`, devolve a primeira
+    página (as mais recentes, ou as mais antigas com `recentes_primeiro=False`).
+    O cursor é uma posição na lista de transações, então continua válido
+    quando novas transações são acrescentadas.
+    """
+    transacoes = conta.get("transacoes", [])
+    total = len(transacoes)
+    atende = _filtro_tipo(tipo)
+    if recentes_primeiro:
+        cursor = total if cursor is None else max(0, min(cursor, total))  # fim exclusivo da página
+        seguintes, anteriores = range(cursor - 1, -1, -1), range(cursor, total)
+    else:
+        cursor = 0 if cursor is None else max(0, min(cursor, total))  # início da página
+        seguintes, anteriores = range(cursor, total), range(cursor - 1, -1, -1)
+    
+    # Uma transação a mais indica se existe página seguinte
+    encontrados = _coletar(transacoes, seguintes, atende, tamanho + 1)
+    pagina = encontrados[:tamanho]
+    proximo = None
+    if len(encontrados) > tamanho:
+        proximo = pagina[-1][0] if recentes_primeiro else pagina[-1][0] + 1
+    
+    anterior = None
+    antes = _coletar(transacoes, anteriores, atende, tamanho)
+    if len(antes) == tamanho:
+        anterior = antes[-1][0] + 1 if recentes_primeiro else antes[-1][0]
+    elif antes:
+        anterior = total if recentes_primeiro else 0  # volta à primeira página
+    
+    return {"transacoes": [transacao for _, transacao in pagina], "proximo": proximo, "anterior": anterior}
+
+
+def nova_transacao(tipo, valor_centavos, descricao="", contraparte=None):
+    """Cria uma entrada estruturada do extrato."""
+    return Transacao(
+        timestamp=datetime.now().strftime(FORMATO_TIMESTAMP),
+        tipo=tipo,
+        valor_centavos=valor_centavos,
+        contraparte=contraparte,
+        descricao=descricao,
+    )
+
+
+def formatar_transacao(transacao):
+    """Formata uma transação como linha de extrato para exibição."""
+    timestamp = transacao.get("timestamp") or "----"
+    valor_centavos = transacao.get("valor_centavos")
+    valor_str = f"R$ {formatar_centavos(valor_centavos)}" if valor_centavos is not None else ""
+    return f"[{timestamp}] {transacao.get('tipo')}: {valor_str} {transacao.get('descricao', '')}".rstrip()
+
+
+def _resumos_da_conta(conta):
+    resumos = conta.get("resumos")
+    return resumos if resumos is not None else calcular_resumos(conta.get("transacoes", []))
 
 
+def _montar_resumo(resumos, periodo):
+    resumo = resumos.get(periodo, {})
+    totais = {categoria: list(resumo.get(categoria, (0, 0))) for categoria in CATEGORIAS}
+    return {
+        "periodo": periodo,
+        **totais,
+        "liquido_centavos": sum(SINAIS[categoria] * valor for categoria, (_, valor) in totais.items()),
+        "saldo_centavos": resumo.get("saldo"),
+    }
+
+
+def resumo_periodo(conta, periodo):
+    """Totais de um mês ("2025-03") ou dia ("2025-03-14"), lidos dos resumos já calculados.
+
+    Retorna um dict com [quantidade, centavos] por categoria (ver resumos.CATEGORIAS),
+    "liquido_centavos" (entradas menos saídas) e "saldo_centavos" ao fim do
+    período (None se não houve movimentação).
+    """
+    return _montar_resumo(_resumos_da_conta(conta), periodo)
+
+
+def resumos_mensais(conta):
+    """Resumo de cada mês com movimentação, do mais antigo ao mais recente."""
+    resumos = _resumos_da_conta(conta)
+    return [_montar_resumo(resumos, mes) for mes in sorted(periodo for periodo in resumos if len(periodo) == 7)]
+
+
+@perfilavel()
 def criar_usuario_obj(nome, cpf, data_nascimento, endereco):
     """Cria um novo objeto de usuário."""
+    return Usuario(
+        nome=nome,
+        cpf=cpf,
+        data_nascimento=data_nascimento,
+        endereco=endereco,
+        data_criacao=datetime.now().isoformat(),
+    )
+
+
+def registro_movimento(conta, transacao=None):
+    """Monta o registro de alteração com o estado da conta após uma movimentação."""
     return {
-        "nome": nome,
-        "cpf": cpf,
-        "data_nascimento": data_nascimento,
-        "endereco": endereco,
-        "data_criacao": datetime.now().isoformat(),
+        "op": "movimento",
+        "numero_conta": conta["numero_conta"],
+        "saldo_centavos": conta["saldo_centavos"],
+        "saques_realizados": conta.get("saques_realizados", 0),
+        "ultimo_reset_saques": conta.get("ultimo_reset_saques", ""),
+        "transacao": transacao,
     }
 
 
+@perfilavel()
 @log_transacao("Criação de Conta")
 def criar_conta(agencia, numero_conta, usuario, contas, usuarios_ref):
     """Cria uma nova conta bancária para um usuário."""
-    conta = {
-        "agencia": agencia,
-        "numero_conta": numero_conta,
-        "usuario": usuario,
-        "saldo": 0,
-        "extrato": "",
-        "saques_realizados": 0,
-        "data_criacao": datetime.now().isoformat(),
-    }
+    conta = Conta(
+        agencia=agencia,
+        numero_conta=numero_conta,
+        usuario=usuario,
+        data_criacao=datetime.now().isoformat(),
+    )
     contas.append(conta)
-    salvar_dados(usuarios_ref, contas, numero_conta + 1)
+    salvar_dados(usuarios_ref, contas, numero_conta + 1, alteracoes=[{"op": "conta", "dados": conta}])
     return numero_conta + 1
 
 
 def verificar_reset_saques_diarios(conta):
-    """Verifica se deve resetar o contador de saques diários baseado na data."""
-    hoje = datetime.now().date().isoformat()
-    ultimo_reset = conta.get("ultimo_reset_saques", "")
-    
-    if ultimo_reset != hoje:
-        conta["saques_realizados"] = 0
-        conta["ultimo_reset_saques"] = hoje
-        return True  # Foi resetado
-    return False  # Não foi resetado
+    """Indica se o contador de saques gravado é de outro dia (hoje a conta tem zero saques).
 
+    Apenas consulta: o contador é reiniciado pelo próximo saque, sem gravação extra.
+    """
+    return conta.get("ultimo_reset_saques", "") != dia_atual()
 
-@log_transacao("Depósito")
-def depositar_obj(conta, valor, usuarios, contas):
-    """Realiza depósito em uma conta."""
-    if valor <= 0:
+
+def _validar_valor(valor):
+    """Converte o valor em reais para centavos, exigindo que seja positivo."""
+    centavos = para_centavos(valor)
+    if centavos <= 0:
         raise ValueError("Valor deve ser maior que zero.")
-    
-    timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    conta["saldo"] += valor
-    conta["extrato"] += f"[{timestamp}] Depósito: R$ {valor:.2f}\n"
-    salvar_dados(usuarios, contas, len(contas) + 1)
-    return f"Depósito de R$ {valor:.2f} realizado com sucesso!"
+    return centavos
 
 
-@log_transacao("Saque")
-def sacar_obj(conta, valor, usuarios, contas):
-    """Realiza saque de uma conta."""
-    if valor <= 0:
-        raise ValueError("Valor deve ser maior que zero.")
+def _registrar_transacao(conta, transacao):
+    """Acrescenta a transação ao extrato e aos resumos por período (contas em dict só no extrato)."""
+    if isinstance(conta, Conta):
+        conta.registrar_transacao(transacao)
+    else:
+        conta["transacoes"].append(transacao)
+
+
+def _aplicar_deposito(conta, valor):
+    """Valida e aplica um depósito em memória; retorna (mensagem, alterações)."""
+    centavos = _validar_valor(valor)
     
-    # Verificar se deve resetar saques diários
-    verificar_reset_saques_diarios(conta)
+    transacao = nova_transacao("Depósito", centavos)
+    conta["saldo_centavos"] += centavos
+    _registrar_transacao(conta, transacao)
+    return f"Depósito de R$ {formatar_centavos(centavos)} realizado com sucesso!", [registro_movimento(conta, transacao)]
+
+
+def _aplicar_saque(conta, valor):
+    """Valida e aplica um saque em memória; retorna (mensagem, alterações)."""
+    centavos = _validar_valor(valor)
+    hoje = dia_atual()
     
-    if valor > conta["saldo"]:
+    if centavos > conta["saldo_centavos"]:
         raise ValueError("Saldo insuficiente.")
     
-    if valor > LIMITE_SAQUE:
-        raise ValueError(f"Limite de saque é R$ {LIMITE_SAQUE:.2f}")
-    
-    if conta["saques_realizados"] >= LIMITE_SAQUES_DIARIOS:
-        raise ValueError("Limite de saques diários atingido.")
+    # Limites da conta (ou padrão); o contador do dia é lido sem alterar a conta
+    controle_limites.validar_saque(conta, centavos, hoje)
     
-    timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    conta["saldo"] -= valor
-    conta["extrato"] += f"[{timestamp}] Saque: R$ {valor:.2f}\n"
-    conta["saques_realizados"] += 1
-    salvar_dados(usuarios, contas, len(contas) + 1)
-    return f"Saque de R$ {valor:.2f} realizado com sucesso!"
+    transacao = nova_transacao("Saque", centavos)
+    conta["saldo_centavos"] -= centavos
+    _registrar_transacao(conta, transacao)
+    controle_limites.registrar_saque(conta, hoje)
+    return f"Saque de R$ {formatar_centavos(centavos)} realizado com sucesso!", [registro_movimento(conta, transacao)]
 
 
-@log_transacao("Transferência")
-def transferir_obj(numero_origem, numero_destino, valor, usuarios, contas):
-    """Realiza transferência entre contas."""
-    if valor <= 0:
-        raise ValueError("Valor deve ser maior que zero.")
+def _aplicar_transferencia(numero_origem, numero_destino, valor, repositorio):
+    """Valida e aplica uma transferência em memória; retorna (mensagem, alterações)."""
+    centavos = _validar_valor(valor)
     
     if numero_origem == numero_destino:
         raise ValueError("Não é possível transferir para a mesma conta.")
     
-    conta_origem = None
-    conta_destino = None
-    
-    for conta in contas:
-        if conta["numero_conta"] == numero_origem:
-            conta_origem = conta
-        if conta["numero_conta"] == numero_destino:
-            conta_destino = conta
+    conta_origem = repositorio.buscar_conta(numero_origem)
+    conta_destino = repositorio.buscar_conta(numero_destino)
     
     if not conta_origem:
         raise ValueError("Conta de origem não encontrada.")
@@ -176,15 +425,112 @@ def transferir_obj(numero_origem, numero_destino, valor, usuarios, contas):
     if not conta_destino:
         raise ValueError("Conta de destino não encontrada.")
     
-    if valor > conta_origem["saldo"]:
+    if centavos > conta_origem["saldo_centavos"]:
         raise ValueError("Saldo insuficiente.")
     
-    timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    conta_origem["saldo"] -= valor
-    conta_origem["extrato"] += f"[{timestamp}] Transferência enviada: R$ {valor:.2f} para Agência {conta_destino['agencia']} Conta {conta_destino['numero_conta']}\n"
+    tx_origem = nova_transacao(
+        "Transferência enviada", centavos,
+        descricao=f"para Agência {conta_destino['agencia']} Conta {conta_destino['numero_conta']}",
+        contraparte={"agencia": conta_destino["agencia"], "numero_conta": conta_destino["numero_conta"]},
+    )
+    tx_destino = nova_transacao(
+        "Transferência recebida", centavos,
+        descricao=f"de Agência {conta_origem['agencia']} Conta {conta_origem['numero_conta']}",
+        contraparte={"agencia": conta_origem["agencia"], "numero_conta": conta_origem["numero_conta"]},
+    )
+    tx_destino["timestamp"] = tx_origem["timestamp"]
     
-    conta_destino["saldo"] += valor
-    conta_destino["extrato"] += f"[{timestamp}] Transferência recebida: R$ {valor:.2f} de Agência {conta_origem['agencia']} Conta {conta_origem['numero_conta']}\n"
+    conta_origem["saldo_centavos"] -= centavos
+    _registrar_transacao(conta_origem, tx_origem)
+    conta_destino["saldo_centavos"] += centavos
+    _registrar_transacao(conta_destino, tx_destino)
+    
+    return "Transferência realizada com sucesso!", [
+        registro_movimento(conta_origem, tx_origem),
+        registro_movimento(conta_destino, tx_destino),
+    ]
+
+
+@perfilavel()
+@log_transacao("Depósito")
+def depositar_obj(conta, valor, usuarios, contas):
+    """Realiza depósito em uma conta. `valor` é informado em reais."""
+    mensagem, alteracoes = _aplicar_deposito(conta, valor)
+    salvar_dados(usuarios, contas, len(contas) + 1, alteracoes=alteracoes)
+    return mensagem
+
+
+@perfilavel()
+@log_transacao("Saque")
+def sacar_obj(conta, valor, usuarios, contas):
+    """Realiza saque de uma conta. `valor` é informado em reais."""
+    mensagem, alteracoes = _aplicar_saque(conta, valor)
+    salvar_dados(usuarios, contas, len(contas) + 1, alteracoes=alteracoes)
+    return mensagem
+
+
+@perfilavel()
+@log_transacao("Transferência")
+def transferir_obj(numero_origem, numero_destino, valor, usuarios, contas, repositorio=None):
+    """Realiza transferência entre contas.
+
+    Informe `repositorio` para localizar as contas pelo índice; sem ele, um
+    índice temporário é montado a partir de `contas`. `valor` é informado em reais.
+    """
+    if repositorio is None:
+        repositorio = Repositorio(usuarios, contas)
+    mensagem, alteracoes = _aplicar_transferencia(numero_origem, numero_destino, valor, repositorio)
+    salvar_dados(usuarios, contas, len(contas) + 1, alteracoes=alteracoes)
+    return mensagem
+
+
+def _tipo_operacao_lote(tipo):
+    tipo_normalizado = normalizar_texto(str(tipo or "")).strip()
+    for nome in ("deposito", "saque", "transferencia"):
+        if tipo_normalizado == nome:
+            return nome
+    raise ValueError(f"Tipo de operação desconhecido: {tipo}")
+
+
+@perfilavel()
+@log_transacao("Lote")
+def processar_lote(operacoes, usuarios, contas, repositorio=None):
+    """Aplica uma lista de operações em memória e persiste tudo com um único salvamento.
+
+    Cada operação é um dict com "tipo" ("deposito", "saque" ou "transferencia"),
+    "conta", "valor" (em reais) e, nas transferências, "destino". As regras são
+    as mesmas de `depositar_obj`, `sacar_obj` e `transferir_obj`; uma operação
+    inválida é registrada como falha sem alterar o estado e as demais seguem.
+    Retorna uma lista de dicts com "indice", "sucesso" e "mensagem".
+    """
+    if repositorio is None:
+        repositorio = Repositorio(usuarios, contas)
+    resultados = []
+    alteracoes = []
+    for indice, operacao in enumerate(operacoes):
+        if not isinstance(operacao, dict):
+            resultados.append({"indice": indice, "sucesso": False,
+                               "mensagem": f"Operação inválida: {type(operacao).__name__}"})
+            continue
+        try:
+            tipo = _tipo_operacao_lote(operacao.get("tipo"))
+            numero_conta = int(operacao.get("conta"))
+            valor = operacao.get("valor")
+            if tipo == "transferencia":
+                mensagem, alteracoes_op = _aplicar_transferencia(
+                    numero_conta, int(operacao.get("destino")), valor, repositorio)
+            else:
+                conta = repositorio.buscar_conta(numero_conta)
+                if not conta:
+                    raise ValueError("Conta não encontrada.")
+                aplicar = _aplicar_deposito if tipo == "deposito" else _aplicar_saque
+                mensagem, alteracoes_op = aplicar(conta, valor)
+        except (ValueError, TypeError) as e:
+            resultados.append({"indice": indice, "sucesso": False, "mensagem": str(e)})
+            continue
+        alteracoes.extend(alteracoes_op)
+        resultados.append({"indice": indice, "sucesso": True, "mensagem": mensagem})
     
-    salvar_dados(usuarios, contas, len(contas) + 1)
-    return "Transferência realizada com sucesso!"
+    if alteracoes:
+        salvar_dados(usuarios, contas, len(contas) + 1, alteracoes=alteracoes)
+    return resultados
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""Perfilamento opcional (cProfile e tracemalloc) de pontos de entrada do sistema.
+
+Desativado por padrão. Com a variável de ambiente BANCO_PERFIL, as funções
+marcadas com `@perfilavel` passam a ser medidas:
+
+    BANCO_PERFIL=cpu            cProfile
+    BANCO_PERFIL=memoria        tracemalloc (pico de memória por chamada e maiores alocações)
+    BANCO_PERFIL=cpu,memoria    ambos
+    BANCO_PERFIL_PONTOS=depositar_obj,carregar_dados   só estes pontos (padrão: todos)
+    BANCO_PERFIL_DIRETORIO=perfis                      onde gravar as sessões
+    BANCO_PERFIL_TOP=20                                linhas no resumo
+
+A configuração é lida quando cada função é decorada (na importação): com o
+perfilamento desligado, `@perfilavel` devolve a própria função e não há custo
+algum. Ao encerrar o programa, a sessão grava em
+<diretorio>/sessao-AAAAMMDD-HHMMSS-<pid>/ um <ponto>.prof por ponto de
+entrada (legível com pstats ou snakeviz) e um resumo.txt com os N itens mais
+caros. Para ligar pela linha de comando:
+
+    python perfil.py --cpu --memoria sistema_bancario.py [argumentos do programa]
+"""
+
+import argparse
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+MODO_CPU = "cpu"
+MODO_MEMORIA = "memoria"
+
+
+def configuracao():
+    """(modos, pontos, diretório, top) lidos das variáveis de ambiente; modos vazio = desligado."""
+    modos = {modo.strip() for modo in os.environ.get("BANCO_PERFIL", "").lower().split(",") if modo.strip()}
+    invalidos = modos - {MODO_CPU, MODO_MEMORIA}
+    if invalidos:
+        print(f"[AVISO] Modos de perfil desconhecidos ignorados: {', '.join(sorted(invalidos))}")
+        modos -= invalidos
+    pontos = {ponto.strip() for ponto in os.environ.get("BANCO_PERFIL_PONTOS", "").split(",") if ponto.strip()}
+    diretorio = Path(os.environ.get("BANCO_PERFIL_DIRETORIO", "perfis"))
+    top = int(os.environ.get("BANCO_PERFIL_TOP", 20))
+    return modos, pontos or None, diretorio, top
+
+
+class EstatisticasPonto:
+    """Perfil acumulado de um ponto de entrada."""
+    __slots__ = ("chamadas", "tempo_ns", "pico_memoria", "perfil")
+
+    def __init__(self, com_cpu):
+        self.chamadas = 0
+        self.tempo_ns = 0
+        self.pico_memoria = 0
+        self.perfil = cProfile.Profile() if com_cpu else None
+
+
+class SessaoPerfil:
+    """Acumula os perfis dos pontos de entrada de uma execução e os grava ao final.
+
+    Só a chamada mais externa é perfilada: pontos chamados dentro de outro
+    (salvar_dados dentro de depositar_obj) aparecem no perfil de quem chamou.
+    Como o cProfile mede uma thread por vez, chamadas simultâneas em outras
+    threads rodam sem perfil.
+    """
+    def __init__(self, diretorio, modos, top=20):
+        self.diretorio = Path(diretorio)
+        self.modos = set(modos)
+        self.top = top
+        self.inicio = datetime.now()
+        self._pontos = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if MODO_MEMORIA in self.modos and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def executar(self, ponto, funcao, args, kwargs):
+        """Chama `funcao(*args, **kwargs)` medindo-a como `ponto`."""
+        if getattr(self._local, "medindo", False) or not self._lock.acquire(blocking=False):
+            return funcao(*args, **kwargs)
+        self._local.medindo = True
+        try:
+            estatisticas = self._pontos.get(ponto)
+            if estatisticas is None:
+                estatisticas = self._pontos[ponto] = EstatisticasPonto(MODO_CPU in self.modos)
+            memoria = MODO_MEMORIA in self.modos and hasattr(tracemalloc, "reset_peak")
+            if memoria:
+                atual, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+            inicio = time.perf_counter_ns()
+            if estatisticas.perfil is not None:
+                estatisticas.perfil.enable()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                if estatisticas.perfil is not None:
+                    estatisticas.perfil.disable()
+                estatisticas.tempo_ns += time.perf_counter_ns() - inicio
+                estatisticas.chamadas += 1
+                if memoria:
+                    _, pico = tracemalloc.get_traced_memory()
+                    estatisticas.pico_memoria = max(estatisticas.pico_memoria, pico - atual)
+        finally:
+            self._local.medindo = False
+            self._lock.release()
+
+    def resumo(self):
+        """Texto com, por ponto, chamadas, tempo e pico de memória, e os N itens mais caros."""
+        linhas = [f"Sessão de perfil iniciada em {self.inicio:%Y-%m-%d %H:%M:%S} (modos: {', '.join(sorted(self.modos))})"]
+        with self._lock:
+            pontos = sorted(self._pontos.items(), key=lambda item: -item[1].tempo_ns)
+        for ponto, estatisticas in pontos:
+            linhas.append("")
+            linhas.append(f"===== {ponto}: {estatisticas.chamadas} chamada(s), "
+                          f"{estatisticas.tempo_ns / 1e6:.3f} ms no total, "
+                          f"{estatisticas.tempo_ns / max(estatisticas.chamadas, 1) / 1e3:.1f} µs por chamada"
+                          + (f", pico de memória {estatisticas.pico_memoria / 1024:.1f} KiB"
+                             if MODO_MEMORIA in self.modos else "") + " =====")
+            if estatisticas.perfil is not None:
+                saida = io.StringIO()
+                pstats.Stats(estatisticas.perfil, stream=saida).sort_stats("cumulative").print_stats(self.top)
+                linhas.append(saida.getvalue().strip())
+        if MODO_MEMORIA in self.modos and tracemalloc.is_tracing():
+            linhas.append("")
+            linhas.append(f"===== Maiores alocações ainda em uso (top {self.top}) =====")
+            for estatistica in tracemalloc.take_snapshot().statistics("lineno")[:self.top]:
+                linhas.append(str(estatistica))
+        return "\n".join(linhas) + "\n"
+
+    def gravar(self):
+        """Grava <ponto>.prof e resumo.txt num diretório próprio da sessão; devolve o diretório."""
+        destino = self.diretorio / f"sessao-{self.inicio:%Y%m%d-%H%M%S}-{os.getpid()}"
+        destino.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            pontos = list(self._pontos.items())
+        for ponto, estatisticas in pontos:
+            if estatisticas.perfil is not None:
+                estatisticas.perfil.dump_stats(str(destino / f"{ponto}.prof"))
+        (destino / "resumo.txt").write_text(self.resumo(), encoding="utf-8")
+        return destino
+
+
+_sessao = None
+_lock_sessao = threading.Lock()
+
+
+def obter_sessao():
+    """Sessão de perfil do processo, criada no primeiro uso (None se desligado)."""
+    global _sessao
+    if _sessao is None:
+        modos, _, diretorio, top = configuracao()
+        if not modos:
+            return None
+        with _lock_sessao:
+            if _sessao is None:
+                _sessao = SessaoPerfil(diretorio, modos, top)
+                atexit.register(_gravar_sessao)
+    return _sessao
+
+
+def _gravar_sessao():
+    if _sessao is None or not _sessao._pontos:
+        return
+    try:
+        destino = _sessao.gravar()
+        print(f"[PERFIL] Perfis da sessão gravados em {destino}")
+    except OSError as e:
+        print(f"[AVISO] Não foi possível gravar os perfis: {e}")
+
+
+def perfilavel(ponto=None):
+    """Marca a função como ponto de entrada perfilável (nome padrão: o da função).
+
+    Com o perfilamento desligado ou o ponto fora de BANCO_PERFIL_PONTOS,
+    devolve a função sem alteração.
+    """
+    def decorator(func):
+        nome = ponto or func.__name__
+        modos, pontos, _, _ = configuracao()
+        if not modos or (pontos is not None and nome not in pontos):
+            return func
+        sessao = obter_sessao()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return sessao.executar(nome, func, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Executa um programa do sistema bancário com perfilamento ligado.",
+        usage="python perfil.py [--cpu] [--memoria] [--pontos P1,P2] [--top N] [--diretorio DIR] "
+              "programa.py [argumentos]")
+    parser.add_argument("--cpu", action="store_true", help="perfil de CPU com cProfile (padrão)")
+    parser.add_argument("--memoria", action="store_true", help="pico de memória e alocações com tracemalloc")
+    parser.add_argument("--pontos", help="pontos de entrada separados por vírgula (padrão: todos)")
+    parser.add_argument("--top", type=int, help="linhas no resumo (padrão 20)")
+    parser.add_argument("--diretorio", help="diretório das sessões (padrão perfis)")
+    parser.add_argument("programa", help="ex.: sistema_bancario.py, sistema_bancario_gui.py, servidor.py")
+    parser.add_argument("argumentos", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    modos = [modo for modo, ligado in ((MODO_CPU, args.cpu), (MODO_MEMORIA, args.memoria)) if ligado]
+    os.environ["BANCO_PERFIL"] = ",".join(modos or [MODO_CPU])
+    for variavel, valor in (("BANCO_PERFIL_PONTOS", args.pontos), ("BANCO_PERFIL_TOP", args.top),
+                            ("BANCO_PERFIL_DIRETORIO", args.diretorio)):
+        if valor is not None:
+            os.environ[variavel] = str(valor)
+    sys.argv = [args.programa] + args.argumentos
+    runpy.run_path(args.programa, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
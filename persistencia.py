@@ -0,0 +1,941 @@
+# -*- coding: utf-8 -*-
+"""Backends de armazenamento do sistema bancário (JSON, journal e SQLite)."""
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+from dinheiro import para_centavos
+from entidades import Conta, RegistroCompacto, Transacao, Usuario
+from repositorio import Repositorio
+from resumos import calcular_resumos, categoria_transacao, periodos_transacao
+
+
+class BackendArmazenamento:
+    """Interface comum dos backends de armazenamento.
+
+    `carregar` devolve a tupla (usuarios, contas, proximo_numero_conta).
+    `salvar` recebe o estado completo e, opcionalmente, a lista de `alteracoes`
+    da operação (registros "usuario", "conta" e "movimento"); backends
+    incrementais gravam apenas as alterações quando elas são informadas.
+    """
+    nome = "base"
+
+    def carregar(self):
+        raise NotImplementedError
+
+    def salvar(self, usuarios, contas, proximo_numero_conta, alteracoes=None):
+        raise NotImplementedError
+
+    def fechar(self):
+        """Libera arquivos e conexões abertos pelo backend."""
+
+
+# ============= MIGRAÇÃO DO EXTRATO LEGADO =============
+
+_PADRAO_LINHA = re.compile(r"^\[(?P<timestamp>[^\]]+)\]\s*(?P<tipo>[^:]+):\s*(?P<rest>.+)$")
+_PADRAO_VALOR = re.compile(r"R\$\s*([\d.,]+)")
+_PADRAO_CONTRAPARTE = re.compile(r"Agência\s+(?P<agencia>\d+)\s+Conta\s+(?P<numero_conta>\d+)")
+
+
+def interpretar_linha_extrato(linha):
+    """Converte uma linha do extrato em texto (formato antigo) em uma transação estruturada."""
+    match = _PADRAO_LINHA.match(linha)
+    timestamp = match.group("timestamp") if match else None
+    tipo = match.group("tipo").strip() if match else "Transação"
+    descricao = match.group("rest") if match else linha
+    valor_centavos = None
+    valor_match = _PADRAO_VALOR.search(descricao)
+    if valor_match:
+        valor_texto = valor_match.group(1)
+        if "." in valor_texto and "," in valor_texto:
+            valor_texto = valor_texto.replace(".", "").replace(",", ".")
+        else:
+            valor_texto = valor_texto.replace(",", ".")
+        try:
+            valor_centavos = para_centavos(valor_texto)
+            descricao = descricao[:valor_match.start()] + descricao[valor_match.end():]
+        except ValueError:
+            valor_centavos = None
+    contraparte = None
+    contraparte_match = _PADRAO_CONTRAPARTE.search(descricao)
+    if contraparte_match:
+        contraparte = {
+            "agencia": contraparte_match.group("agencia"),
+            "numero_conta": int(contraparte_match.group("numero_conta")),
+        }
+    return {
+        "timestamp": timestamp,
+        "tipo": tipo,
+        "valor_centavos": valor_centavos,
+        "contraparte": contraparte,
+        "descricao": descricao.strip(),
+    }
+
+
+def converter_extrato(extrato):
+    """Converte o extrato em texto inteiro em uma lista de transações."""
+    return [interpretar_linha_extrato(linha) for linha in (extrato or "").splitlines() if linha.strip()]
+
+
+def migrar_transacao(transacao):
+    """Converte o "valor" em reais (float) de uma transação antiga para "valor_centavos"."""
+    if "valor_centavos" not in transacao:
+        valor = transacao.pop("valor", None)
+        transacao["valor_centavos"] = para_centavos(valor) if valor is not None else None
+    return transacao
+
+
+def migrar_contas(contas):
+    """Converte, uma única vez, contas em formatos antigos para o formato atual.
+
+    - "extrato" (texto) vira a lista estruturada "transacoes";
+    - "saldo" e "valor" em reais (float) viram "saldo_centavos" e "valor_centavos".
+    """
+    for conta in contas:
+        if "transacoes" not in conta:
+            conta["transacoes"] = converter_extrato(conta.get("extrato", ""))
+        conta.pop("extrato", None)
+        for transacao in conta["transacoes"]:
+            migrar_transacao(transacao)
+        if "saldo_centavos" not in conta:
+            conta["saldo_centavos"] = para_centavos(conta.pop("saldo", 0))
+    return contas
+
+
+# ============= TITULARES E ENTIDADES =============
+
+def _para_dict(registro):
+    return registro.para_dict() if isinstance(registro, RegistroCompacto) else registro
+
+
+def _dados_conta(conta):
+    """Campos armazenados da conta, exceto as transações (que não são lidas).
+
+    Resumos ainda não calculados (contas de arquivos antigos) não são gravados,
+    para não forçar a leitura do histórico; são calculados no primeiro acesso.
+    """
+    omitidos = ("usuario", "transacoes")
+    if isinstance(conta, Conta) and conta._resumos is None:
+        omitidos += ("resumos",)
+    dados = {chave: conta[chave] for chave in conta.keys() if chave not in omitidos}
+    if conta.get("usuario"):
+        dados["cpf_titular"] = conta["usuario"]["cpf"]
+    return dados
+
+
+def serializar_conta(conta):
+    """Forma armazenada de uma conta: o titular é referenciado pelo CPF em "cpf_titular".
+
+    O resultado não compartilha listas nem dicts com a conta, que pode
+    continuar sendo alterada. Aceita também uma conta já serializada (e a copia).
+    """
+    dados = _dados_conta(conta)
+    dados["transacoes"] = [dict(_para_dict(transacao)) for transacao in conta["transacoes"]]
+    if dados.get("resumos") is not None:
+        dados["resumos"] = {periodo: {categoria: list(totais) if isinstance(totais, list) else totais
+                                      for categoria, totais in categorias.items()}
+                            for periodo, categorias in dados["resumos"].items()}
+    return dados
+
+
+def serializar_alteracao(alteracao):
+    """Converte um registro de alteração com entidades em JSON puro."""
+    op = alteracao.get("op")
+    if op == "usuario":
+        return {"op": op, "dados": _para_dict(alteracao["dados"])}
+    if op == "conta":
+        return {"op": op, "dados": serializar_conta(alteracao["dados"])}
+    if op == "movimento" and alteracao.get("transacao") is not None:
+        return dict(alteracao, transacao=_para_dict(alteracao["transacao"]))
+    return alteracao
+
+
+def montar_conta(dados, repositorio):
+    """Converte uma conta armazenada (formato atual ou antigo) em Conta ligada ao titular.
+
+    O titular vem de "cpf_titular" ou, em arquivos antigos, do dict embutido em
+    "usuario"; ele é procurado em `repositorio` para que todas as contas de um
+    CPF compartilhem o mesmo objeto. Um titular embutido que não consta da
+    lista de usuários é acrescentado a ela (migração de arquivos antigos).
+    """
+    dados = migrar_contas([dict(dados)])[0]
+    embutido = dados.get("usuario")
+    cpf = dados.get("cpf_titular") or (embutido or {}).get("cpf")
+    usuario = repositorio.buscar_usuario(cpf)
+    if usuario is None:
+        usuario = Usuario.de_dict(embutido or {"cpf": cpf})
+        if embutido:
+            repositorio.adicionar_usuario(usuario)
+    conta = Conta.de_dict(dados)
+    conta.usuario = usuario
+    conta.transacoes = [Transacao.de_dict(transacao) for transacao in dados["transacoes"]]
+    return conta
+
+
+def montar_estado(usuarios_armazenados, contas_armazenadas):
+    """Converte as listas lidas do armazenamento em entidades Usuario e Conta."""
+    repositorio = Repositorio([Usuario.de_dict(dados) for dados in usuarios_armazenados], [])
+    for dados in contas_armazenadas:
+        repositorio.adicionar_conta(montar_conta(dados, repositorio))
+    return repositorio.usuarios, repositorio.contas
+
+
+# ============= JSON =============
+
+def caminho_backup(arquivo):
+    """Caminho da geração anterior de um arquivo de dados (ex.: dados.json.bak)."""
+    arquivo = Path(arquivo)
+    return arquivo.with_name(arquivo.name + ".bak")
+
+
+def _sincronizar_diretorio(diretorio):
+    """Garante que renomeações no diretório cheguem ao disco (sem efeito onde não há suporte)."""
+    try:
+        fd = os.open(str(diretorio), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def gravar_atomico(arquivo, partes, fsync=True, manter_backup=True):
+    """Grava os blocos de bytes de `partes` em `arquivo` sem nunca deixá-lo truncado.
+
+    O conteúdo vai para um arquivo temporário no mesmo diretório, recebe fsync
+    e substitui o original com `os.replace` (atômico). Com `manter_backup`, a
+    geração anterior é preservada em `<arquivo>.bak` antes da substituição.
+    """
+    arquivo = Path(arquivo)
+    temporario = arquivo.with_name(arquivo.name + ".tmp")
+    with open(temporario, "wb") as f:
+        for parte in partes:
+            f.write(parte)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    if manter_backup and arquivo.exists():
+        backup = caminho_backup(arquivo)
+        backup_temporario = backup.with_name(backup.name + ".tmp")
+        if backup_temporario.exists():
+            backup_temporario.unlink()
+        try:
+            os.link(arquivo, backup_temporario)
+        except OSError:
+            shutil.copy2(arquivo, backup_temporario)
+        os.replace(backup_temporario, backup)
+    os.replace(temporario, arquivo)
+    if fsync:
+        _sincronizar_diretorio(arquivo.parent)
+
+
+def gravar_json_atomico(arquivo, dados, fsync=True, manter_backup=True, indent=2):
+    """Grava `dados` em JSON de forma atômica (ver `gravar_atomico`)."""
+    texto = json.dumps(dados, ensure_ascii=False, indent=indent)
+    gravar_atomico(arquivo, [texto.encode("utf-8")], fsync=fsync, manter_backup=manter_backup)
+
+
+# ============= SNAPSHOT EM LINHAS =============
+#
+# O snapshot continua sendo um JSON válido, mas é gravado com uma conta por
+# linha e a lista "transacoes" por último:
+#
+#   {"formato":2,"geracao":7,"proximo_numero_conta":3,
+#   "usuarios":[...],
+#   "contas":[
+#   {"agencia":"0001","numero_conta":1,...,"cpf_titular":"...","transacoes":[...]},
+#   {"agencia":"0001","numero_conta":2,...,"cpf_titular":"...","transacoes":[...]}
+#   ]}
+#
+# Assim o carregamento preguiçoso lê apenas os campos de cada conta e guarda
+# a posição (em bytes) das transações, que só são interpretadas no primeiro acesso.
+
+FORMATO_LINHAS = 2
+_SEPARADORES = (",", ":")
+_CHAVE_TRANSACOES = b'"transacoes":'
+_INICIO_CONTAS = b'"contas":[\n'
+_FIM_CONTAS = b"]}\n"
+
+
+def _json_bytes(valor):
+    return json.dumps(valor, ensure_ascii=False, separators=_SEPARADORES).encode("utf-8")
+
+
+def _cabecalho_snapshot(linha):
+    """Interpreta a primeira linha de um snapshot em linhas; None se for outro formato."""
+    if not linha.startswith(b'{"formato":%d,' % FORMATO_LINHAS):
+        return None
+    return json.loads(linha.rstrip().rstrip(b",") + b"}")
+
+
+def _abrir_snapshot(arquivo):
+    """(arquivo aberto em modo binário, geração do cabeçalho ou None se for outro formato)."""
+    f = open(arquivo, "rb")
+    try:
+        cabecalho = _cabecalho_snapshot(f.readline())
+    except BaseException:
+        f.close()
+        raise
+    return f, (cabecalho.get("geracao") if cabecalho is not None else None)
+
+
+def gerar_snapshot_em_linhas(usuarios, contas, proximo_numero_conta, geracao, trechos=None):
+    """Gera os blocos de bytes do snapshot em linhas.
+
+    Contas com transações ainda não lidas (`fonte_transacoes` com um
+    TrechoTransacoes) têm o trecho copiado do arquivo atual sem ser
+    interpretado; se `trechos` for informado, recebe tuplas (trecho, inicio,
+    fim) com a nova posição de cada trecho copiado.
+    """
+    cabecalho = _json_bytes({"formato": FORMATO_LINHAS, "geracao": geracao,
+                             "proximo_numero_conta": proximo_numero_conta})
+    partes = [
+        cabecalho[:-1] + b",\n",
+        b'"usuarios":' + _json_bytes([_para_dict(usuario) for usuario in usuarios]) + b",\n",
+        _INICIO_CONTAS,
+    ]
+    posicao = sum(len(parte) for parte in partes)
+    yield from partes
+    # Snapshot de origem -> (arquivo aberto, geração no cabeçalho): cada origem é
+    # aberta e conferida uma vez por gravação, e todos os trechos dela são lidos
+    # pelo mesmo arquivo aberto
+    origens = {}
+    try:
+        for indice, conta in enumerate(contas):
+            prefixo = _json_bytes(_dados_conta(conta))[:-1] + b"," + _CHAVE_TRANSACOES
+            fonte = getattr(conta, "fonte_transacoes", None)
+            if isinstance(fonte, TrechoTransacoes):
+                origem = origens.get(fonte.arquivo)
+                if origem is None:
+                    origem = origens[fonte.arquivo] = _abrir_snapshot(fonte.arquivo)
+                transacoes = fonte.bruto(*origem)
+                if trechos is not None:
+                    inicio = posicao + len(prefixo)
+                    trechos.append((fonte, inicio, inicio + len(transacoes)))
+            else:
+                transacoes = _json_bytes([_para_dict(transacao) for transacao in conta["transacoes"]])
+            linha = prefixo + transacoes + (b"},\n" if indice < len(contas) - 1 else b"}\n")
+            posicao += len(linha)
+            yield linha
+    finally:
+        for arquivo, _ in origens.values():
+            arquivo.close()
+    yield _FIM_CONTAS
+
+
+def ler_snapshot_em_linhas(arquivo):
+    """Lê um snapshot em linhas sem interpretar as transações.
+
+    Retorna (cabecalho, usuarios, contas), em que cada conta é uma tupla
+    (dados sem "transacoes", inicio, fim) com a posição em bytes da lista de
+    transações; ou None se o arquivo não estiver nesse formato ou estiver incompleto.
+    """
+    with open(arquivo, "rb") as f:
+        cabecalho = _cabecalho_snapshot(f.readline())
+        if cabecalho is None:
+            return None
+        linha = f.readline()
+        if not linha.startswith(b'"usuarios":'):
+            return None
+        usuarios = json.loads(b"{" + linha.rstrip().rstrip(b",") + b"}")["usuarios"]
+        if f.readline() != _INICIO_CONTAS:
+            return None
+        posicao = f.tell()
+        contas = []
+        for linha in f:
+            if linha == _FIM_CONTAS:
+                return cabecalho, usuarios, contas
+            separador = linha.find(_CHAVE_TRANSACOES)
+            if separador < 0:
+                return None
+            dados = json.loads(linha[:separador].rstrip(b",") + b"}")
+            corpo = linha.rstrip(b"\n").rstrip(b",")
+            contas.append((dados, posicao + separador + len(_CHAVE_TRANSACOES), posicao + len(corpo) - 1))
+            posicao += len(linha)
+    return None
+
+
+class TrechoTransacoes:
+    """Transações de uma conta ainda não lidas: bytes [inicio, fim) do snapshot `arquivo`."""
+    __slots__ = ("arquivo", "geracao", "numero_conta", "inicio", "fim")
+
+    def __init__(self, arquivo, geracao, numero_conta, inicio, fim):
+        self.arquivo = arquivo
+        self.geracao = geracao
+        self.numero_conta = numero_conta
+        self.inicio = inicio
+        self.fim = fim
+
+    def _relocalizar(self):
+        """Procura a conta de novo num snapshot regravado por outro processo."""
+        print(f"[AVISO] {self.arquivo} foi alterado externamente; relendo a conta {self.numero_conta}.")
+        lido = ler_snapshot_em_linhas(self.arquivo)
+        if lido is not None:
+            cabecalho, _, contas = lido
+            for dados, inicio, fim in contas:
+                if dados.get("numero_conta") == self.numero_conta:
+                    self.geracao, self.inicio, self.fim = cabecalho.get("geracao"), inicio, fim
+                    return
+        raise ValueError(f"Transações da conta {self.numero_conta} não encontradas em {self.arquivo}.")
+
+    def bruto(self, aberto=None, geracao=None):
+        """Bytes JSON da lista de transações, sem interpretá-los.
+
+        `aberto` é o snapshot já aberto por `_abrir_snapshot`, com a `geracao`
+        lida do cabeçalho; sem ele, o arquivo é aberto e conferido aqui.
+        """
+        if aberto is None:
+            aberto, geracao = _abrir_snapshot(self.arquivo)
+            with aberto:
+                return self.bruto(aberto, geracao)
+        if geracao is None or geracao != self.geracao:
+            self._relocalizar()
+        aberto.seek(self.inicio)
+        return aberto.read(self.fim - self.inicio)
+
+    def carregar(self):
+        return [Transacao.de_dict(migrar_transacao(transacao)) for transacao in json.loads(self.bruto())]
+
+
+def _ler_json(arquivo):
+    with open(arquivo, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class BackendJSON(BackendArmazenamento):
+    """Arquivo JSON único, reescrito por completo (de forma atômica) a cada gravação.
+
+    Com `preguicoso`, o carregamento lê apenas usuários e campos das contas;
+    as transações de cada conta são lidas do arquivo no primeiro acesso.
+    """
+    nome = "json"
+
+    def __init__(self, arquivo_dados, fsync=True, preguicoso=False):
+        self.arquivo_dados = Path(arquivo_dados)
+        self.fsync = fsync
+        self.preguicoso = preguicoso
+        self.geracao = None  # contador de snapshots gravados; None = ainda não lido
+
+    def _geracao_em_disco(self):
+        try:
+            with open(self.arquivo_dados, "rb") as f:
+                cabecalho = _cabecalho_snapshot(f.readline())
+            if cabecalho is not None:
+                return cabecalho.get("geracao", 0)
+            return _ler_json(self.arquivo_dados).get("geracao", 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _gravar_snapshot(self, usuarios, contas, proximo_numero_conta):
+        if self.geracao is None:
+            self.geracao = self._geracao_em_disco()
+        trechos = []
+        partes = gerar_snapshot_em_linhas(usuarios, contas, proximo_numero_conta, self.geracao + 1, trechos)
+        gravar_atomico(self.arquivo_dados, partes, fsync=self.fsync)
+        self.geracao += 1
+        for trecho, inicio, fim in trechos:
+            trecho.arquivo, trecho.geracao, trecho.inicio, trecho.fim = self.arquivo_dados, self.geracao, inicio, fim
+
+    def _ler_preguicoso(self):
+        """Carrega o snapshot em linhas adiando as transações; None se não for possível."""
+        try:
+            lido = ler_snapshot_em_linhas(self.arquivo_dados)
+        except (OSError, ValueError):
+            return None
+        if lido is None:
+            return None
+        cabecalho, usuarios, contas_lidas = lido
+        geracao = cabecalho.get("geracao", 0)
+        usuarios, contas = montar_estado(usuarios, [dict(dados, transacoes=[]) for dados, _, _ in contas_lidas])
+        for conta, (_, inicio, fim) in zip(contas, contas_lidas):
+            if fim - inicio > 2:  # "[]" não precisa ser adiado
+                conta.adiar_transacoes(TrechoTransacoes(self.arquivo_dados, geracao, conta.numero_conta, inicio, fim))
+        self.geracao = geracao
+        return usuarios, contas, cabecalho.get("proximo_numero_conta", 1)
+
+    def _ler_snapshot(self):
+        """Lê o snapshot; se estiver corrompido ou ausente, recorre à geração anterior (.bak)."""
+        if self.preguicoso and self.arquivo_dados.exists():
+            estado = self._ler_preguicoso()
+            if estado is not None:
+                return estado
+        dados = {}
+        for arquivo in (self.arquivo_dados, caminho_backup(self.arquivo_dados)):
+            if not arquivo.exists():
+                continue
+            try:
+                dados = _ler_json(arquivo)
+                if arquivo != self.arquivo_dados:
+                    print(f"[AVISO] {self.arquivo_dados} ilegível; dados carregados do backup {arquivo}.")
+                break
+            except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+                print(f"[AVISO] Não foi possível ler {arquivo}: {e}")
+        usuarios, contas = montar_estado(dados.get("usuarios", []), dados.get("contas", []))
+        proximo_numero_conta = dados.get("proximo_numero_conta", 1)
+        self.geracao = dados.get("geracao", 0)
+        return usuarios, contas, proximo_numero_conta
+
+    def carregar(self):
+        return self._ler_snapshot()
+
+    def salvar(self, usuarios, contas, proximo_numero_conta, alteracoes=None):
+        self._gravar_snapshot(usuarios, contas, proximo_numero_conta)
+
+
+# ============= JOURNAL =============
+
+class Journal:
+    """Journal append-only com fsync em lote.
+
+    Cada alteração gera uma linha JSON compacta. O fsync é feito a cada
+    `fsync_lote` registros ou `fsync_intervalo` segundos, e também no fechamento.
+    Se informado, `cabecalho()` gera o registro gravado no início de um journal novo.
+    """
+    def __init__(self, arquivo, fsync_lote, fsync_intervalo, cabecalho=None):
+        self.arquivo = arquivo
+        self.cabecalho = cabecalho
+        self.fsync_lote = fsync_lote
+        self.fsync_intervalo = fsync_intervalo
+        self._handle = None
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+        self.registros = 0
+
+    def _abrir(self):
+        if self._handle is None:
+            novo = not self.arquivo.exists()
+            if not novo:
+                self._reparar_fim()
+                with open(self.arquivo, "rb") as f:
+                    self.registros = sum(1 for linha in f if linha.strip())
+            self._handle = open(self.arquivo, "a", encoding="utf-8")
+            if novo and self.cabecalho is not None:
+                self._handle.write(json.dumps(self.cabecalho(), separators=(",", ":")) + "\n")
+                self.registros = 1
+        return self._handle
+
+    def _reparar_fim(self):
+        """Termina a última linha antes de anexar, para que novos registros não se juntem a ela.
+
+        Uma última linha sem "\\n" (queda durante a gravação) é descartada; se já
+        for um registro completo, que `ler` aceita, recebe apenas o "\\n".
+        """
+        with open(self.arquivo, "rb+") as f:
+            tamanho = f.seek(0, os.SEEK_END)
+            fim = tamanho
+            while fim > 0:
+                bloco = min(4096, fim)
+                f.seek(fim - bloco)
+                quebra = f.read(bloco).rfind(b"\n")
+                if quebra >= 0:
+                    fim += quebra + 1 - bloco
+                    break
+                fim -= bloco
+            if fim == tamanho:
+                return
+            f.seek(fim)
+            try:
+                json.loads(f.read())
+            except ValueError:
+                print(f"[AVISO] Registro incompleto no fim de {self.arquivo} descartado.")
+                f.truncate(fim)
+            else:
+                f.write(b"\n")
+
+    def anexar(self, alteracoes):
+        """Anexa as alterações ao journal, sincronizando com o disco em lote."""
+        handle = self._abrir()
+        for alteracao in alteracoes:
+            handle.write(json.dumps(alteracao, ensure_ascii=False, separators=(",", ":")) + "\n")
+        handle.flush()
+        self.registros += len(alteracoes)
+        self._pendentes += len(alteracoes)
+        agora = time.monotonic()
+        if self._pendentes >= self.fsync_lote or agora - self._ultimo_fsync >= self.fsync_intervalo:
+            self.sincronizar()
+
+    def sincronizar(self):
+        """Força o fsync dos registros pendentes."""
+        if self._handle is not None and self._pendentes:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def ler(self):
+        """Percorre os registros gravados; uma última linha truncada por queda é ignorada."""
+        if not self.arquivo.exists():
+            return
+        # Em bytes: a queda pode ter cortado um caractere UTF-8 ao meio
+        with open(self.arquivo, "rb") as f:
+            for linha in f:
+                if not linha.strip():
+                    continue
+                try:
+                    yield json.loads(linha)
+                except ValueError:
+                    break
+
+    def truncar(self):
+        """Descarta o journal após a gravação de um novo snapshot."""
+        self.fechar()
+        if self.arquivo.exists():
+            self.arquivo.unlink()
+        self.registros = 0
+
+    def fechar(self):
+        if self._handle is not None:
+            self.sincronizar()
+            self._handle.close()
+            self._handle = None
+
+
+def aplicar_alteracao(alteracao, repositorio, proximo_numero_conta):
+    """Reaplica um registro de alteração sobre o estado em memória."""
+    op = alteracao.get("op")
+    if op == "usuario":
+        repositorio.adicionar_usuario(Usuario.de_dict(alteracao["dados"]))
+    elif op == "conta":
+        repositorio.adicionar_conta(montar_conta(alteracao["dados"], repositorio))
+        proximo_numero_conta = max(proximo_numero_conta, alteracao["dados"]["numero_conta"] + 1)
+    elif op == "movimento":
+        conta = repositorio.buscar_conta(alteracao["numero_conta"])
+        if conta is not None:
+            if "saldo" in alteracao and "saldo_centavos" not in alteracao:
+                # Registros gravados antes dos valores em centavos
+                alteracao["saldo_centavos"] = para_centavos(alteracao["saldo"])
+            for campo in ("saldo_centavos", "saques_realizados", "ultimo_reset_saques"):
+                if campo in alteracao:
+                    conta[campo] = alteracao[campo]
+            if alteracao.get("transacao"):
+                conta.registrar_transacao(Transacao.de_dict(migrar_transacao(alteracao["transacao"])))
+            elif alteracao.get("extrato"):
+                # Registros gravados antes do extrato estruturado
+                conta["transacoes"].extend(Transacao.de_dict(tx) for tx in converter_extrato(alteracao["extrato"]))
+    return proximo_numero_conta
+
+
+class BackendJournal(BackendJSON):
+    """Snapshot JSON + journal append-only, compactado a cada `limite_compactacao` registros.
+
+    O journal começa com um registro "geracao" que o vincula ao snapshot sobre
+    o qual foi escrito. Se uma queda ocorrer entre a gravação de um novo
+    snapshot e a remoção do journal, o journal antigo é reconhecido pela
+    geração e descartado, em vez de ser reaplicado em duplicidade.
+    """
+    nome = "journal"
+
+    def __init__(self, arquivo_dados, arquivo_journal, fsync_lote=50, fsync_intervalo=1.0,
+                 limite_compactacao=1000, fsync=True, preguicoso=False):
+        super().__init__(arquivo_dados, fsync=fsync, preguicoso=preguicoso)
+        self.journal = Journal(arquivo_journal, fsync_lote, fsync_intervalo, cabecalho=self._cabecalho_journal)
+        self.limite_compactacao = limite_compactacao
+
+    def _cabecalho_journal(self):
+        if self.geracao is None:
+            self.geracao = self._geracao_em_disco()
+        return {"op": "geracao", "geracao": self.geracao}
+
+    def carregar(self):
+        usuarios, contas, proximo_numero_conta = self._ler_snapshot()
+        repositorio = Repositorio(usuarios, contas)
+        for alteracao in self.journal.ler():
+            if alteracao.get("op") == "geracao":
+                if alteracao["geracao"] != self.geracao:
+                    print("[AVISO] Journal de um snapshot anterior descartado.")
+                    self.journal.truncar()
+                    break
+                continue
+            proximo_numero_conta = aplicar_alteracao(alteracao, repositorio, proximo_numero_conta)
+        return usuarios, contas, proximo_numero_conta
+
+    def salvar(self, usuarios, contas, proximo_numero_conta, alteracoes=None):
+        if alteracoes is not None:
+            self.journal.anexar([serializar_alteracao(alteracao) for alteracao in alteracoes])
+            if self.journal.registros < self.limite_compactacao:
+                return
+        self._gravar_snapshot(usuarios, contas, proximo_numero_conta)
+        self.journal.truncar()
+
+    def fechar(self):
+        self.journal.fechar()
+
+
+# ============= SQLITE =============
+
+_ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    cpf TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    data_nascimento TEXT,
+    endereco TEXT,
+    data_criacao TEXT
+);
+CREATE TABLE IF NOT EXISTS contas (
+    numero_conta INTEGER PRIMARY KEY,
+    agencia TEXT NOT NULL,
+    cpf_titular TEXT NOT NULL REFERENCES usuarios(cpf),
+    saldo_centavos INTEGER NOT NULL DEFAULT 0,
+    saques_realizados INTEGER NOT NULL DEFAULT 0,
+    ultimo_reset_saques TEXT,
+    data_criacao TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_contas_cpf ON contas(cpf_titular);
+CREATE TABLE IF NOT EXISTS transacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    numero_conta INTEGER NOT NULL REFERENCES contas(numero_conta),
+    timestamp TEXT,
+    tipo TEXT NOT NULL,
+    valor_centavos INTEGER,
+    contraparte_agencia TEXT,
+    contraparte_conta INTEGER,
+    descricao TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transacoes_conta ON transacoes(numero_conta, id);
+CREATE TABLE IF NOT EXISTS resumos (
+    numero_conta INTEGER NOT NULL REFERENCES contas(numero_conta),
+    periodo TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    quantidade INTEGER NOT NULL DEFAULT 0,
+    valor_centavos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (numero_conta, periodo, categoria)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+
+class BackendSQLite(BackendArmazenamento):
+    """Banco SQLite com tabelas de usuários, contas e transações.
+
+    Uma operação com `alteracoes` vira poucos INSERT/UPDATE de linha única
+    dentro de uma transação, em vez de regravar todo o estado. Os resumos por
+    período ficam na tabela `resumos` (uma linha por conta, período e
+    categoria; a categoria "saldo" guarda o saldo ao fim do período em
+    `valor_centavos`).
+    """
+    nome = "sqlite"
+
+    def __init__(self, arquivo_banco):
+        self.arquivo_banco = arquivo_banco
+        self._conexao = None
+
+    @property
+    def conexao(self):
+        if self._conexao is None:
+            # A conexão é usada também pelas threads que gravam em segundo plano
+            # (escritora do MotorConcorrente, trabalhador da GUI), uma de cada vez
+            self._conexao = sqlite3.connect(str(self.arquivo_banco), check_same_thread=False)
+            legado = self._tabela_transacoes_legada(self._conexao)
+            sem_resumos = not self._conexao.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resumos'").fetchone()
+            self._conexao.executescript(_ESQUEMA_SQLITE)
+            if legado:
+                self._migrar_transacoes_legadas(self._conexao)
+            self._migrar_valores_para_centavos(self._conexao)
+            if sem_resumos:
+                self._migrar_resumos(self._conexao)
+        return self._conexao
+
+    @staticmethod
+    def _migrar_valores_para_centavos(con):
+        """Adiciona e preenche as colunas em centavos em bancos criados com valores REAL."""
+        migracoes = (
+            ("contas", "saldo", "saldo_centavos INTEGER NOT NULL DEFAULT 0"),
+            ("transacoes", "valor", "valor_centavos INTEGER"),
+        )
+        with con:
+            for tabela, coluna_antiga, coluna_nova in migracoes:
+                colunas = [linha[1] for linha in con.execute(f"PRAGMA table_info({tabela})")]
+                nome_nova = coluna_nova.split()[0]
+                if coluna_antiga in colunas and nome_nova not in colunas:
+                    con.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna_nova}")
+                    con.execute(
+                        f"UPDATE {tabela} SET {nome_nova} = CAST(ROUND({coluna_antiga} * 100) AS INTEGER) "
+                        f"WHERE {coluna_antiga} IS NOT NULL"
+                    )
+
+    @staticmethod
+    def _tabela_transacoes_legada(con):
+        """Renomeia a tabela de transações em texto (coluna "linha") para migração."""
+        colunas = [linha[1] for linha in con.execute("PRAGMA table_info(transacoes)")]
+        if "linha" not in colunas:
+            return False
+        with con:
+            con.execute("DROP INDEX IF EXISTS idx_transacoes_conta")
+            con.execute("ALTER TABLE transacoes RENAME TO transacoes_legado")
+        return True
+
+    def _migrar_transacoes_legadas(self, con):
+        with con:
+            for numero_conta, linha in con.execute(
+                    "SELECT numero_conta, linha FROM transacoes_legado ORDER BY id").fetchall():
+                self._inserir_transacoes(con, numero_conta, converter_extrato(linha))
+            con.execute("DROP TABLE transacoes_legado")
+
+    def _migrar_resumos(self, con):
+        """Calcula os resumos de bancos criados antes da tabela `resumos`."""
+        transacoes = {}
+        for numero_conta, timestamp, tipo, valor_centavos in con.execute(
+                "SELECT numero_conta, timestamp, tipo, valor_centavos FROM transacoes ORDER BY id"):
+            transacoes.setdefault(numero_conta, []).append(
+                {"timestamp": timestamp, "tipo": tipo, "valor_centavos": valor_centavos})
+        with con:
+            for numero_conta, lista in transacoes.items():
+                self._inserir_resumos(con, numero_conta, calcular_resumos(lista))
+
+    def carregar(self):
+        con = self.conexao
+        usuarios = []
+        por_cpf = {}
+        for cpf, nome, data_nascimento, endereco, data_criacao in con.execute(
+                "SELECT cpf, nome, data_nascimento, endereco, data_criacao FROM usuarios ORDER BY rowid"):
+            usuario = Usuario(nome, cpf, data_nascimento, endereco, data_criacao)
+            usuarios.append(usuario)
+            por_cpf[cpf] = usuario
+
+        transacoes = {}
+        for numero_conta, timestamp, tipo, valor_centavos, cp_agencia, cp_conta, descricao in con.execute(
+                "SELECT numero_conta, timestamp, tipo, valor_centavos, contraparte_agencia, contraparte_conta, "
+                "descricao FROM transacoes ORDER BY id"):
+            transacoes.setdefault(numero_conta, []).append(Transacao(
+                timestamp, tipo, valor_centavos,
+                {"agencia": cp_agencia, "numero_conta": cp_conta} if cp_conta is not None else None,
+                descricao or "",
+            ))
+
+        resumos = {}
+        for numero_conta, periodo, categoria, quantidade, valor_centavos in con.execute(
+                "SELECT numero_conta, periodo, categoria, quantidade, valor_centavos FROM resumos"):
+            resumo = resumos.setdefault(numero_conta, {}).setdefault(periodo, {})
+            resumo[categoria] = valor_centavos if categoria == "saldo" else [quantidade, valor_centavos]
+
+        contas = []
+        for numero, agencia, cpf, saldo_centavos, saques, ultimo_reset, data_criacao in con.execute(
+                "SELECT numero_conta, agencia, cpf_titular, saldo_centavos, saques_realizados, "
+                "ultimo_reset_saques, data_criacao FROM contas ORDER BY numero_conta"):
+            contas.append(Conta(
+                agencia, numero, por_cpf.get(cpf) or Usuario(cpf=cpf), saldo_centavos,
+                transacoes.get(numero, []), saques, ultimo_reset or "", data_criacao,
+                resumos.get(numero, {}),
+            ))
+
+        linha = con.execute("SELECT valor FROM meta WHERE chave = 'proximo_numero_conta'").fetchone()
+        proximo_numero_conta = int(linha[0]) if linha else 1
+        return usuarios, contas, proximo_numero_conta
+
+    def _inserir_usuario(self, con, usuario):
+        con.execute(
+            "INSERT OR REPLACE INTO usuarios (cpf, nome, data_nascimento, endereco, data_criacao) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (usuario["cpf"], usuario.get("nome"), usuario.get("data_nascimento"),
+             usuario.get("endereco"), usuario.get("data_criacao")),
+        )
+
+    def _inserir_conta(self, con, conta):
+        con.execute(
+            "INSERT OR REPLACE INTO contas (numero_conta, agencia, cpf_titular, saldo_centavos, saques_realizados, "
+            "ultimo_reset_saques, data_criacao) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (conta["numero_conta"], conta["agencia"],
+             conta["usuario"]["cpf"] if conta.get("usuario") else conta.get("cpf_titular"), conta.get("saldo_centavos", 0),
+             conta.get("saques_realizados", 0), conta.get("ultimo_reset_saques"), conta.get("data_criacao")),
+        )
+
+    def _inserir_transacoes(self, con, numero_conta, transacoes):
+        con.executemany(
+            "INSERT INTO transacoes (numero_conta, timestamp, tipo, valor_centavos, contraparte_agencia, "
+            "contraparte_conta, descricao) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((numero_conta, tx.get("timestamp"), tx["tipo"], tx.get("valor_centavos"),
+              (tx.get("contraparte") or {}).get("agencia"), (tx.get("contraparte") or {}).get("numero_conta"),
+              tx.get("descricao", "")) for tx in transacoes),
+        )
+
+    def _inserir_resumos(self, con, numero_conta, resumos):
+        con.executemany(
+            "INSERT OR REPLACE INTO resumos (numero_conta, periodo, categoria, quantidade, valor_centavos) "
+            "VALUES (?, ?, ?, ?, ?)",
+            ((numero_conta, periodo, categoria, 0, totais) if categoria == "saldo"
+             else (numero_conta, periodo, categoria, totais[0], totais[1])
+             for periodo, resumo in resumos.items() for categoria, totais in resumo.items()),
+        )
+
+    def _acumular_resumos(self, con, numero_conta, transacao, saldo_centavos):
+        """Soma uma transação às linhas do seu mês e dia (O(1), sem ler o histórico)."""
+        periodos = periodos_transacao(transacao)
+        if periodos is None:
+            return
+        categoria = categoria_transacao(transacao.get("tipo"))
+        valor = transacao.get("valor_centavos") or 0
+        for periodo in periodos:
+            con.execute(
+                "INSERT INTO resumos (numero_conta, periodo, categoria, quantidade, valor_centavos) "
+                "VALUES (?, ?, ?, 1, ?) ON CONFLICT (numero_conta, periodo, categoria) DO UPDATE SET "
+                "quantidade = quantidade + 1, valor_centavos = valor_centavos + excluded.valor_centavos",
+                (numero_conta, periodo, categoria, valor),
+            )
+            con.execute(
+                "INSERT OR REPLACE INTO resumos (numero_conta, periodo, categoria, quantidade, valor_centavos) "
+                "VALUES (?, ?, 'saldo', 0, ?)",
+                (numero_conta, periodo, saldo_centavos),
+            )
+
+    def _aplicar(self, con, alteracao):
+        op = alteracao.get("op")
+        if op == "usuario":
+            self._inserir_usuario(con, alteracao["dados"])
+        elif op == "conta":
+            conta = alteracao["dados"]
+            if isinstance(conta, dict):
+                conta = migrar_contas([conta])[0]
+                resumos = conta.get("resumos") or calcular_resumos(conta["transacoes"])
+            else:
+                resumos = conta.resumos
+            self._inserir_conta(con, conta)
+            self._inserir_transacoes(con, conta["numero_conta"], conta["transacoes"])
+            self._inserir_resumos(con, conta["numero_conta"], resumos)
+        elif op == "movimento":
+            con.execute(
+                "UPDATE contas SET saldo_centavos = ?, saques_realizados = ?, ultimo_reset_saques = ? "
+                "WHERE numero_conta = ?",
+                (alteracao["saldo_centavos"], alteracao.get("saques_realizados", 0),
+                 alteracao.get("ultimo_reset_saques"), alteracao["numero_conta"]),
+            )
+            if alteracao.get("transacao"):
+                self._inserir_transacoes(con, alteracao["numero_conta"], [alteracao["transacao"]])
+                self._acumular_resumos(con, alteracao["numero_conta"], alteracao["transacao"],
+                                       alteracao["saldo_centavos"])
+
+    def salvar(self, usuarios, contas, proximo_numero_conta, alteracoes=None):
+        con = self.conexao
+        with con:
+            if alteracoes is None:
+                con.execute("DELETE FROM resumos")
+                con.execute("DELETE FROM transacoes")
+                con.execute("DELETE FROM contas")
+                con.execute("DELETE FROM usuarios")
+                for usuario in usuarios:
+                    self._inserir_usuario(con, usuario)
+                for conta in contas:
+                    self._aplicar(con, {"op": "conta", "dados": conta})
+            else:
+                for alteracao in alteracoes:
+                    self._aplicar(con, alteracao)
+            con.execute(
+                "INSERT OR REPLACE INTO meta (chave, valor) VALUES ('proximo_numero_conta', ?)",
+                (str(proximo_numero_conta),),
+            )
+
+    def fechar(self):
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Repositório em memória com índices por número de conta e CPF."""
+
+import threading
+
+
+class Repositorio:
+    """Mantém índices de hash sobre as listas de usuários e contas.
+
+    As listas são compartilhadas por referência com o restante do sistema
+    (CLI, GUI, persistência). Como usuários e contas só são acrescentados ao
+    final, os índices são atualizados de forma incremental: cada consulta
+    indexa apenas os itens adicionados desde a última vez. Se as listas forem
+    substituídas ou reordenadas, chame `reindexar()`. A indexação é protegida
+    por uma trava, então as consultas podem vir de várias threads.
+    """
+    def __init__(self, usuarios=None, contas=None):
+        self.usuarios = usuarios if usuarios is not None else []
+        self.contas = contas if contas is not None else []
+        self._trava = threading.Lock()
+        self.reindexar()
+
+    def reindexar(self):
+        """Reconstrói todos os índices a partir das listas atuais."""
+        with self._trava:
+            self._usuario_por_cpf = {}
+            self._conta_por_numero = {}
+            self._contas_por_cpf = {}
+            self._usuarios_indexados = 0
+            self._contas_indexadas = 0
+            self._indexar_novos()
+
+    def _sincronizar(self):
+        if self._usuarios_indexados == len(self.usuarios) and self._contas_indexadas == len(self.contas):
+            return
+        with self._trava:
+            self._indexar_novos()
+
+    def _indexar_novos(self):
+        while self._usuarios_indexados < len(self.usuarios):
+            usuario = self.usuarios[self._usuarios_indexados]
+            self._usuario_por_cpf.setdefault(usuario["cpf"], usuario)
+            self._usuarios_indexados += 1
+        while self._contas_indexadas < len(self.contas):
+            conta = self.contas[self._contas_indexadas]
+            self._conta_por_numero[conta["numero_conta"]] = conta
+            cpf = conta.get("usuario", {}).get("cpf")
+            self._contas_por_cpf.setdefault(cpf, []).append(conta)
+            self._contas_indexadas += 1
+
+    def adicionar_usuario(self, usuario):
+        self.usuarios.append(usuario)
+        self._sincronizar()
+
+    def adicionar_conta(self, conta):
+        self.contas.append(conta)
+        self._sincronizar()
+
+    def buscar_usuario(self, cpf):
+        """Busca um usuário pelo CPF em O(1)."""
+        self._sincronizar()
+        return self._usuario_por_cpf.get(cpf)
+
+    def buscar_conta(self, numero_conta):
+        """Busca uma conta pelo número em O(1)."""
+        self._sincronizar()
+        return self._conta_por_numero.get(numero_conta)
+
+    def contas_do_cpf(self, cpf):
+        """Retorna as contas de um titular, na ordem de criação."""
+        self._sincronizar()
+        return list(self._contas_por_cpf.get(cpf, []))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Resumos por período (mês e dia) das movimentações de uma conta.
+
+Os resumos de uma conta são um dict período -> resumo, com um período por mês
+("2025-03") e um por dia ("2025-03-14"). Cada resumo guarda, por categoria,
+[quantidade, total em centavos] e, em "saldo", o saldo ao fim do período:
+
+    {"2025-03": {"deposito": [2, 30000], "saque": [1, 5000], "saldo": 25000}, ...}
+
+Cada transação atualiza exatamente dois períodos, então manter os resumos
+custa O(1) por operação.
+"""
+
+import unicodedata
+
+CATEGORIAS = ("deposito", "saque", "transferencia_enviada", "transferencia_recebida")
+SINAIS = {"deposito": 1, "saque": -1, "transferencia_enviada": -1, "transferencia_recebida": 1}
+CATEGORIA_OUTROS = "outros"
+
+_categorias_por_tipo = {}
+
+
+def categoria_transacao(tipo):
+    """Categoria de resumo de um rótulo de tipo ("Transferência enviada" -> "transferencia_enviada")."""
+    categoria = _categorias_por_tipo.get(tipo)
+    if categoria is None:
+        texto = unicodedata.normalize("NFKD", tipo or "").encode("ASCII", "ignore").decode("ASCII").lower()
+        texto = "_".join(texto.split())
+        categoria = next((nome for nome in CATEGORIAS if texto.startswith(nome)), CATEGORIA_OUTROS)
+        _categorias_por_tipo[tipo] = categoria
+    return categoria
+
+
+def periodos_transacao(transacao):
+    """(mês, dia) da transação a partir do timestamp "dd/mm/aaaa HH:MM:SS"; None se não houver data."""
+    timestamp = transacao.get("timestamp")
+    if not timestamp or len(timestamp) < 10:
+        return None
+    mes = f"{timestamp[6:10]}-{timestamp[3:5]}"
+    return mes, f"{mes}-{timestamp[0:2]}"
+
+
+def acumular(resumos, transacao, saldo_centavos):
+    """Soma a transação aos resumos do seu mês e dia; `saldo_centavos` é o saldo após ela."""
+    periodos = periodos_transacao(transacao)
+    if periodos is None:
+        return
+    categoria = categoria_transacao(transacao.get("tipo"))
+    valor = transacao.get("valor_centavos") or 0
+    for periodo in periodos:
+        resumo = resumos.get(periodo)
+        if resumo is None:
+            resumo = resumos[periodo] = {}
+        totais = resumo.get(categoria)
+        if totais is None:
+            resumo[categoria] = [1, valor]
+        else:
+            totais[0] += 1
+            totais[1] += valor
+        resumo["saldo"] = saldo_centavos
+
+
+def calcular_resumos(transacoes):
+    """Monta os resumos percorrendo o histórico (migração de dados sem resumos).
+
+    O saldo de cada período é a soma acumulada das movimentações, já que as
+    contas começam com saldo zero.
+    """
+    resumos = {}
+    saldo = 0
+    for transacao in transacoes:
+        saldo += SINAIS.get(categoria_transacao(transacao.get("tipo")), 0) * (transacao.get("valor_centavos") or 0)
+        acumular(resumos, transacao, saldo)
+    return resumos
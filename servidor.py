@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Sistema Bancário - Servidor asyncio (protocolo JSON por linha).
+
+Cada requisição é uma linha JSON com "op" e os parâmetros da operação; a
+resposta é uma linha JSON com o mesmo "id" (se informado) e "ok":
+
+    {"id": 1, "op": "criar_usuario", "nome": "Ana", "cpf": "11144477735",
+     "data_nascimento": "01-01-1990", "endereco": "Rua A"}
+    {"id": 2, "op": "criar_conta", "cpf": "11144477735"}
+    {"id": 3, "op": "depositar", "conta": 1, "valor": "100.00"}
+    {"id": 4, "op": "sacar", "conta": 1, "valor": 20}
+    {"id": 5, "op": "transferir", "conta": 1, "destino": 2, "valor": 10}
+    {"id": 6, "op": "extrato", "conta": 1}
+
+    {"id": 3, "ok": true, "resultado": "Depósito de R$ 100.00 realizado com sucesso!"}
+    {"id": 4, "ok": false, "erro": "Saldo insuficiente."}
+
+Uso:
+    python servidor.py [--host 127.0.0.1] [--porta 8765]
+    python servidor.py --unix /tmp/banco.sock
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from utils import carregar_dados, configurar_persistencia, descarregar_log
+from concorrencia import MotorConcorrente
+from repositorio import Repositorio
+from dinheiro import formatar_centavos
+
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8765
+TAMANHO_MAXIMO_LINHA = 64 * 1024
+
+
+def _operacoes(motor):
+    """Tabela "op" -> função que recebe o dict da requisição e devolve o resultado."""
+    def extrato(req):
+        saldo_centavos, transacoes = motor.extrato(int(req["conta"]))
+        return {
+            "saldo_centavos": saldo_centavos,
+            "saldo": formatar_centavos(saldo_centavos),
+            "transacoes": [transacao.para_dict() for transacao in transacoes],
+        }
+
+    return {
+        "criar_usuario": lambda req: motor.criar_usuario(
+            req["nome"], req["cpf"], req["data_nascimento"], req.get("endereco", "")),
+        "criar_conta": lambda req: motor.criar_conta(req["cpf"]),
+        "depositar": lambda req: motor.depositar(int(req["conta"]), req["valor"]),
+        "sacar": lambda req: motor.sacar(int(req["conta"]), req["valor"]),
+        "transferir": lambda req: motor.transferir(int(req["conta"]), int(req["destino"]), req["valor"]),
+        "extrato": extrato,
+    }
+
+
+class ServidorBancario:
+    """Atende vários clientes ao mesmo tempo sobre um MotorConcorrente.
+
+    O laço de eventos só lê e escreve nos sockets; cada operação roda no pool
+    de threads padrão, já que pode esperar pela trava de uma conta (que a
+    thread escritora do motor segura durante um salvamento). A gravação em
+    disco nunca acontece no caminho da requisição.
+    """
+    def __init__(self, motor):
+        self.motor = motor
+        self._operacoes = _operacoes(motor)
+
+    def executar(self, requisicao):
+        """Executa uma requisição (dict) e monta a resposta (dict); roda fora do laço de eventos."""
+        resposta = {"id": requisicao.get("id")} if "id" in requisicao else {}
+        try:
+            operacao = self._operacoes.get(requisicao.get("op"))
+            if operacao is None:
+                raise ValueError(f"Operação desconhecida: {requisicao.get('op')}")
+            resposta["resultado"] = operacao(requisicao)
+            resposta["ok"] = True
+        except KeyError as e:
+            resposta.update(ok=False, erro=f"Parâmetro ausente: {e.args[0]}")
+        except (ValueError, TypeError) as e:
+            resposta.update(ok=False, erro=str(e))
+        except Exception as e:
+            # Qualquer outra falha vira uma resposta de erro, sem derrubar a sessão do cliente
+            print(f"[AVISO] Erro inesperado na operação {requisicao.get('op')!r}: {type(e).__name__}: {e}")
+            resposta.update(ok=False, erro="Erro interno do servidor.")
+        return resposta
+
+    async def atender(self, leitor, escritor):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    linha = await leitor.readline()
+                except ValueError:  # linha maior que TAMANHO_MAXIMO_LINHA
+                    break
+                if not linha:
+                    break
+                if not linha.strip():
+                    continue
+                try:
+                    requisicao = json.loads(linha)
+                    if not isinstance(requisicao, dict):
+                        raise ValueError("A requisição deve ser um objeto JSON.")
+                except ValueError as e:
+                    resposta = {"ok": False, "erro": f"JSON inválido: {e}"}
+                else:
+                    resposta = await loop.run_in_executor(None, self.executar, requisicao)
+                escritor.write(json.dumps(resposta, ensure_ascii=False).encode("utf-8") + b"\n")
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, host=HOST_PADRAO, porta=PORTA_PADRAO, unix=None):
+        """Abre o servidor TCP (ou Unix, se `unix` for um caminho) e o retorna."""
+        if unix:
+            return await asyncio.start_unix_server(self.atender, path=unix, limit=TAMANHO_MAXIMO_LINHA)
+        return await asyncio.start_server(self.atender, host, porta, limit=TAMANHO_MAXIMO_LINHA)
+
+
+async def _servir(args):
+    # Backend definido pela variável de ambiente BANCO_PERSISTENCIA
+    configurar_persistencia()
+    usuarios, contas, proximo_numero_conta = carregar_dados()
+    motor = MotorConcorrente(usuarios, contas, Repositorio(usuarios, contas), proximo_numero_conta)
+    servidor = await ServidorBancario(motor).iniciar(args.host, args.porta, args.unix)
+    endereco = args.unix or "%s:%d" % servidor.sockets[0].getsockname()[:2]
+    print(f"Servidor ouvindo em {endereco}", flush=True)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        motor.fechar()
+        descarregar_log()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sistema Bancário - servidor asyncio (JSON por linha)")
+    parser.add_argument("--host", default=HOST_PADRAO)
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help="0 escolhe uma porta livre")
+    parser.add_argument("--unix", metavar="CAMINHO", help="usa um socket Unix em vez de TCP")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_servir(args))
+    except KeyboardInterrupt:
+        print("\nServidor encerrado.")
+
+
+if __name__ == "__main__":
+    main()
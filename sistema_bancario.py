@@ -2,19 +2,25 @@
 # -*- coding: utf-8 -*-
 """Sistema Bancário - Interface de Linha de Comando (CLI)."""
 
+import argparse
+
 from utils import (
-    validar_cpf, validar_data, filtrar_usuario_por_cpf, 
+    validar_cpf, validar_data,
     carregar_dados, salvar_dados, normalizar_texto, registrar_consulta_extrato,
-    AGENCIA_PADRAO
+    configurar_persistencia, ler_operacoes_lote, controle_limites, metricas, AGENCIA_PADRAO
 )
 from models import (
-    ContaIterador, gerar_transacoes, criar_usuario_obj, criar_conta,
-    verificar_reset_saques_diarios, depositar_obj, sacar_obj, transferir_obj
+    ContaIterador, pagina_extrato, formatar_transacao, criar_usuario_obj, criar_conta,
+    depositar_obj, sacar_obj, transferir_obj,
+    processar_lote, resumos_mensais
 )
+from repositorio import Repositorio
+from dinheiro import formatar_centavos
 
 usuarios = []
 contas = []
 proximo_numero_conta = 1
+repositorio = Repositorio(usuarios, contas)
 
 
 def criar_usuario():
@@ -27,7 +33,7 @@ def criar_usuario():
         if not validar_cpf(cpf_input):
             print("CPF inválido! Tente novamente.")
             continue
-        if filtrar_usuario_por_cpf(usuarios, cpf_input):
+        if repositorio.buscar_usuario(cpf_input):
             print("CPF já cadastrado! Tente novamente.")
             continue
         cpf = cpf_input
@@ -43,8 +49,8 @@ def criar_usuario():
     endereco = input("Informe o endereço (logradouro, nro - bairro - cidade/sigla estado): ")
 
     usuario = criar_usuario_obj(nome, cpf, data_nascimento, endereco)
-    usuarios.append(usuario)
-    salvar_dados(usuarios, contas, proximo_numero_conta)
+    repositorio.adicionar_usuario(usuario)
+    salvar_dados(usuarios, contas, proximo_numero_conta, alteracoes=[{"op": "usuario", "dados": usuario}])
     print("Usuário criado com sucesso!")
     return usuario
 
@@ -60,7 +66,7 @@ def criar_conta_cli():
     usuario = None
     while not usuario:
         cpf = input("Informe o CPF do titular da conta: ")
-        usuario = filtrar_usuario_por_cpf(usuarios, cpf)
+        usuario = repositorio.buscar_usuario(cpf)
         if not usuario:
             print("Usuário não encontrado. Tente novamente.")
 
@@ -79,7 +85,7 @@ def listar_contas(titulo="Contas cadastradas", lista_contas=None):
 
     print(f"\n==== {titulo} ====")
     for info in ContaIterador(lista_contas):
-        saldo_str = f"Saldo: R$ {info['saldo']:.2f}"
+        saldo_str = f"Saldo: R$ {formatar_centavos(info['saldo_centavos'])}"
         print(
             f"Agência: {info['agencia']} | Conta: {info['numero_conta']} | Titular: {info['titular']} | {saldo_str}"
         )
@@ -93,15 +99,14 @@ def selecionar_conta():
         return None
 
     filtrar = input("Deseja filtrar contas por CPF antes de selecionar? (s/n): ").strip().lower()
-    contas_disponiveis = contas
+    cpf = None
 
     if filtrar == "s":
         cpf = input("Informe o CPF para filtrar: ")
-        contas_filtradas = [conta for conta in contas if conta["usuario"]["cpf"] == cpf]
+        contas_filtradas = repositorio.contas_do_cpf(cpf)
         if not contas_filtradas:
             print("Nenhuma conta encontrada para o CPF informado.")
             return None
-        contas_disponiveis = contas_filtradas
         listar_contas(titulo="Contas filtradas", lista_contas=contas_filtradas)
     else:
         listar_contas()
@@ -113,9 +118,9 @@ def selecionar_conta():
             print("Número de conta inválido. Tente novamente.")
             continue
 
-        for conta in contas_disponiveis:
-            if conta["numero_conta"] == numero:
-                return conta
+        conta = repositorio.buscar_conta(numero)
+        if conta and (cpf is None or conta["usuario"]["cpf"] == cpf):
+            return conta
 
         print("Conta não encontrada. Tente novamente.")
 
@@ -143,11 +148,6 @@ def sacar():
     if not conta:
         return
     
-    # Resetar saques diários se necessário
-    if verificar_reset_saques_diarios(conta):
-        print("Contador de saques diários foi resetado para um novo dia!")
-        salvar_dados(usuarios, contas, proximo_numero_conta)
-    
     while True:
         try:
             valor = float(input("Informe o valor do saque: "))
@@ -174,7 +174,10 @@ def transferir():
     while True:
         try:
             valor = float(input("Informe o valor da transferência: "))
-            resultado = transferir_obj(conta_origem["numero_conta"], conta_destino["numero_conta"], valor, usuarios, contas)
+            resultado = transferir_obj(
+                conta_origem["numero_conta"], conta_destino["numero_conta"], valor, usuarios, contas,
+                repositorio=repositorio,
+            )
             print(resultado)
             break
         except ValueError as e:
@@ -196,21 +199,131 @@ def exibir_extrato():
     print("\n================ EXTRATO ================")
     filtro = input("Deseja filtrar por tipo (depósito/saque/transferência)? Deixe vazio para todas: ").strip()
     filtro_normalizado = normalizar_texto(filtro) if filtro else None
-    transacoes = list(gerar_transacoes(conta, filtro_normalizado))
-    if not transacoes:
-        print("Não foram realizadas movimentações." if not conta["extrato"] else "Nenhuma transação corresponde ao filtro.")
-    else:
-        for tx in transacoes:
-            timestamp = tx.get("timestamp") or "----"
-            tipo_tx = tx.get("tipo")
-            valor = tx.get("valor")
-            descricao = tx.get("descricao")
-            valor_str = f"R$ {valor:.2f}" if isinstance(valor, (int, float)) else ""
-            print(f"[{timestamp}] {tipo_tx}: {valor_str} {descricao}")
-    print(f"\nSaldo: R$ {conta['saldo']:.2f}")
+    
+    # Página a página, das transações mais recentes para as mais antigas
+    cursor, numero_pagina = None, 1
+    while True:
+        pagina = pagina_extrato(conta, cursor=cursor, tipo=filtro_normalizado)
+        if not pagina["transacoes"]:
+            print("Não foram realizadas movimentações." if not conta["transacoes"] else "Nenhuma transação corresponde ao filtro.")
+        else:
+            print(f"\n---- Página {numero_pagina} (mais recentes primeiro) ----")
+            for tx in pagina["transacoes"]:
+                print(formatar_transacao(tx))
+        
+        opcoes = []
+        if pagina["proximo"] is not None:
+            opcoes.append("[p] Próxima página")
+        if pagina["anterior"] is not None:
+            opcoes.append("[a] Página anterior")
+        if not opcoes:
+            break
+        escolha = input("  ".join(opcoes + ["[Enter] Sair"]) + ": ").strip().lower()
+        if escolha == "p" and pagina["proximo"] is not None:
+            cursor, numero_pagina = pagina["proximo"], numero_pagina + 1
+        elif escolha == "a" and pagina["anterior"] is not None:
+            cursor, numero_pagina = pagina["anterior"], max(1, numero_pagina - 1)
+        elif not escolha:
+            break
+    print(f"\nSaldo: R$ {formatar_centavos(conta['saldo_centavos'])}")
+    print("==========================================")
+
+
+def exibir_resumo_mensal():
+    """Exibe os totais de cada mês de uma conta (lidos dos resumos, sem percorrer o extrato)."""
+    conta = selecionar_conta()
+    if not conta:
+        return
+    
+    meses = resumos_mensais(conta)
+    if not meses:
+        print("Não foram realizadas movimentações.")
+        return
+    
+    print("\n============= RESUMO MENSAL =============")
+    for resumo in meses:
+        ano, mes = resumo["periodo"].split("-")
+        print(f"\n{mes}/{ano}")
+        for rotulo, categoria in (("Depósitos", "deposito"), ("Saques", "saque"),
+                                  ("Transf. enviadas", "transferencia_enviada"),
+                                  ("Transf. recebidas", "transferencia_recebida")):
+            quantidade, valor = resumo[categoria]
+            if quantidade:
+                print(f"  {rotulo:18} {quantidade:4}x  R$ {formatar_centavos(valor)}")
+        print(f"  {'Resultado do mês':18}        R$ {formatar_centavos(resumo['liquido_centavos'])}")
+        print(f"  {'Saldo no fim':18}        R$ {formatar_centavos(resumo['saldo_centavos'])}")
     print("==========================================")
 
 
+def definir_limites():
+    """Define limites de saque específicos para uma conta."""
+    conta = selecionar_conta()
+    if not conta:
+        return
+    
+    atual = controle_limites.limite(conta["numero_conta"])
+    print(f"Limites atuais: R$ {formatar_centavos(atual['valor_maximo_centavos'])} por saque, "
+          f"{atual['saques_diarios']} saques por dia.")
+    try:
+        valor = input("Novo valor máximo por saque (vazio = padrão): ").strip()
+        saques = input("Novo limite de saques por dia (vazio = padrão): ").strip()
+        novo = controle_limites.definir_limite(
+            conta["numero_conta"], float(valor) if valor else None, int(saques) if saques else None)
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return
+    print(f"Limites definidos: R$ {formatar_centavos(novo['valor_maximo_centavos'])} por saque, "
+          f"{novo['saques_diarios']} saques por dia.")
+
+
+def listar_proximas_do_limite():
+    """Lista as contas que podem fazer no máximo mais um saque hoje."""
+    proximas = controle_limites.proximos_do_limite(contas, margem=1)
+    if not proximas:
+        print("Nenhuma conta próxima do limite de saques diários.")
+        return
+    
+    print("\n==== Contas próximas do limite de saques ====")
+    for item in proximas:
+        print(f"Conta: {item['numero_conta']} | Saques hoje: {item['saques']} de {item['limite']}")
+    print("========================\n")
+
+
+def processar_arquivo_lote(caminho=None):
+    """Processa um arquivo CSV/JSONL de operações com um único salvamento."""
+    if caminho is None:
+        caminho = input("Informe o caminho do arquivo de operações (.csv ou .jsonl): ").strip()
+    try:
+        operacoes = ler_operacoes_lote(caminho)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler arquivo de lote: {e}")
+        return None
+    
+    resultados = processar_lote(operacoes, usuarios, contas, repositorio=repositorio)
+    falhas = [r for r in resultados if not r["sucesso"]]
+    print(f"\nLote processado: {len(resultados) - len(falhas)} operações aplicadas, {len(falhas)} com falha.")
+    for falha in falhas:
+        print(f"  - Operação {falha['indice'] + 1}: {falha['mensagem']}")
+    return resultados
+
+
+def exibir_metricas():
+    """Exibe as latências medidas nesta sessão e oferece gravar o relatório em JSON."""
+    if not metricas.ativo:
+        print("Métricas desativadas (BANCO_METRICAS=0).")
+        return
+    print("\n============= MÉTRICAS DE DESEMPENHO =============")
+    print(metricas.formatar_relatorio())
+    print("==================================================")
+    caminho = input("Salvar relatório em JSON? Informe o arquivo (Enter para não salvar): ").strip()
+    if caminho:
+        try:
+            metricas.salvar(caminho)
+            print(f"Relatório salvo em {caminho}.")
+        except OSError as e:
+            print(f"Erro ao salvar relatório: {e}")
+
+
 menu = """
 [u] Criar Usuário
 [c] Criar Conta
@@ -219,16 +332,37 @@ menu = """
 [s] Sacar
 [t] Transferir
 [e] Extrato
+[r] Resumo Mensal
+[b] Processar Lote (CSV/JSONL)
+[x] Definir Limites de Saque
+[n] Contas Próximas do Limite
+[m] Métricas de Desempenho
 [q] Sair
 
 => """
 
 
-def main():
-    """Loop interativo principal do CLI."""
-    global usuarios, contas, proximo_numero_conta
+def main(argv=None):
+    """Loop interativo principal do CLI.
+
+    Com `--lote ARQUIVO`, processa o arquivo de operações e encerra sem abrir o menu.
+    """
+    global usuarios, contas, proximo_numero_conta, repositorio
+    
+    parser = argparse.ArgumentParser(description="Sistema Bancário - CLI")
+    parser.add_argument("--lote", metavar="ARQUIVO", help="processa um arquivo CSV/JSONL de operações e sai")
+    parser.add_argument("--preguicoso", action="store_true",
+                        help="lê o histórico de cada conta só quando for acessado")
+    args = parser.parse_args(argv)
     
+    # Backend definido pela variável de ambiente BANCO_PERSISTENCIA
+    configurar_persistencia(preguicoso=args.preguicoso or None)
     usuarios, contas, proximo_numero_conta = carregar_dados()
+    repositorio = Repositorio(usuarios, contas)
+    
+    if args.lote:
+        processar_arquivo_lote(args.lote)
+        return
 
     while True:
         opcao = input(menu)
@@ -245,8 +379,18 @@ def main():
             transferir()
         elif opcao == "e":
             exibir_extrato()
+        elif opcao == "r":
+            exibir_resumo_mensal()
         elif opcao == "l":
             listar_contas()
+        elif opcao == "b":
+            processar_arquivo_lote()
+        elif opcao == "x":
+            definir_limites()
+        elif opcao == "n":
+            listar_proximas_do_limite()
+        elif opcao == "m":
+            exibir_metricas()
         elif opcao == "q":
             break
         else:
@@ -7,8 +7,8 @@ from pathlib import Path
 from utils import (
     validar_cpf,
     validar_data,
-    filtrar_usuario_por_cpf,
     carregar_dados,
+    configurar_persistencia,
     registrar_consulta_extrato,
     salvar_dados,
     AGENCIA_PADRAO,
@@ -18,18 +18,29 @@ from utils import (
     LIMITE_SAQUES_DIARIOS,
 )
 from models import (
-    verificar_reset_saques_diarios,
     ContaIterador,
-    gerar_transacoes,
+    ListagemContas,
+    pagina_extrato,
+    formatar_transacao,
+    criar_usuario_obj,
     depositar_obj,
     sacar_obj,
     transferir_obj,
 )
+from entidades import Conta
+from repositorio import Repositorio
+from dinheiro import formatar_centavos
+from trabalhador import TrabalhadorSegundoPlano
+from perfil import perfilavel
+
+LINHAS_VISIVEIS_LISTAGEM = 20  # linhas da tabela de contas montadas por vez
+INTERVALO_RESULTADOS_MS = 50   # intervalo entre verificações de operações concluídas
 
 # Variáveis globais (carregadas na inicialização)
 usuarios = []
 contas = []
 proximo_numero_conta = 1
+repositorio = Repositorio(usuarios, contas)
 
 
 
@@ -42,21 +53,15 @@ def criar_usuario(nome, cpf, data_nascimento, endereco):
         if not validar_cpf(cpf):
             return False, "CPF inválido!"
         
-        if filtrar_usuario_por_cpf(usuarios, cpf):
+        if repositorio.buscar_usuario(cpf):
             return False, "CPF já cadastrado!"
         
         if not validar_data(data_nascimento):
             return False, "Data inválida! Use formato dd-mm-aaaa"
         
-        usuario = {
-            "nome": nome,
-            "cpf": cpf,
-            "data_nascimento": data_nascimento,
-            "endereco": endereco,
-            "data_criacao": datetime.now().isoformat(),
-        }
-        usuarios.append(usuario)
-        salvar_dados(usuarios, contas, proximo_numero_conta)
+        usuario = criar_usuario_obj(nome, cpf, data_nascimento, endereco)
+        repositorio.adicionar_usuario(usuario)
+        salvar_dados(usuarios, contas, proximo_numero_conta, alteracoes=[{"op": "usuario", "dados": usuario}])
         return True, "Usuário criado com sucesso!"
     except Exception as e:
         return False, str(e)
@@ -69,23 +74,20 @@ def criar_conta(cpf):
         if not usuarios:
             return False, "Cadastre um usuário antes de criar uma conta."
         
-        usuario = filtrar_usuario_por_cpf(usuarios, cpf)
+        usuario = repositorio.buscar_usuario(cpf)
         if not usuario:
             return False, "Usuário não encontrado."
         
-        conta = {
-            "agencia": AGENCIA_PADRAO,
-            "numero_conta": proximo_numero_conta,
-            "usuario": usuario,
-            "saldo": 0,
-            "extrato": "",
-            "saques_realizados": 0,
-            "data_criacao": datetime.now().isoformat(),
-        }
-        contas.append(conta)
+        conta = Conta(
+            agencia=AGENCIA_PADRAO,
+            numero_conta=proximo_numero_conta,
+            usuario=usuario,
+            data_criacao=datetime.now().isoformat(),
+        )
+        repositorio.adicionar_conta(conta)
         numero_criado = proximo_numero_conta
         proximo_numero_conta += 1
-        salvar_dados(usuarios, contas, proximo_numero_conta)
+        salvar_dados(usuarios, contas, proximo_numero_conta, alteracoes=[{"op": "conta", "dados": conta}])
         return True, f"Conta criada com sucesso! Número: {numero_criado}"
     except Exception as e:
         return False, str(e)
@@ -94,12 +96,11 @@ def criar_conta(cpf):
 def depositar(numero_conta, valor):
     """Wrapper para depósito."""
     try:
-        for conta in contas:
-            if conta["numero_conta"] == numero_conta:
-                mensagem = depositar_obj(conta, valor, usuarios, contas)
-                return True, mensagem
-        
-        return False, "Conta não encontrada."
+        conta = repositorio.buscar_conta(numero_conta)
+        if not conta:
+            return False, "Conta não encontrada."
+        mensagem = depositar_obj(conta, valor, usuarios, contas)
+        return True, mensagem
     except Exception as e:
         return False, str(e)
 
@@ -107,12 +108,11 @@ def depositar(numero_conta, valor):
 def sacar(numero_conta, valor):
     """Wrapper para saque."""
     try:
-        for conta in contas:
-            if conta["numero_conta"] == numero_conta:
-                mensagem = sacar_obj(conta, valor, usuarios, contas)
-                return True, mensagem
-        
-        return False, "Conta não encontrada."
+        conta = repositorio.buscar_conta(numero_conta)
+        if not conta:
+            return False, "Conta não encontrada."
+        mensagem = sacar_obj(conta, valor, usuarios, contas)
+        return True, mensagem
     except Exception as e:
         return False, str(e)
 
@@ -120,27 +120,33 @@ def sacar(numero_conta, valor):
 def transferir(numero_origem, numero_destino, valor):
     """Wrapper para transferência."""
     try:
-        mensagem = transferir_obj(numero_origem, numero_destino, valor, usuarios, contas)
+        mensagem = transferir_obj(numero_origem, numero_destino, valor, usuarios, contas, repositorio=repositorio)
         return True, mensagem
     except Exception as e:
         return False, str(e)
 
 
-def obter_extrato(numero_conta):
-    """Wrapper para obter extrato."""
-    for conta in contas:
-        if conta["numero_conta"] == numero_conta:
-            extrato = conta["extrato"] if conta["extrato"] else "Não foram realizadas movimentações."
-            saldo = conta["saldo"]
-            return extrato, saldo
-    return None, None
+@perfilavel()
+def obter_extrato(numero_conta, cursor=None):
+    """Wrapper para obter uma página do extrato (mais recentes primeiro).
+
+    Retorna (texto, saldo_centavos, pagina); `pagina` traz os cursores
+    "proximo"/"anterior" usados na navegação.
+    """
+    conta = repositorio.buscar_conta(numero_conta)
+    if not conta:
+        return None, None, None
+    pagina = pagina_extrato(conta, cursor=cursor)
+    linhas = [formatar_transacao(tx) for tx in pagina["transacoes"]]
+    extrato = "\n".join(linhas) if linhas else "Não foram realizadas movimentações."
+    return extrato, conta["saldo_centavos"], pagina
 
 
 # ============= INTERFACE GRÁFICA =============
 
 class BancoGUI:
     def __init__(self, root):
-        global usuarios, contas, proximo_numero_conta
+        global usuarios, contas, proximo_numero_conta, repositorio
         
         self.root = root
         self.root.title("Sistema Bancário - Interface Gráfica")
@@ -148,15 +154,60 @@ class BancoGUI:
         self.root.minsize(600, 500)
         self.root.configure(bg="#f0f0f0")
         
-        # Carregar dados do arquivo
+        # Carregar dados do backend configurado (BANCO_PERSISTENCIA)
+        configurar_persistencia()
         usuarios, contas, proximo_numero_conta = carregar_dados()
+        repositorio = Repositorio(usuarios, contas)
+        
+        # Operações que gravam em disco rodam no trabalhador, na ordem em que
+        # foram pedidas; os resultados voltam para a thread do Tk via `after`
+        self.trabalhador = TrabalhadorSegundoPlano("operacoes-gui")
+        self.barra_status = tk.Label(self.root, text="", font=("Arial", 9), bg="#f0f0f0", fg="#7f8c8d", anchor="w")
+        self.barra_status.pack(side=tk.BOTTOM, fill=tk.X)
+        self.root.protocol("WM_DELETE_WINDOW", self.root.quit)
+        self.acompanhar_operacoes()
         
         self.criar_menu_principal()
     
+    def acompanhar_operacoes(self):
+        """Entrega os resultados concluídos e atualiza o indicador de ocupado."""
+        self.trabalhador.processar_resultados()
+        pendentes = self.trabalhador.pendentes
+        self.barra_status.config(text=f"⏳ Processando {pendentes} operação(ões)..." if pendentes else "")
+        self.root.config(cursor="watch" if pendentes else "")
+        self.root.after(INTERVALO_RESULTADOS_MS, self.acompanhar_operacoes)
+    
+    def executar_em_segundo_plano(self, funcao, *args, botao=None):
+        """Executa um wrapper (sucesso, mensagem) no trabalhador e mostra o resultado.
+
+        O botão fica desabilitado enquanto a operação não termina. Se o usuário
+        já tiver saído da tela, só a mensagem é exibida.
+        """
+        if botao is not None:
+            botao.config(state=tk.DISABLED)
+        
+        def concluir(resultado):
+            sucesso, mensagem = resultado
+            tela_ativa = botao is None or botao.winfo_exists()
+            if sucesso:
+                messagebox.showinfo("Sucesso", mensagem)
+                if tela_ativa:
+                    self.voltar_menu()
+            else:
+                messagebox.showerror("Erro", mensagem)
+                if tela_ativa and botao is not None:
+                    botao.config(state=tk.NORMAL)
+        
+        def falhar(erro):
+            concluir((False, str(erro)))
+        
+        self.trabalhador.enviar(funcao, *args, ao_concluir=concluir, ao_falhar=falhar)
+    
     def limpar_janela(self):
-        """Limpa todos os widgets da janela."""
+        """Limpa todos os widgets da janela (exceto a barra de status)."""
         for widget in self.root.winfo_children():
-            widget.destroy()
+            if widget is not self.barra_status:
+                widget.destroy()
     
     def voltar_menu(self):
         """Volta para o menu principal."""
@@ -237,12 +288,7 @@ class BancoGUI:
                 messagebox.showerror("Erro", "Todos os campos são obrigatórios!")
                 return
             
-            sucesso, mensagem = criar_usuario(nome, cpf, data, endereco)
-            if sucesso:
-                messagebox.showinfo("Sucesso", mensagem)
-                self.voltar_menu()
-            else:
-                messagebox.showerror("Erro", mensagem)
+            self.executar_em_segundo_plano(criar_usuario, nome, cpf, data, endereco, botao=btn_salvar)
         
         frame_botoes = tk.Frame(self.root, bg="#f0f0f0")
         frame_botoes.pack(pady=20)
@@ -276,12 +322,7 @@ class BancoGUI:
                 messagebox.showerror("Erro", "CPF é obrigatório!")
                 return
             
-            sucesso, mensagem = criar_conta(cpf)
-            if sucesso:
-                messagebox.showinfo("Sucesso", mensagem)
-                self.voltar_menu()
-            else:
-                messagebox.showerror("Erro", mensagem)
+            self.executar_em_segundo_plano(criar_conta, cpf, botao=btn_salvar)
         
         frame_botoes = tk.Frame(self.root, bg="#f0f0f0")
         frame_botoes.pack(pady=20)
@@ -305,37 +346,103 @@ class BancoGUI:
             label_vazio = tk.Label(self.root, text="Nenhuma conta cadastrada.", font=("Arial", 12), bg="#f0f0f0")
             label_vazio.pack(pady=50)
         else:
+            listagem = ListagemContas(contas)
+            # Posições (em `listagem.linhas`) do resultado atual e primeira linha visível
+            estado = {"posicoes": listagem.consultar(), "inicio": 0, "coluna": None, "decrescente": False}
+            
+            frame_busca = tk.Frame(self.root, bg="#f0f0f0")
+            frame_busca.pack(padx=10, fill=tk.X)
+            
+            label_busca = tk.Label(frame_busca, text="Buscar (CPF ou nome):", font=("Arial", 10), bg="#f0f0f0")
+            label_busca.pack(side=tk.LEFT)
+            entry_busca = tk.Entry(frame_busca, font=("Arial", 10), width=30)
+            entry_busca.pack(side=tk.LEFT, padx=5)
+            label_total = tk.Label(frame_busca, text="", font=("Arial", 9), bg="#f0f0f0")
+            label_total.pack(side=tk.RIGHT)
+            
             frame_tabela = tk.Frame(self.root, bg="#f0f0f0")
             frame_tabela.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
             
-            # Treeview com Scrollbar
+            # Treeview virtual: só as linhas visíveis existem na árvore; a barra de
+            # rolagem percorre o resultado da busca/ordenação no índice
             columns = ("agencia", "numero", "titular", "saldo")
-            tree = ttk.Treeview(frame_tabela, columns=columns, show="headings")
-            
-            tree.heading("agencia", text="Agência")
-            tree.heading("numero", text="Conta")
-            tree.heading("titular", text="Titular")
-            tree.heading("saldo", text="Saldo")
+            titulos = {"agencia": "Agência", "numero": "Conta", "titular": "Titular", "saldo": "Saldo"}
+            tree = ttk.Treeview(frame_tabela, columns=columns, show="headings", height=LINHAS_VISIVEIS_LISTAGEM)
             
             tree.column("agencia", width=100, anchor="center")
             tree.column("numero", width=100, anchor="center")
             tree.column("titular", width=300, anchor="w")
             tree.column("saldo", width=150, anchor="e")
             
-            scrollbar = ttk.Scrollbar(frame_tabela, orient=tk.VERTICAL, command=tree.yview)
-            tree.configure(yscroll=scrollbar.set)
+            def exibir():
+                posicoes = estado["posicoes"]
+                total = len(posicoes)
+                estado["inicio"] = inicio = max(0, min(estado["inicio"], total - LINHAS_VISIVEIS_LISTAGEM))
+                fim = min(total, inicio + LINHAS_VISIVEIS_LISTAGEM)
+                
+                tree.delete(*tree.get_children())
+                for posicao in posicoes[inicio:fim]:
+                    info = listagem.linhas[posicao]
+                    tree.insert("", tk.END, values=(
+                        info["agencia"],
+                        str(info["numero_conta"]),
+                        info["titular"],
+                        f"R$ {formatar_centavos(info['saldo_centavos'])}"
+                    ))
+                
+                if total:
+                    scrollbar.set(inicio / total, fim / total)
+                else:
+                    scrollbar.set(0, 1)
+                label_total.config(text=f"{total} de {len(listagem)} contas")
+            
+            def rolar(acao, quantidade, unidade=None):
+                if acao == "moveto":
+                    estado["inicio"] = int(float(quantidade) * len(estado["posicoes"]))
+                else:
+                    passo = LINHAS_VISIVEIS_LISTAGEM if unidade == "pages" else 1
+                    estado["inicio"] += int(quantidade) * passo
+                exibir()
+            
+            def rolar_roda(event):
+                if event.num == 4 or event.delta > 0:
+                    rolar("scroll", -3, "units")
+                else:
+                    rolar("scroll", 3, "units")
+                return "break"
+            
+            def atualizar_consulta(event=None):
+                estado["posicoes"] = listagem.consultar(entry_busca.get(), estado["coluna"], estado["decrescente"])
+                estado["inicio"] = 0
+                exibir()
+            
+            def ordenar(coluna):
+                if estado["coluna"] == coluna:
+                    estado["decrescente"] = not estado["decrescente"]
+                else:
+                    estado["coluna"], estado["decrescente"] = coluna, False
+                for nome, titulo in titulos.items():
+                    seta = (" ▼" if estado["decrescente"] else " ▲") if nome == coluna else ""
+                    tree.heading(nome, text=titulo + seta)
+                atualizar_consulta()
+            
+            for nome, titulo in titulos.items():
+                tree.heading(nome, text=titulo, command=lambda c=nome: ordenar(c))
+            
+            scrollbar = ttk.Scrollbar(frame_tabela, orient=tk.VERTICAL, command=rolar)
             
             scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
             tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
             
-            # Contas
-            for conta in contas:
-                tree.insert("", tk.END, values=(
-                    conta["agencia"],
-                    str(conta["numero_conta"]),
-                    conta["usuario"]["nome"],
-                    f"R$ {conta['saldo']:.2f}"
-                ))
+            tree.bind("<MouseWheel>", rolar_roda)
+            tree.bind("<Button-4>", rolar_roda)
+            tree.bind("<Button-5>", rolar_roda)
+            entry_busca.bind("<Return>", atualizar_consulta)
+            btn_buscar = tk.Button(frame_busca, text="Buscar", command=atualizar_consulta,
+                                   font=("Arial", 9), bg="#3498db", fg="white")
+            btn_buscar.pack(side=tk.LEFT)
+            
+            exibir()
         
         btn_voltar = tk.Button(self.root, text="Voltar", command=self.voltar_menu, 
                               font=("Arial", 11), bg="#95a5a6", fg="white", padx=20)
@@ -369,12 +476,7 @@ class BancoGUI:
                 messagebox.showerror("Erro", "Valores inválidos!")
                 return
             
-            sucesso, mensagem = depositar(numero_conta, valor)
-            if sucesso:
-                messagebox.showinfo("Sucesso", mensagem)
-                self.voltar_menu()
-            else:
-                messagebox.showerror("Erro", mensagem)
+            self.executar_em_segundo_plano(depositar, numero_conta, valor, botao=btn_depositar)
         
         frame_botoes = tk.Frame(self.root, bg="#f0f0f0")
         frame_botoes.pack(pady=20)
@@ -415,12 +517,7 @@ class BancoGUI:
                 messagebox.showerror("Erro", "Valores inválidos!")
                 return
             
-            sucesso, mensagem = sacar(numero_conta, valor)
-            if sucesso:
-                messagebox.showinfo("Sucesso", mensagem)
-                self.voltar_menu()
-            else:
-                messagebox.showerror("Erro", mensagem)
+            self.executar_em_segundo_plano(sacar, numero_conta, valor, botao=btn_sacar)
         
         frame_botoes = tk.Frame(self.root, bg="#f0f0f0")
         frame_botoes.pack(pady=20)
@@ -467,12 +564,7 @@ class BancoGUI:
                 messagebox.showerror("Erro", "Valores inválidos!")
                 return
             
-            sucesso, mensagem = transferir(numero_origem, numero_destino, valor)
-            if sucesso:
-                messagebox.showinfo("Sucesso", mensagem)
-                self.voltar_menu()
-            else:
-                messagebox.showerror("Erro", mensagem)
+            self.executar_em_segundo_plano(transferir, numero_origem, numero_destino, valor, botao=btn_transferir)
         
         frame_botoes = tk.Frame(self.root, bg="#f0f0f0")
         frame_botoes.pack(pady=20)
@@ -503,6 +595,40 @@ class BancoGUI:
         text_extrato = scrolledtext.ScrolledText(frame, font=("Arial", 9), height=12, width=60, bg="white")
         text_extrato.pack(fill=tk.BOTH, expand=True, pady=10)
         
+        frame_paginas = tk.Frame(frame, bg="#f0f0f0")
+        frame_paginas.pack(fill=tk.X)
+        
+        # Conta exibida e cursores da página atual
+        estado = {"numero_conta": None, "numero_pagina": 1, "proximo": None, "anterior": None}
+        
+        def exibir_pagina(cursor=None, numero_pagina=1):
+            # A página é lida no trabalhador, depois das operações já enviadas a ele
+            self.trabalhador.enviar(
+                obter_extrato, estado["numero_conta"], cursor,
+                ao_concluir=lambda resultado: mostrar_pagina(resultado, numero_pagina),
+                ao_falhar=lambda erro: messagebox.showerror("Erro", str(erro)),
+            )
+        
+        def mostrar_pagina(resultado, numero_pagina):
+            if not text_extrato.winfo_exists():
+                return  # o usuário já saiu da tela
+            extrato, saldo_centavos, pagina = resultado
+            if extrato is None:
+                messagebox.showerror("Erro", "Conta não encontrada!")
+                return
+            estado.update(numero_pagina=numero_pagina, proximo=pagina["proximo"], anterior=pagina["anterior"])
+            
+            texto = f"================ EXTRATO ================\n"
+            texto += f"{extrato}\n"
+            texto += f"Saldo: R$ {formatar_centavos(saldo_centavos)}\n"
+            texto += f"========================================="
+            text_extrato.delete("1.0", tk.END)
+            text_extrato.insert("1.0", texto)
+            
+            label_pagina.config(text=f"Página {numero_pagina}")
+            btn_anterior.config(state=tk.NORMAL if pagina["anterior"] is not None else tk.DISABLED)
+            btn_proxima.config(state=tk.NORMAL if pagina["proximo"] is not None else tk.DISABLED)
+        
         def buscar():
             try:
                 numero_conta = int(entry_conta.get().strip())
@@ -510,23 +636,33 @@ class BancoGUI:
                 messagebox.showerror("Erro", "Número de conta inválido!")
                 return
             
-            extrato, saldo = obter_extrato(numero_conta)
-            if extrato is None:
+            conta = repositorio.buscar_conta(numero_conta)
+            if not conta:
                 messagebox.showerror("Erro", "Conta não encontrada!")
-            else:
-                # Registrar consulta de extrato no log
-                for conta in contas:
-                    if conta.get("numero_conta") == numero_conta:
-                        titular = conta.get("usuario", {}).get("nome", "Desconhecido")
-                        registrar_consulta_extrato(numero_conta, titular)
-                        break
-                
-                texto = f"================ EXTRATO ================\n"
-                texto += f"{extrato}\n"
-                texto += f"Saldo: R$ {saldo:.2f}\n"
-                texto += f"========================================="
-                text_extrato.delete("1.0", tk.END)
-                text_extrato.insert("1.0", texto)
+                return
+            
+            # Registrar consulta de extrato no log
+            titular = conta.get("usuario", {}).get("nome", "Desconhecido")
+            registrar_consulta_extrato(numero_conta, titular)
+            estado["numero_conta"] = numero_conta
+            exibir_pagina()
+        
+        def pagina_anterior():
+            if estado["anterior"] is not None:
+                exibir_pagina(estado["anterior"], max(1, estado["numero_pagina"] - 1))
+        
+        def proxima_pagina():
+            if estado["proximo"] is not None:
+                exibir_pagina(estado["proximo"], estado["numero_pagina"] + 1)
+        
+        btn_anterior = tk.Button(frame_paginas, text="◀ Anterior", command=pagina_anterior,
+                                 font=("Arial", 9), state=tk.DISABLED)
+        btn_anterior.pack(side=tk.LEFT)
+        label_pagina = tk.Label(frame_paginas, text="", font=("Arial", 9), bg="#f0f0f0")
+        label_pagina.pack(side=tk.LEFT, expand=True)
+        btn_proxima = tk.Button(frame_paginas, text="Próxima ▶", command=proxima_pagina,
+                                font=("Arial", 9), state=tk.DISABLED)
+        btn_proxima.pack(side=tk.RIGHT)
         
         frame_botoes = tk.Frame(self.root, bg="#f0f0f0")
         frame_botoes.pack(pady=10)
@@ -544,3 +680,5 @@ if __name__ == "__main__":
     root = tk.Tk()
     app = BancoGUI(root)
     root.mainloop()
+    # Conclui as gravações ainda na fila antes de encerrar
+    app.trabalhador.fechar()
@@ -3,6 +3,7 @@
 """Teste para verificar carregamento de dados na GUI."""
 
 from utils import carregar_dados
+from dinheiro import formatar_centavos
 
 print('Testando carregamento de dados...')
 usuarios_test, contas_test, proximo_test = carregar_dados()
@@ -19,6 +20,6 @@ if usuarios_test:
 if contas_test:
     print('\nContas:')
     for c in contas_test:
-        print(f'  - Conta {c["numero_conta"]}: {c["usuario"]["nome"]} - Saldo: R$ {c["saldo"]:.2f}')
+        print(f'  - Conta {c["numero_conta"]}: {c["usuario"]["nome"]} - Saldo: R$ {formatar_centavos(c["saldo_centavos"])}')
 else:
     print('\n❌ Nenhuma conta carregada!')
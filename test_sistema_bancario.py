@@ -1,5 +1,28 @@
+import gzip
+import json
+import os
+import threading
+import time
+import tracemalloc
 import pytest
 from datetime import datetime
+import utils
+import models
+import persistencia
+from repositorio import Repositorio
+from dinheiro import para_centavos, formatar_centavos
+from entidades import Conta, ResumoConta, Transacao, Usuario
+from escritor_log import EscritorLogAssincrono, RotacaoLog
+from concorrencia import MotorConcorrente
+from servidor import ServidorBancario
+from trabalhador import TrabalhadorSegundoPlano
+from limites import ControleLimites, saques_do_dia
+from mascaramento import MotorMascaramento, RegraMascara
+from metricas import ColetorMetricas, HistogramaLatencia
+import perfil
+import sistema_bancario
+import benchmark
+import auditoria
 from utils import (
     validar_cpf, 
     validar_data, 
@@ -7,9 +30,28 @@ from utils import (
     LIMITE_SAQUE,
     LIMITE_SAQUES_DIARIOS,
     AGENCIA_PADRAO,
+    salvar_dados,
+    carregar_dados,
 )
 
 
+@pytest.fixture
+def arquivos_temporarios(tmp_path, monkeypatch):
+    """Redireciona os arquivos de dados e log para um diretório temporário."""
+    monkeypatch.setattr(utils, "ARQUIVO_DADOS", tmp_path / "dados_bancarios.json")
+    monkeypatch.setattr(utils, "ARQUIVO_JOURNAL", tmp_path / "dados_bancarios.journal")
+    monkeypatch.setattr(utils, "ARQUIVO_SQLITE", tmp_path / "dados_bancarios.db")
+    monkeypatch.setattr(utils, "ARQUIVO_LOG", tmp_path / "log.txt")
+    monkeypatch.setattr(utils, "ARQUIVO_LIMITES", tmp_path / "limites_contas.json")
+    monkeypatch.setattr(utils, "DIRETORIO_AUDITORIA", tmp_path / "auditoria")
+    monkeypatch.setattr(utils.controle_limites, "_limites", None)
+    monkeypatch.setattr(utils, "_backend", None)
+    yield tmp_path
+    utils.descarregar_log()
+    if utils._backend is not None:
+        utils._backend.fechar()
+
+
 class TestValidacoes:
     """Testes para validações de CPF e data."""
     
@@ -143,3 +185,1496 @@ class TestTransferencia:
         valor = 200.0
         
         assert valor > conta_origem["saldo"]
+
+
+class TestJournal:
+    """Testes para o modo de persistência com journal append-only."""
+    
+    def _criar_base(self):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios = [usuario]
+        contas = []
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        return usuarios, contas
+    
+    def test_operacoes_anexam_ao_journal(self, arquivos_temporarios, monkeypatch):
+        utils.configurar_persistencia("journal")
+        usuarios, contas = self._criar_base()
+        models.depositar_obj(contas[0], 100.0, usuarios, contas)
+        models.sacar_obj(contas[0], 30.0, usuarios, contas)
+        
+        assert not utils.ARQUIVO_DADOS.exists()
+        linhas = utils.ARQUIVO_JOURNAL.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(linha)["op"] for linha in linhas] == ["geracao", "conta", "movimento", "movimento"]
+    
+    def test_carregar_reaplica_snapshot_e_journal(self, arquivos_temporarios, monkeypatch):
+        utils.configurar_persistencia("journal")
+        usuarios, contas = self._criar_base()
+        salvar_dados(usuarios, contas, 2)  # snapshot completo
+        models.depositar_obj(contas[0], 100.0, usuarios, contas)
+        models.sacar_obj(contas[0], 30.0, usuarios, contas)
+        utils.obter_backend().fechar()
+        
+        usuarios_lidos, contas_lidas, proximo = carregar_dados()
+        assert len(usuarios_lidos) == 1
+        assert proximo == 2
+        assert contas_lidas[0]["saldo_centavos"] == 7000
+        assert contas_lidas[0]["saques_realizados"] == 1
+        assert contas_lidas[0]["transacoes"] == contas[0]["transacoes"]
+    
+    def test_compactacao_gera_snapshot(self, arquivos_temporarios, monkeypatch):
+        monkeypatch.setattr(utils, "JOURNAL_LIMITE_COMPACTACAO", 4)  # cabeçalho + 3 operações
+        utils.configurar_persistencia("journal")
+        usuarios, contas = self._criar_base()
+        models.depositar_obj(contas[0], 10.0, usuarios, contas)
+        models.depositar_obj(contas[0], 10.0, usuarios, contas)
+        
+        assert utils.ARQUIVO_DADOS.exists()
+        assert not utils.ARQUIVO_JOURNAL.exists()
+        assert carregar_dados()[1][0]["saldo_centavos"] == 2000
+    
+    def test_linha_truncada_no_fim_e_ignorada(self, arquivos_temporarios, monkeypatch):
+        utils.configurar_persistencia("journal")
+        usuarios, contas = self._criar_base()
+        models.depositar_obj(contas[0], 10.0, usuarios, contas)
+        utils.obter_backend().fechar()
+        with open(utils.ARQUIVO_JOURNAL, "a", encoding="utf-8") as f:
+            f.write('{"op":"movimento","numero_')
+        
+        assert carregar_dados()[1][0]["saldo_centavos"] == 1000
+    
+    def test_anexar_apos_linha_truncada_preserva_novos_registros(self, arquivos_temporarios):
+        utils.configurar_persistencia("journal")
+        usuarios, contas = self._criar_base()
+        models.depositar_obj(contas[0], 10.0, usuarios, contas)
+        utils.obter_backend().fechar()
+        with open(utils.ARQUIVO_JOURNAL, "a", encoding="utf-8") as f:
+            f.write('{"op":"movimento","descricao":"Depósito em espécie')
+        with open(utils.ARQUIVO_JOURNAL, "rb+") as f:
+            f.truncate(f.seek(0, os.SEEK_END) - 1)  # corta o "é" ao meio
+        
+        utils.configurar_persistencia("journal")
+        usuarios, contas, _ = carregar_dados()
+        assert contas[0]["saldo_centavos"] == 1000
+        models.depositar_obj(contas[0], 5.0, usuarios, contas)
+        models.depositar_obj(contas[0], 7.0, usuarios, contas)
+        utils.obter_backend().fechar()
+        
+        utils.configurar_persistencia("journal")
+        _, contas_lidas, _ = carregar_dados()
+        assert contas_lidas[0]["saldo_centavos"] == 2200
+        assert len(contas_lidas[0]["transacoes"]) == 3
+    
+    def test_ultimo_registro_completo_sem_quebra_de_linha_e_mantido(self, arquivos_temporarios):
+        utils.configurar_persistencia("journal")
+        usuarios, contas = self._criar_base()
+        models.depositar_obj(contas[0], 10.0, usuarios, contas)
+        utils.obter_backend().fechar()
+        with open(utils.ARQUIVO_JOURNAL, "rb+") as f:
+            f.truncate(f.seek(0, os.SEEK_END) - 1)  # sem o "\n" final
+        
+        utils.configurar_persistencia("journal")
+        usuarios, contas, _ = carregar_dados()
+        models.depositar_obj(contas[0], 5.0, usuarios, contas)
+        utils.obter_backend().fechar()
+        
+        utils.configurar_persistencia("journal")
+        assert carregar_dados()[1][0]["saldo_centavos"] == 1500
+
+
+class TestBackendSQLite:
+    """Testes para o backend SQLite."""
+    
+    def test_operacoes_incrementais_e_recarga(self, arquivos_temporarios):
+        utils.configurar_persistencia("sqlite")
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios = [usuario]
+        contas = []
+        salvar_dados(usuarios, contas, 1, alteracoes=[{"op": "usuario", "dados": usuario}])
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        models.criar_conta(AGENCIA_PADRAO, 2, usuario, contas, usuarios)
+        models.depositar_obj(contas[0], 100.0, usuarios, contas)
+        models.transferir_obj(1, 2, 40.0, usuarios, contas)
+        
+        utils.configurar_persistencia("sqlite")
+        usuarios_lidos, contas_lidas, proximo = carregar_dados()
+        assert proximo == 3
+        assert [c["saldo_centavos"] for c in contas_lidas] == [6000, 4000]
+        assert [c["transacoes"] for c in contas_lidas] == [c["transacoes"] for c in contas]
+        assert contas_lidas[1]["transacoes"][0]["contraparte"] == {"agencia": AGENCIA_PADRAO, "numero_conta": 1}
+        assert contas_lidas[0]["usuario"] is usuarios_lidos[0]
+    
+    def test_salvar_completo_migra_extrato_legado(self, arquivos_temporarios):
+        utils.configurar_persistencia("sqlite")
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        conta = {"agencia": AGENCIA_PADRAO, "numero_conta": 7, "usuario": usuario, "saldo": 5.0,
+                 "extrato": "[01/01/2025 10:00:00] Depósito: R$ 5.00\n", "saques_realizados": 0}
+        salvar_dados([usuario], [conta], 8)
+        salvar_dados([usuario], [conta], 8)
+        
+        _, contas_lidas, proximo = carregar_dados()
+        assert proximo == 8
+        assert len(contas_lidas) == 1
+        assert "extrato" not in contas_lidas[0]
+        assert contas_lidas[0]["transacoes"][0]["valor_centavos"] == 500
+        assert contas_lidas[0]["saldo_centavos"] == 500
+    
+    def test_modo_desconhecido(self, arquivos_temporarios):
+        with pytest.raises(ValueError):
+            utils.configurar_persistencia("xml")
+
+
+class TestExtratoEstruturado:
+    """Testes para o extrato estruturado e a migração do formato em texto."""
+    
+    def test_migracao_do_extrato_em_texto(self, arquivos_temporarios):
+        conta = {
+            "agencia": AGENCIA_PADRAO,
+            "numero_conta": 1,
+            "usuario": {"nome": "Ana", "cpf": "11144477735"},
+            "saldo": 60.0,
+            "extrato": (
+                "[01/02/2025 10:00:00] Depósito: R$ 1.000,50\n"
+                "[01/02/2025 11:00:00] Transferência enviada: R$ 40.00 para Agência 0001 Conta 2\n"
+            ),
+            "saques_realizados": 0,
+        }
+        utils.ARQUIVO_DADOS.write_text(json.dumps({"usuarios": [], "contas": [conta]}), encoding="utf-8")
+        
+        transacoes = carregar_dados()[1][0]["transacoes"]
+        assert transacoes[0] == {
+            "timestamp": "01/02/2025 10:00:00", "tipo": "Depósito", "valor_centavos": 100050,
+            "contraparte": None, "descricao": "",
+        }
+        assert transacoes[1]["contraparte"] == {"agencia": "0001", "numero_conta": 2}
+        assert transacoes[1]["descricao"] == "para Agência 0001 Conta 2"
+    
+    def test_gerar_transacoes_filtra_por_tipo(self, arquivos_temporarios):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        models.depositar_obj(contas[0], 100.0, usuarios, contas)
+        models.sacar_obj(contas[0], 30.0, usuarios, contas)
+        
+        saques = list(models.gerar_transacoes(contas[0], "saque"))
+        assert [tx["tipo"] for tx in saques] == ["Saque"]
+        assert models.formatar_transacao(saques[0]).endswith("Saque: R$ 30.00")
+
+
+class TestRepositorio:
+    """Testes para os índices do repositório."""
+    
+    def _conta(self, numero, usuario):
+        return {"agencia": AGENCIA_PADRAO, "numero_conta": numero, "usuario": usuario, "saldo_centavos": 0, "transacoes": []}
+    
+    def test_buscas_por_cpf_e_numero(self):
+        ana = {"nome": "Ana", "cpf": "11144477735"}
+        bia = {"nome": "Bia", "cpf": "52998224725"}
+        repo = Repositorio([ana, bia], [self._conta(1, ana), self._conta(2, bia), self._conta(3, ana)])
+        
+        assert repo.buscar_usuario("52998224725") is bia
+        assert repo.buscar_usuario("00000000000") is None
+        assert repo.buscar_conta(2)["usuario"] is bia
+        assert repo.buscar_conta(99) is None
+        assert [c["numero_conta"] for c in repo.contas_do_cpf("11144477735")] == [1, 3]
+    
+    def test_indices_acompanham_listas_compartilhadas(self):
+        ana = {"nome": "Ana", "cpf": "11144477735"}
+        usuarios, contas = [], []
+        repo = Repositorio(usuarios, contas)
+        usuarios.append(ana)
+        contas.append(self._conta(1, ana))  # inserção direta, como em models.criar_conta
+        
+        assert repo.buscar_usuario("11144477735") is ana
+        assert repo.buscar_conta(1) is contas[0]
+        assert len(repo.contas_do_cpf("11144477735")) == 1
+    
+    def test_transferir_com_repositorio(self, arquivos_temporarios):
+        ana = {"nome": "Ana", "cpf": "11144477735"}
+        usuarios = [ana]
+        contas = [self._conta(1, ana), self._conta(2, ana)]
+        contas[0]["saldo_centavos"] = 10000
+        repo = Repositorio(usuarios, contas)
+        
+        models.transferir_obj(1, 2, 25.0, usuarios, contas, repositorio=repo)
+        assert (contas[0]["saldo_centavos"], contas[1]["saldo_centavos"]) == (7500, 2500)
+        with pytest.raises(ValueError, match="destino"):
+            models.transferir_obj(1, 99, 25.0, usuarios, contas, repositorio=repo)
+
+
+class TestDinheiro:
+    """Testes para a representação em centavos inteiros."""
+    
+    def test_para_centavos(self):
+        assert para_centavos(10) == 1000
+        assert para_centavos(0.285) == 29
+        assert para_centavos("12,34") == 1234
+        assert para_centavos(0.1 + 0.2) == 30
+    
+    def test_para_centavos_invalido(self):
+        with pytest.raises(ValueError):
+            para_centavos(float("nan"))
+        with pytest.raises(ValueError):
+            para_centavos("abc")
+    
+    def test_formatar_centavos(self):
+        assert formatar_centavos(123456) == "1234.56"
+        assert formatar_centavos(5) == "0.05"
+        assert formatar_centavos(-150) == "-1.50"
+    
+    def test_operacoes_sem_deriva(self, arquivos_temporarios):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        for _ in range(10):
+            models.depositar_obj(contas[0], 0.1, usuarios, contas)
+        
+        assert contas[0]["saldo_centavos"] == 100
+        models.depositar_obj(contas[0], 1000, usuarios, contas)
+        with pytest.raises(ValueError, match="Limite de saque"):
+            models.sacar_obj(contas[0], 500.01, usuarios, contas)
+    
+    def test_carregar_converte_saldo_em_reais(self, arquivos_temporarios):
+        conta = {"agencia": AGENCIA_PADRAO, "numero_conta": 1, "usuario": {"nome": "Ana", "cpf": "11144477735"},
+                 "saldo": 19.99, "transacoes": [{"timestamp": None, "tipo": "Depósito", "valor": 19.99,
+                                                 "contraparte": None, "descricao": ""}]}
+        utils.ARQUIVO_DADOS.write_text(json.dumps({"usuarios": [], "contas": [conta]}), encoding="utf-8")
+        
+        conta_lida = carregar_dados()[1][0]
+        assert conta_lida["saldo_centavos"] == 1999
+        assert "saldo" not in conta_lida
+        assert conta_lida["transacoes"][0]["valor_centavos"] == 1999
+
+
+class TestLogAssincrono:
+    """Testes para o escritor de log em segundo plano."""
+    
+    def test_decorador_grava_pela_fila(self, arquivos_temporarios):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        models.depositar_obj(contas[0], 10.0, usuarios, contas)
+        with pytest.raises(ValueError):
+            models.sacar_obj(contas[0], 50.0, usuarios, contas)
+        utils.registrar_consulta_extrato(1, "Ana")
+        utils.descarregar_log()
+        
+        linhas = utils.ARQUIVO_LOG.read_text(encoding="utf-8").splitlines()
+        assert len(linhas) == 4
+        assert "criar_conta" in linhas[0]
+        assert "ERRO" in linhas[2]
+        assert "consulta_extrato" in linhas[3]
+    
+    def test_grava_em_lotes_e_preserva_ordem(self, tmp_path):
+        arquivo = tmp_path / "log.txt"
+        escritor = EscritorLogAssincrono(lambda: arquivo, tamanho_lote=7, intervalo=0.01)
+        for i in range(100):
+            escritor.enviar(f"linha {i}")
+        escritor.fechar()
+        
+        assert arquivo.read_text(encoding="utf-8").splitlines() == [f"linha {i}" for i in range(100)]
+    
+    def test_politica_descartar_com_fila_cheia(self, tmp_path):
+        liberar = threading.Event()
+        arquivo = tmp_path / "log.txt"
+        
+        def obter_arquivo():
+            liberar.wait()
+            return arquivo
+        
+        escritor = EscritorLogAssincrono(obter_arquivo, tamanho_fila=2, tamanho_lote=1,
+                                         intervalo=0, politica="descartar")
+        for i in range(10):
+            escritor.enviar(f"linha {i}")
+        liberar.set()
+        escritor.fechar()
+        
+        gravadas = arquivo.read_text(encoding="utf-8").splitlines()
+        assert escritor.descartadas > 0
+        assert len(gravadas) + escritor.descartadas == 10
+
+
+class TestLote:
+    """Testes para o processamento de operações em lote."""
+    
+    def _base(self):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        models.criar_conta(AGENCIA_PADRAO, 2, usuario, contas, usuarios)
+        return usuarios, contas
+    
+    def test_resultados_por_operacao(self, arquivos_temporarios):
+        usuarios, contas = self._base()
+        operacoes = [
+            {"tipo": "deposito", "conta": 1, "valor": 1000},
+            {"tipo": "Saque", "conta": 1, "valor": 600},              # acima do limite por saque
+            {"tipo": "transferência", "conta": 1, "destino": 2, "valor": "50.25"},
+            {"tipo": "transferencia", "conta": 1, "destino": 9, "valor": 1},
+            {"tipo": "pix", "conta": 1, "valor": 1},
+            {"tipo": "saque", "conta": 2, "valor": 0},
+        ]
+        resultados = models.processar_lote(operacoes, usuarios, contas)
+        
+        assert [r["sucesso"] for r in resultados] == [True, False, True, False, False, False]
+        assert "Limite de saque" in resultados[1]["mensagem"]
+        assert "destino" in resultados[3]["mensagem"]
+        assert (contas[0]["saldo_centavos"], contas[1]["saldo_centavos"]) == (94975, 5025)
+    
+    def test_item_que_nao_e_dict_vira_falha(self, arquivos_temporarios):
+        usuarios, contas = self._base()
+        operacoes = [
+            {"tipo": "deposito", "conta": 1, "valor": 100},
+            ["deposito", 1, 100],
+            None,
+            {"tipo": "deposito", "conta": 2, "valor": 50},
+        ]
+        resultados = models.processar_lote(operacoes, usuarios, contas)
+        
+        assert [r["sucesso"] for r in resultados] == [True, False, False, True]
+        assert [r["indice"] for r in resultados] == [0, 1, 2, 3]
+        assert "Operação inválida" in resultados[1]["mensagem"]
+        assert (contas[0]["saldo_centavos"], contas[1]["saldo_centavos"]) == (10000, 5000)
+    
+    def test_lote_salva_uma_unica_vez(self, arquivos_temporarios, monkeypatch):
+        usuarios, contas = self._base()
+        chamadas = []
+        monkeypatch.setattr(models, "salvar_dados", lambda *a, **kw: chamadas.append(kw["alteracoes"]))
+        operacoes = [{"tipo": "deposito", "conta": 1, "valor": 10}] * 5
+        
+        models.processar_lote(operacoes, usuarios, contas)
+        assert len(chamadas) == 1
+        assert len(chamadas[0]) == 5
+    
+    def test_cli_ingere_csv(self, arquivos_temporarios, capsys):
+        usuarios, contas = self._base()
+        salvar_dados(usuarios, contas, 3)
+        arquivo = arquivos_temporarios / "lote.csv"
+        arquivo.write_text("tipo,conta,valor,destino\ndeposito,1,100.00,\ntransferencia,1,40,2\nsaque,2,1000,\n",
+                           encoding="utf-8")
+        
+        sistema_bancario.main(["--lote", str(arquivo)])
+        assert "2 operações aplicadas, 1 com falha" in capsys.readouterr().out
+        assert [c["saldo_centavos"] for c in carregar_dados()[1]] == [6000, 4000]
+    
+    def test_ler_operacoes_jsonl(self, tmp_path):
+        arquivo = tmp_path / "lote.jsonl"
+        arquivo.write_text('{"tipo": "deposito", "conta": 1, "valor": 5}\n\n{"tipo": "saque", "conta": 1, "valor": 2}\n',
+                           encoding="utf-8")
+        assert [op["tipo"] for op in utils.ler_operacoes_lote(arquivo)] == ["deposito", "saque"]
+
+
+class TestSalvamentoAtomico:
+    """Testes para gravação atômica, backup e recuperação."""
+    
+    def test_backup_da_geracao_anterior(self, arquivos_temporarios):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        salvar_dados([usuario], [], 1)
+        salvar_dados([usuario], [], 2)
+        
+        backup = json.loads(persistencia.caminho_backup(utils.ARQUIVO_DADOS).read_text(encoding="utf-8"))
+        assert backup["proximo_numero_conta"] == 1
+        assert json.loads(utils.ARQUIVO_DADOS.read_text(encoding="utf-8"))["proximo_numero_conta"] == 2
+        assert not list(arquivos_temporarios.glob("*.tmp"))
+    
+    def test_arquivo_corrompido_carrega_backup(self, arquivos_temporarios, capsys):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        salvar_dados([usuario], [], 1)
+        salvar_dados([usuario], [], 2)
+        utils.ARQUIVO_DADOS.write_text('{"usuarios": [{"nome": "An', encoding="utf-8")
+        
+        usuarios, _, proximo = carregar_dados()
+        assert [u["nome"] for u in usuarios] == ["Ana"]
+        assert proximo == 1
+        assert "backup" in capsys.readouterr().out
+    
+    def test_journal_de_snapshot_anterior_e_descartado(self, arquivos_temporarios):
+        utils.configurar_persistencia("journal")
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        models.depositar_obj(contas[0], 10.0, usuarios, contas)
+        utils.obter_backend().fechar()
+        journal_antigo = utils.ARQUIVO_JOURNAL.read_bytes()
+        salvar_dados(usuarios, contas, 2)  # compactação: novo snapshot e journal removido
+        utils.ARQUIVO_JOURNAL.write_bytes(journal_antigo)  # simula queda antes da remoção
+        
+        utils.configurar_persistencia("journal")
+        conta = carregar_dados()[1][0]
+        assert conta["saldo_centavos"] == 1000
+        assert len(conta["transacoes"]) == 1
+
+
+class TestTitularesNormalizados:
+    """Testes para contas que referenciam o titular pelo CPF."""
+    
+    def _base(self):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        for numero in (1, 2, 3):
+            models.criar_conta(AGENCIA_PADRAO, numero, usuario, contas, usuarios)
+        return usuarios, contas
+    
+    def test_arquivo_guarda_apenas_cpf_do_titular(self, arquivos_temporarios):
+        usuarios, contas = self._base()
+        
+        dados = json.loads(utils.ARQUIVO_DADOS.read_text(encoding="utf-8"))
+        assert [c["cpf_titular"] for c in dados["contas"]] == ["11144477735"] * 3
+        assert all("usuario" not in c for c in dados["contas"])
+        assert "usuario" in contas[0]  # a forma em memória não é alterada
+    
+    def test_carregar_compartilha_objeto_do_usuario(self, arquivos_temporarios):
+        self._base()
+        
+        usuarios, contas, _ = carregar_dados()
+        assert all(conta["usuario"] is usuarios[0] for conta in contas)
+    
+    def test_migracao_de_usuario_embutido(self, arquivos_temporarios):
+        ana = {"nome": "Ana", "cpf": "11144477735"}
+        bia = {"nome": "Bia", "cpf": "52998224725"}
+        contas = [
+            {"agencia": AGENCIA_PADRAO, "numero_conta": 1, "usuario": dict(ana), "saldo": 0, "extrato": ""},
+            {"agencia": AGENCIA_PADRAO, "numero_conta": 2, "usuario": dict(ana), "saldo": 0, "extrato": ""},
+            {"agencia": AGENCIA_PADRAO, "numero_conta": 3, "usuario": dict(bia), "saldo": 0, "extrato": ""},
+        ]
+        utils.ARQUIVO_DADOS.write_text(json.dumps({"usuarios": [ana], "contas": contas}), encoding="utf-8")
+        
+        usuarios, contas_lidas, _ = carregar_dados()
+        assert [u["nome"] for u in usuarios] == ["Ana", "Bia"]
+        assert contas_lidas[0]["usuario"] is contas_lidas[1]["usuario"] is usuarios[0]
+        assert contas_lidas[2]["usuario"] is usuarios[1]
+    
+    def test_journal_religa_titular(self, arquivos_temporarios):
+        utils.configurar_persistencia("journal")
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        salvar_dados(usuarios, contas, 1, alteracoes=[{"op": "usuario", "dados": usuario}])
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        utils.obter_backend().fechar()
+        
+        assert '"cpf_titular":"11144477735"' in utils.ARQUIVO_JOURNAL.read_text(encoding="utf-8")
+        usuarios_lidos, contas_lidas, _ = carregar_dados()
+        assert contas_lidas[0]["usuario"] is usuarios_lidos[0]
+
+
+class TestEntidades:
+    """Testes para as entidades compactas com __slots__."""
+    
+    def test_acesso_estilo_dict(self):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        conta = Conta(agencia=AGENCIA_PADRAO, numero_conta=1, usuario=usuario)
+        
+        assert not hasattr(conta, "__dict__")
+        assert conta["usuario"]["nome"] == "Ana"
+        assert conta.get("saldo_centavos") == 0 and conta.get("inexistente", 7) == 7
+        assert "transacoes" in conta and "extrato" not in conta
+        conta["saldo_centavos"] += 100
+        assert conta.saldo_centavos == 100
+        with pytest.raises(KeyError):
+            conta["extrato"] = ""
+        with pytest.raises(KeyError):
+            conta["extrato"]
+    
+    def test_comparacao_e_conversao_com_dict(self):
+        transacao = models.nova_transacao("Depósito", 5000)
+        dados = transacao.para_dict()
+        
+        assert transacao == dados
+        assert Transacao.de_dict(dados) == transacao
+        assert json.loads(json.dumps(dados)) == transacao
+    
+    @pytest.mark.parametrize("modo", ["json", "journal", "sqlite"])
+    def test_carregar_devolve_entidades(self, arquivos_temporarios, modo):
+        utils.configurar_persistencia(modo)
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        salvar_dados(usuarios, contas, 1, alteracoes=[{"op": "usuario", "dados": usuario}])
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        models.depositar_obj(contas[0], 50, usuarios, contas)
+        utils.obter_backend().fechar()
+        
+        usuarios_lidos, contas_lidas, _ = carregar_dados()
+        assert isinstance(usuarios_lidos[0], Usuario)
+        assert isinstance(contas_lidas[0], Conta)
+        assert isinstance(contas_lidas[0]["transacoes"][0], Transacao)
+        assert contas_lidas[0]["usuario"] is usuarios_lidos[0]
+        assert contas_lidas[0]["saldo_centavos"] == 5000
+    
+    def test_iterador_devolve_resumo(self):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        resumo = next(iter(models.ContaIterador([Conta(agencia=AGENCIA_PADRAO, numero_conta=1, usuario=usuario)])))
+        
+        assert isinstance(resumo, ResumoConta)
+        assert resumo["titular"] == "Ana" and resumo["cpf"] == "11144477735"
+
+
+class TestCarregamentoPreguicoso:
+    """Testes para o snapshot em linhas e o carregamento preguiçoso das transações."""
+    
+    def _base(self):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        for numero in (1, 2, 3):
+            models.criar_conta(AGENCIA_PADRAO, numero, usuario, contas, usuarios)
+        for conta in contas[:2]:
+            models.depositar_obj(conta, 100, usuarios, contas)
+            models.sacar_obj(conta, 30, usuarios, contas)
+        return usuarios, contas
+    
+    def test_snapshot_continua_json_valido(self, arquivos_temporarios):
+        _, contas = self._base()
+        
+        dados = json.loads(utils.ARQUIVO_DADOS.read_text(encoding="utf-8"))
+        assert dados["formato"] == persistencia.FORMATO_LINHAS
+        assert dados["contas"][0]["transacoes"] == contas[0]["transacoes"]
+    
+    def test_transacoes_lidas_no_primeiro_acesso(self, arquivos_temporarios):
+        _, contas = self._base()
+        
+        utils.configurar_persistencia("json", preguicoso=True)
+        _, contas_lidas, proximo = carregar_dados()
+        assert proximo == 4
+        assert isinstance(contas_lidas[0].fonte_transacoes, persistencia.TrechoTransacoes)
+        assert contas_lidas[2].fonte_transacoes is None  # conta sem transações
+        assert contas_lidas[0]["saldo_centavos"] == 7000
+        assert [tx["tipo"] for tx in models.gerar_transacoes(contas_lidas[0])] == ["Depósito", "Saque"]
+        assert contas_lidas[0].fonte_transacoes is None
+        assert contas_lidas[1]["transacoes"] == contas[1]["transacoes"]
+    
+    def test_salvar_preserva_transacoes_nao_lidas(self, arquivos_temporarios):
+        _, contas = self._base()
+        
+        utils.configurar_persistencia("json", preguicoso=True)
+        usuarios_lidos, contas_lidas, _ = carregar_dados()
+        models.depositar_obj(contas_lidas[0], 5, usuarios_lidos, contas_lidas)
+        assert contas_lidas[1].fonte_transacoes is not None  # copiada sem ser interpretada
+        models.depositar_obj(contas_lidas[2], 1, usuarios_lidos, contas_lidas)
+        
+        assert contas_lidas[1]["transacoes"] == contas[1]["transacoes"]
+        utils.configurar_persistencia("json", preguicoso=False)
+        _, contas_finais, _ = carregar_dados()
+        assert [len(c["transacoes"]) for c in contas_finais] == [3, 2, 1]
+    
+    def test_salvar_abre_o_snapshot_uma_vez(self, arquivos_temporarios, monkeypatch):
+        self._base()
+        utils.configurar_persistencia("json", preguicoso=True)
+        usuarios_lidos, contas_lidas, _ = carregar_dados()
+        aberturas = []
+        abrir_snapshot = persistencia._abrir_snapshot
+        monkeypatch.setattr(persistencia, "_abrir_snapshot",
+                            lambda arquivo: aberturas.append(arquivo) or abrir_snapshot(arquivo))
+    
+        salvar_dados(usuarios_lidos, contas_lidas, 4)
+        salvar_dados(usuarios_lidos, contas_lidas, 4)
+        assert aberturas == [utils.ARQUIVO_DADOS] * 2  # uma por gravação, com duas contas adiadas
+        assert contas_lidas[0].fonte_transacoes is not None
+        utils.configurar_persistencia("json", preguicoso=False)
+        _, contas_finais, _ = carregar_dados()
+        assert [len(c["transacoes"]) for c in contas_finais] == [2, 2, 0]
+    
+    def test_journal_reaplica_sobre_snapshot_preguicoso(self, arquivos_temporarios):
+        utils.configurar_persistencia("journal")
+        usuarios, contas = self._base()
+        salvar_dados(usuarios, contas, 4)  # compacta: snapshot + journal vazio
+        models.depositar_obj(contas[0], 10, usuarios, contas)
+        utils.obter_backend().fechar()
+        
+        utils.configurar_persistencia("journal", preguicoso=True)
+        _, contas_lidas, _ = carregar_dados()
+        assert contas_lidas[1].fonte_transacoes is not None
+        assert contas_lidas[0]["saldo_centavos"] == 8000
+        assert [tx["tipo"] for tx in contas_lidas[0]["transacoes"]] == ["Depósito", "Saque", "Depósito"]
+    
+    def test_arquivo_antigo_carregado_por_completo(self, arquivos_temporarios):
+        conta = {"agencia": AGENCIA_PADRAO, "numero_conta": 1, "usuario": {"nome": "Ana", "cpf": "11144477735"},
+                 "saldo": 10.5, "extrato": "[01/01/2025 10:00:00] Depósito: R$ 10.50"}
+        utils.ARQUIVO_DADOS.write_text(json.dumps({"usuarios": [], "contas": [conta]}, indent=2), encoding="utf-8")
+        
+        utils.configurar_persistencia("json", preguicoso=True)
+        _, contas, _ = carregar_dados()
+        assert contas[0].fonte_transacoes is None
+        assert contas[0]["transacoes"][0]["valor_centavos"] == 1050
+
+
+class TestMotorConcorrente:
+    """Testes para o motor de transações com travas por conta."""
+    
+    def _base(self, n_contas=10, saldo=1000):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        for numero in range(1, n_contas + 1):
+            models.criar_conta(AGENCIA_PADRAO, numero, usuario, contas, usuarios)
+            models.depositar_obj(contas[-1], saldo, usuarios, contas)
+        return usuarios, contas
+    
+    @pytest.mark.parametrize("modo", ["json", "journal", "sqlite"])
+    def test_transferencias_concorrentes_conservam_dinheiro(self, arquivos_temporarios, modo):
+        import random
+        utils.configurar_persistencia(modo)
+        usuarios, contas = self._base()
+        total_inicial = sum(c["saldo_centavos"] for c in contas)
+        motor = MotorConcorrente(usuarios, contas)
+        
+        def trabalhador(semente):
+            rng = random.Random(semente)
+            for _ in range(200):
+                origem, destino = rng.sample(range(1, 11), 2)
+                try:
+                    motor.transferir(origem, destino, rng.randint(1, 300))
+                except ValueError:
+                    pass  # saldo insuficiente
+        
+        threads = [threading.Thread(target=trabalhador, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        motor.fechar()
+        
+        assert sum(c["saldo_centavos"] for c in contas) == total_inicial
+        for conta in contas:
+            entradas = sum(tx["valor_centavos"] for tx in conta["transacoes"] if tx["tipo"] != "Transferência enviada")
+            saidas = sum(tx["valor_centavos"] for tx in conta["transacoes"] if tx["tipo"] == "Transferência enviada")
+            assert conta["saldo_centavos"] == entradas - saidas >= 0
+        utils.configurar_persistencia(modo)
+        _, contas_lidas, _ = carregar_dados()
+        assert [c["saldo_centavos"] for c in contas_lidas] == [c["saldo_centavos"] for c in contas]
+        assert [len(c["transacoes"]) for c in contas_lidas] == [len(c["transacoes"]) for c in contas]
+        assert motor.falhas_gravacao == 0
+    
+    @pytest.mark.parametrize("modo", ["journal", "sqlite"])
+    def test_depositos_concorrentes_na_mesma_conta_persistem_saldo_final(self, arquivos_temporarios, modo):
+        utils.configurar_persistencia(modo)
+        usuarios, contas = self._base(n_contas=1, saldo=0.01)
+        motor = MotorConcorrente(usuarios, contas)
+        
+        def depositar():
+            for _ in range(200):
+                motor.depositar(1, 1)
+        
+        threads = [threading.Thread(target=depositar) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        motor.fechar()
+        
+        utils.configurar_persistencia(modo)
+        _, contas_lidas, _ = carregar_dados()
+        assert contas[0]["saldo_centavos"] == 1 + 800 * 100
+        assert contas_lidas[0]["saldo_centavos"] == contas[0]["saldo_centavos"]
+    
+    @pytest.mark.parametrize("modo", ["journal", "sqlite"])
+    def test_conta_criada_e_movimentada_antes_da_gravacao(self, arquivos_temporarios, modo):
+        utils.configurar_persistencia(modo)
+        liberar = threading.Event()
+    
+        def salvar(*args, **kwargs):
+            # Segura a escritora até a conta já ter sido movimentada
+            liberar.wait(timeout=5)
+            return salvar_dados(*args, **kwargs)
+    
+        motor = MotorConcorrente([], [], salvar=salvar)
+        motor.criar_usuario("Ana", "11144477735", "01-01-1990", "Rua A")
+        numero = motor.criar_conta("11144477735")
+        motor.depositar(numero, 200)
+        liberar.set()
+        motor.fechar()
+    
+        utils.configurar_persistencia(modo)
+        _, contas_lidas, _ = carregar_dados()
+        conta, = contas_lidas
+        assert len(conta["transacoes"]) == 1
+        assert conta["saldo_centavos"] == 20000
+        assert [resumo["deposito"] for resumo in conta.resumos.values()] == [[1, 20000], [1, 20000]]
+        assert motor.falhas_gravacao == 0
+    
+    def test_transferencias_cruzadas_sem_deadlock(self, arquivos_temporarios):
+        usuarios, contas = self._base(n_contas=2)
+        motor = MotorConcorrente(usuarios, contas)
+        
+        def ida():
+            for _ in range(300):
+                motor.transferir(1, 2, 1)
+        
+        def volta():
+            for _ in range(300):
+                motor.transferir(2, 1, 1)
+        
+        threads = [threading.Thread(target=ida), threading.Thread(target=volta)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=30)
+        assert not any(t.is_alive() for t in threads)
+        motor.fechar()
+        assert [c["saldo_centavos"] for c in contas] == [100000, 100000]
+    
+    def test_limite_de_saques_respeitado_entre_threads(self, arquivos_temporarios):
+        usuarios, contas = self._base(n_contas=1)
+        motor = MotorConcorrente(usuarios, contas)
+        resultados = []
+        
+        def sacar():
+            try:
+                motor.sacar(1, 10)
+                resultados.append(True)
+            except ValueError:
+                resultados.append(False)
+        
+        threads = [threading.Thread(target=sacar) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        motor.descarregar()
+        assert resultados.count(True) == LIMITE_SAQUES_DIARIOS
+        assert contas[0]["saldo_centavos"] == 100000 - LIMITE_SAQUES_DIARIOS * 1000
+        motor.fechar()
+    
+    def test_conta_inexistente(self, arquivos_temporarios):
+        usuarios, contas = self._base(n_contas=1)
+        motor = MotorConcorrente(usuarios, contas)
+        with pytest.raises(ValueError, match="Conta não encontrada"):
+            motor.depositar(99, 10)
+        motor.fechar()
+    
+    def test_contas_inexistentes_nao_criam_travas(self, arquivos_temporarios):
+        usuarios, contas = self._base(n_contas=2)
+        motor = MotorConcorrente(usuarios, contas)
+        motor.transferir(1, 2, 1)
+        for numero in range(100, 1100):
+            with pytest.raises(ValueError, match="destino"):
+                motor.transferir(1, numero, 1)
+            with pytest.raises(ValueError, match="origem"):
+                motor.transferir(numero, 2, 1)
+        assert sorted(motor._travas) == [1, 2]
+        motor.fechar()
+
+
+class TestServidor:
+    """Testes para o servidor asyncio com protocolo JSON por linha."""
+    
+    def _servidor(self):
+        usuarios, contas = [], []
+        return ServidorBancario(MotorConcorrente(usuarios, contas))
+    
+    def test_fluxo_completo_por_socket(self, arquivos_temporarios):
+        import asyncio
+        servidor_bancario = self._servidor()
+        
+        async def cenario():
+            servidor = await servidor_bancario.iniciar(porta=0)
+            porta = servidor.sockets[0].getsockname()[1]
+            leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+            requisicoes = [
+                {"id": 1, "op": "criar_usuario", "nome": "Ana", "cpf": "11144477735",
+                 "data_nascimento": "01-01-1990", "endereco": "Rua A"},
+                {"id": 2, "op": "criar_conta", "cpf": "11144477735"},
+                {"id": 3, "op": "criar_conta", "cpf": "11144477735"},
+                {"id": 4, "op": "depositar", "conta": 1, "valor": "100.50"},
+                {"id": 5, "op": "transferir", "conta": 1, "destino": 2, "valor": 30},
+                {"id": 6, "op": "sacar", "conta": 2, "valor": 1000},
+                {"id": 7, "op": "extrato", "conta": 1},
+            ]
+            respostas = []
+            for requisicao in requisicoes:
+                escritor.write(json.dumps(requisicao).encode() + b"\n")
+            await escritor.drain()
+            for _ in requisicoes:
+                respostas.append(json.loads(await leitor.readline()))
+            escritor.close()
+            servidor.close()
+            await servidor.wait_closed()
+            return respostas
+        
+        respostas = asyncio.run(cenario())
+        servidor_bancario.motor.fechar()
+        
+        assert [r["id"] for r in respostas] == list(range(1, 8))
+        assert [r["ok"] for r in respostas] == [True, True, True, True, True, False, True]
+        assert respostas[2]["resultado"] == 2
+        assert respostas[5]["erro"] == "Saldo insuficiente."
+        assert respostas[6]["resultado"]["saldo"] == "70.50"
+        assert [tx["tipo"] for tx in respostas[6]["resultado"]["transacoes"]] == ["Depósito", "Transferência enviada"]
+        usuarios, contas, proximo = carregar_dados()
+        assert proximo == 3
+        assert [c["saldo_centavos"] for c in contas] == [7050, 3000]
+    
+    def test_requisicoes_invalidas(self, arquivos_temporarios):
+        servidor_bancario = self._servidor()
+        
+        assert servidor_bancario.executar({"op": "voar"}) == {"ok": False, "erro": "Operação desconhecida: voar"}
+        assert servidor_bancario.executar({"id": 9, "op": "depositar", "conta": 1}) == {
+            "id": 9, "ok": False, "erro": "Parâmetro ausente: valor"}
+        assert servidor_bancario.executar({"op": "criar_usuario", "nome": "X", "cpf": "123",
+                                           "data_nascimento": "01-01-1990"})["erro"] == "CPF inválido!"
+        assert servidor_bancario.executar({"op": ["depositar"]})["ok"] is False
+        servidor_bancario.motor.fechar()
+    
+    def test_erro_inesperado_vira_resposta_de_erro(self, arquivos_temporarios, monkeypatch, capsys):
+        servidor_bancario = self._servidor()
+        
+        def falhar(*args):
+            raise RuntimeError("disco cheio")
+        
+        monkeypatch.setattr(servidor_bancario.motor, "depositar", falhar)
+        assert servidor_bancario.executar({"id": 3, "op": "depositar", "conta": 1, "valor": 10}) == {
+            "id": 3, "ok": False, "erro": "Erro interno do servidor."}
+        assert "RuntimeError: disco cheio" in capsys.readouterr().out
+        servidor_bancario.motor.fechar()
+
+
+class TestBenchmarkNucleo:
+    """Testes para a suíte de benchmarks dos caminhos quentes."""
+    
+    def test_relatorio_cobre_todos_os_casos(self, arquivos_temporarios):
+        relatorio = benchmark.benchmark_nucleo(n_usuarios=5, n_contas=10, n_transacoes=50, iteracoes=5,
+                                               persistencia="journal")
+        
+        assert set(relatorio["casos"]) >= {"depositar_obj", "sacar_obj", "transferir_obj", "gerar_transacoes",
+                                           "salvar_dados", "carregar_dados", "filtrar_usuario_por_cpf",
+                                           "registrar_log"}
+        for caso in relatorio["casos"].values():
+            assert caso["ops_s"] > 0 and caso["p50_us"] <= caso["p99_us"]
+        json.dumps(relatorio)
+        assert not utils.ARQUIVO_DADOS.exists()  # os dados sintéticos ficam num diretório temporário
+    
+    def test_comparacao_acusa_regressao(self, capsys):
+        base = {"parametros": {"contas": 1, "transacoes": 1, "persistencia": "json"}, "python": "3",
+                "casos": {"a": {"ops_s": 100.0}, "b": {"ops_s": 100.0}}}
+        atual = {"parametros": base["parametros"], "python": "3", "casos": {
+            "a": {"ops_s": 70.0, "p50_us": 1, "p95_us": 1, "p99_us": 1, "pico_kib": 1},
+            "b": {"ops_s": 95.0, "p50_us": 1, "p95_us": 1, "p99_us": 1, "pico_kib": 1},
+        }}
+        
+        assert benchmark.imprimir_relatorio(atual, base, tolerancia=0.2) == ["a"]
+        assert "REGRESSÃO" in capsys.readouterr().out
+
+
+class TestFiltrosExtrato:
+    """Testes para os filtros tipo/limite/desde/ate de gerar_transacoes."""
+    
+    def _conta(self):
+        tipos = ["Depósito", "Saque", "Transferência enviada", "Depósito", "Saque", "Transferência recebida"]
+        transacoes = [Transacao(None, "Depósito", 100)]  # entrada migrada, sem timestamp
+        for dia, tipo in enumerate(tipos, start=1):
+            transacoes.append(Transacao(f"{dia:02d}/03/2025 10:00:00", tipo, dia * 100))
+        return Conta(numero_conta=1, transacoes=transacoes)
+    
+    def _valores(self, transacoes):
+        return [tx["valor_centavos"] for tx in transacoes]
+    
+    def test_limite_devolve_as_mais_recentes_em_ordem(self):
+        conta = self._conta()
+        
+        assert self._valores(models.gerar_transacoes(conta, limite=2)) == [500, 600]
+        assert self._valores(models.gerar_transacoes(conta, "deposito", limite=2)) == [100, 400]
+        assert self._valores(models.gerar_transacoes(conta, "transferencia", limite=10)) == [300, 600]
+        assert list(models.gerar_transacoes(conta, limite=0)) == []
+    
+    def test_intervalo_de_datas(self):
+        from datetime import date
+        conta = self._conta()
+        
+        assert self._valores(models.gerar_transacoes(conta, desde=date(2025, 3, 5))) == [500, 600]
+        assert self._valores(models.gerar_transacoes(conta, ate=date(2025, 3, 2))) == [100, 100, 200]
+        assert self._valores(models.gerar_transacoes(
+            conta, desde=date(2025, 3, 2), ate=datetime(2025, 3, 4, 9, 0))) == [200, 300]
+        assert self._valores(models.gerar_transacoes(
+            conta, "saque", desde=date(2025, 3, 1), ate=date(2025, 3, 6), limite=1)) == [500]
+    
+    def test_filtro_por_tipo_sem_acentos(self):
+        conta = self._conta()
+        
+        assert self._valores(models.gerar_transacoes(conta, "Transferência")) == [300, 600]
+        assert self._valores(models.gerar_transacoes(conta, "saque")) == [200, 500]
+
+
+class TestPaginacaoExtrato:
+    """Testes para pagina_extrato e a navegação por cursores."""
+    
+    def _conta(self, quantidade=25):
+        transacoes = [
+            Transacao(f"01/03/2025 10:{i:02d}:00", "Depósito" if i % 2 else "Saque", i)
+            for i in range(quantidade)
+        ]
+        return Conta(numero_conta=1, transacoes=transacoes)
+    
+    def _valores(self, pagina):
+        return [tx["valor_centavos"] for tx in pagina["transacoes"]]
+    
+    def test_paginas_das_mais_recentes_para_as_mais_antigas(self):
+        conta = self._conta()
+        
+        primeira = models.pagina_extrato(conta, tamanho=10)
+        assert self._valores(primeira) == list(range(24, 14, -1))
+        assert primeira["anterior"] is None
+        
+        segunda = models.pagina_extrato(conta, tamanho=10, cursor=primeira["proximo"])
+        assert self._valores(segunda) == list(range(14, 4, -1))
+        
+        terceira = models.pagina_extrato(conta, tamanho=10, cursor=segunda["proximo"])
+        assert self._valores(terceira) == [4, 3, 2, 1, 0]
+        assert terceira["proximo"] is None
+    
+    def test_cursor_anterior_volta_a_mesma_pagina(self):
+        conta = self._conta()
+        primeira = models.pagina_extrato(conta, tamanho=10)
+        segunda = models.pagina_extrato(conta, tamanho=10, cursor=primeira["proximo"])
+        terceira = models.pagina_extrato(conta, tamanho=10, cursor=segunda["proximo"])
+        
+        assert models.pagina_extrato(conta, tamanho=10, cursor=terceira["anterior"]) == segunda
+        assert models.pagina_extrato(conta, tamanho=10, cursor=segunda["anterior"]) == primeira
+    
+    def test_cursor_continua_valido_apos_novas_transacoes(self):
+        conta = self._conta()
+        primeira = models.pagina_extrato(conta, tamanho=10)
+        conta["transacoes"].append(Transacao("01/03/2025 11:00:00", "Depósito", 99))
+        
+        segunda = models.pagina_extrato(conta, tamanho=10, cursor=primeira["proximo"])
+        assert self._valores(segunda) == list(range(14, 4, -1))
+    
+    def test_filtro_e_ordem_cronologica(self):
+        conta = self._conta()
+        
+        saques = models.pagina_extrato(conta, tamanho=5, tipo="saque")
+        assert self._valores(saques) == [24, 22, 20, 18, 16]
+        assert self._valores(models.pagina_extrato(conta, tamanho=5, cursor=saques["proximo"], tipo="saque")) == [14, 12, 10, 8, 6]
+        
+        antigas = models.pagina_extrato(conta, tamanho=10, recentes_primeiro=False)
+        assert self._valores(antigas) == list(range(10))
+        seguinte = models.pagina_extrato(conta, tamanho=10, cursor=antigas["proximo"], recentes_primeiro=False)
+        assert self._valores(seguinte) == list(range(10, 20))
+        assert seguinte["anterior"] == 0
+    
+    def test_conta_sem_transacoes(self):
+        pagina = models.pagina_extrato(Conta(numero_conta=1))
+        assert pagina == {"transacoes": [], "proximo": None, "anterior": None}
+
+
+class TestListagemContas:
+    """Testes para o índice de busca/ordenação da listagem de contas."""
+    
+    def _listagem(self):
+        titulares = [
+            Usuario("Érica Souza", "11144477735"),
+            Usuario("Bruno Lima", "52998224725"),
+            Usuario("ana Paula", "11122233396"),
+        ]
+        contas_teste = [
+            Conta(AGENCIA_PADRAO, numero, titulares[indice % 3], saldo)
+            for numero, (indice, saldo) in enumerate([(0, 500), (1, 100), (2, 300), (0, 200)], start=1)
+        ]
+        return models.ListagemContas(contas_teste)
+    
+    def _numeros(self, listagem, posicoes):
+        return [listagem.linhas[i]["numero_conta"] for i in posicoes]
+    
+    def test_busca_por_nome_sem_acentos_e_por_cpf(self):
+        listagem = self._listagem()
+        
+        assert self._numeros(listagem, listagem.consultar("erica")) == [1, 4]
+        assert self._numeros(listagem, listagem.consultar("PAULA")) == [3]
+        assert self._numeros(listagem, listagem.consultar("111")) == [1, 3, 4]
+        assert self._numeros(listagem, listagem.consultar("529.982")) == [2]
+        assert self._numeros(listagem, listagem.consultar("")) == [1, 2, 3, 4]
+    
+    def test_ordenacao_por_coluna(self):
+        listagem = self._listagem()
+        
+        assert self._numeros(listagem, listagem.consultar(coluna="saldo")) == [2, 4, 3, 1]
+        assert self._numeros(listagem, listagem.consultar(coluna="saldo", decrescente=True)) == [1, 3, 4, 2]
+        assert self._numeros(listagem, listagem.consultar(coluna="titular")) == [3, 2, 1, 4]
+        assert self._numeros(listagem, listagem.consultar("111", coluna="saldo")) == [4, 3, 1]
+    
+    def test_ordem_calculada_uma_vez(self):
+        listagem = self._listagem()
+        
+        assert listagem.ordem("numero") is listagem.ordem("numero")
+        # A ordem em cache não é alterada por consultas decrescentes
+        listagem.consultar(coluna="numero", decrescente=True)
+        assert self._numeros(listagem, listagem.ordem("numero")) == [1, 2, 3, 4]
+
+
+class TestTrabalhadorSegundoPlano:
+    """Testes para o trabalhador que tira a gravação da thread da GUI."""
+    
+    def test_tarefas_executadas_em_ordem_fora_da_thread_principal(self):
+        trabalhador = TrabalhadorSegundoPlano()
+        threads, resultados = [], []
+        
+        def tarefa(indice):
+            threads.append(threading.current_thread())
+            return indice * 10
+        
+        for indice in range(20):
+            trabalhador.enviar(tarefa, indice, ao_concluir=resultados.append)
+        trabalhador.aguardar()
+        
+        # Os retornos só rodam quando a thread da interface processa os resultados
+        assert resultados == []
+        assert trabalhador.pendentes == 20
+        assert trabalhador.processar_resultados() == 20
+        assert resultados == [indice * 10 for indice in range(20)]
+        assert trabalhador.pendentes == 0
+        assert threading.main_thread() not in threads
+        trabalhador.fechar()
+    
+    def test_erro_entregue_ao_retorno_de_falha(self):
+        trabalhador = TrabalhadorSegundoPlano()
+        erros, resultados = [], []
+        
+        trabalhador.enviar(lambda: 1 / 0, ao_concluir=resultados.append, ao_falhar=erros.append)
+        trabalhador.enviar(lambda: "ok", ao_concluir=resultados.append)
+        trabalhador.aguardar()
+        trabalhador.processar_resultados()
+        
+        assert isinstance(erros[0], ZeroDivisionError)
+        assert resultados == ["ok"]
+        trabalhador.fechar()
+    
+    def test_fechar_conclui_tarefas_pendentes(self):
+        trabalhador = TrabalhadorSegundoPlano()
+        executadas = []
+        
+        def lenta(indice):
+            time.sleep(0.01)
+            executadas.append(indice)
+        
+        for indice in range(5):
+            trabalhador.enviar(lenta, indice)
+        trabalhador.fechar()
+        
+        assert executadas == [0, 1, 2, 3, 4]
+
+
+class TestLimites:
+    """Testes para o contador diário e os limites de saque por conta."""
+    
+    def _conta(self, numero=1, saques=0, dia=""):
+        return Conta(AGENCIA_PADRAO, numero, Usuario("Ana", "11144477735"), 100000,
+                     saques_realizados=saques, ultimo_reset_saques=dia)
+    
+    def test_consulta_nao_altera_a_conta(self):
+        conta = self._conta(saques=3, dia="2025-03-01")
+        
+        assert saques_do_dia(conta, "2025-03-02") == 0
+        assert saques_do_dia(conta, "2025-03-01") == 3
+        assert models.verificar_reset_saques_diarios(conta) is True
+        assert conta["saques_realizados"] == 3
+        assert conta["ultimo_reset_saques"] == "2025-03-01"
+    
+    def test_contador_reinicia_no_saque_do_novo_dia(self):
+        controle = ControleLimites(saques_diarios=2)
+        conta = self._conta(saques=2, dia="2025-03-01")
+        
+        with pytest.raises(ValueError, match="diários"):
+            controle.validar_saque(conta, 100, "2025-03-01")
+        controle.validar_saque(conta, 100, "2025-03-02")
+        controle.registrar_saque(conta, "2025-03-02")
+        assert (conta["saques_realizados"], conta["ultimo_reset_saques"]) == (1, "2025-03-02")
+    
+    def test_limites_por_conta_persistidos(self, tmp_path):
+        arquivo = tmp_path / "limites.json"
+        controle = ControleLimites(lambda: arquivo)
+        controle.definir_limite(7, valor_maximo=1000, saques_diarios=5)
+        controle.definir_limite(8, saques_diarios=1)
+        
+        recarregado = ControleLimites(lambda: arquivo)
+        assert recarregado.limite(7) == {"valor_maximo_centavos": 100000, "saques_diarios": 5}
+        assert recarregado.limite(8) == {"valor_maximo_centavos": 50000, "saques_diarios": 1}
+        assert recarregado.limite(9) == recarregado.padrao
+        with pytest.raises(ValueError, match="Limite de saque"):
+            recarregado.validar_saque(self._conta(numero=8), 60000)
+        recarregado.validar_saque(self._conta(numero=7), 60000)
+    
+    def test_contas_proximas_do_limite(self):
+        controle = ControleLimites(saques_diarios=3)
+        contas_teste = [self._conta(numero, saques, "2025-03-01")
+                        for numero, saques in [(1, 3), (2, 1), (3, 2), (4, 0)]]
+        contas_teste.append(self._conta(5, 3, "2025-02-28"))  # contador de outro dia
+        
+        proximas = controle.proximos_do_limite(contas_teste, margem=1, hoje="2025-03-01")
+        assert [item["numero_conta"] for item in proximas] == [1, 3]
+        
+        # Saques posteriores atualizam o índice sem percorrer as contas de novo
+        controle.registrar_saque(contas_teste[1], "2025-03-01")
+        proximas = controle.proximos_do_limite([], margem=1, hoje="2025-03-01")
+        assert [item["numero_conta"] for item in proximas] == [1, 2, 3]
+        
+        controle.registrar_saque(contas_teste[3], "2025-03-02")
+        assert controle.proximos_do_limite([], margem=2, hoje="2025-03-02") == [
+            {"numero_conta": 4, "saques": 1, "limite": 3}]
+    
+    def test_conta_com_limite_especifico_sem_saques_hoje(self, tmp_path):
+        controle = ControleLimites(lambda: tmp_path / "limites.json", saques_diarios=3)
+        controle.definir_limite(7, saques_diarios=0)
+        controle.definir_limite(8, saques_diarios=1)
+        controle.definir_limite(9, valor_maximo=1000)  # só o valor: segue o padrão de saques
+        contas_teste = [self._conta(numero, 0, "2025-03-01") for numero in (7, 8, 9)]
+        
+        assert controle.proximos_do_limite(contas_teste, margem=1, hoje="2025-03-01") == [
+            {"numero_conta": 7, "saques": 0, "limite": 0}, {"numero_conta": 8, "saques": 0, "limite": 1}]
+    
+    def test_saque_usa_limite_da_conta(self, arquivos_temporarios):
+        conta = self._conta()
+        utils.controle_limites.definir_limite(1, saques_diarios=1)
+        
+        models.sacar_obj(conta, 10, [], [conta])
+        with pytest.raises(ValueError, match="diários"):
+            models.sacar_obj(conta, 10, [], [conta])
+        assert (arquivos_temporarios / "limites_contas.json").exists()
+
+
+class TestResumos:
+    """Testes para os resumos por mês/dia mantidos a cada operação."""
+    
+    def _operar(self):
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        salvar_dados(usuarios, contas, 1, alteracoes=[{"op": "usuario", "dados": usuario}])
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        models.criar_conta(AGENCIA_PADRAO, 2, usuario, contas, usuarios)
+        models.depositar_obj(contas[0], 100.0, usuarios, contas)
+        models.depositar_obj(contas[0], 50.0, usuarios, contas)
+        models.sacar_obj(contas[0], 30.0, usuarios, contas)
+        models.transferir_obj(1, 2, 20.0, usuarios, contas)
+        return usuarios, contas
+    
+    def test_resumo_do_mes_atualizado_a_cada_operacao(self, arquivos_temporarios):
+        _, contas = self._operar()
+        mes = datetime.now().strftime("%Y-%m")
+        
+        resumo = models.resumo_periodo(contas[0], mes)
+        assert resumo["deposito"] == [2, 15000]
+        assert resumo["saque"] == [1, 3000]
+        assert resumo["transferencia_enviada"] == [1, 2000]
+        assert resumo["liquido_centavos"] == 10000
+        assert resumo["saldo_centavos"] == 10000
+        assert models.resumo_periodo(contas[1], datetime.now().strftime("%Y-%m-%d"))["transferencia_recebida"] == [1, 2000]
+        assert models.resumo_periodo(contas[0], "1999-01")["saldo_centavos"] is None
+    
+    def test_resumos_iguais_ao_recalculo_do_historico(self):
+        transacoes = [
+            Transacao("28/02/2025 10:00:00", "Depósito", 10000),
+            Transacao("01/03/2025 09:00:00", "Saque", 2500),
+            Transacao("15/03/2025 18:00:00", "Transferência recebida", 1000),
+        ]
+        conta = Conta(numero_conta=1, transacoes=[])
+        saldo = 0
+        for transacao, sinal in zip(transacoes, (1, -1, 1)):
+            saldo += sinal * transacao["valor_centavos"]
+            conta["saldo_centavos"] = saldo
+            conta.registrar_transacao(transacao)
+        
+        assert conta["resumos"] == Conta(numero_conta=1, transacoes=transacoes)["resumos"]
+        assert [(r["periodo"], r["saldo_centavos"]) for r in models.resumos_mensais(conta)] == [
+            ("2025-02", 10000), ("2025-03", 8500)]
+    
+    @pytest.mark.parametrize("modo", ["json", "journal", "sqlite"])
+    def test_resumos_persistidos(self, arquivos_temporarios, modo):
+        utils.configurar_persistencia(modo)
+        _, contas = self._operar()
+        
+        utils.configurar_persistencia(modo)
+        _, contas_lidas, _ = carregar_dados()
+        assert contas_lidas[0]._resumos is not None  # lidos, não recalculados
+        assert [c["resumos"] for c in contas_lidas] == [c["resumos"] for c in contas]
+    
+    def test_sqlite_antigo_sem_tabela_de_resumos(self, arquivos_temporarios):
+        utils.configurar_persistencia("sqlite")
+        _, contas = self._operar()
+        con = utils.obter_backend().conexao
+        con.execute("DROP TABLE resumos")
+        con.commit()
+        
+        utils.configurar_persistencia("sqlite")
+        _, contas_lidas, _ = carregar_dados()
+        assert [c["resumos"] for c in contas_lidas] == [c["resumos"] for c in contas]
+
+
+class TestMascaramento:
+    """Testes do motor de mascaramento de passada única."""
+    
+    def test_mesma_saida_da_implementacao_anterior(self):
+        valores = benchmark.gerar_valores_log(3000, semente=7) + [
+            None, 0, 999, -999, 1000, 12.5, 123456.78, "", "Saldo insuficiente.",
+            "12345678900", "123.456.789-00", "a12345678900", "1234567890", "CPF 123.456.78900 ok",
+            "endereco: Avenida Paulista, 1000", "ENDERECO av. Brasil 55, apto 12", "Rua 12, sem endereco",
+            "endereco sem logradouro 98765",
+        ]
+        for valor in valores:
+            assert utils.mascarar_dados_sensiveis(valor) == benchmark.mascarar_referencia(valor), valor
+    
+    def test_regras_configuraveis(self):
+        motor = MotorMascaramento([
+            RegraMascara("email", r"(?P<usuario>\w)[\w.]*@", r"\g<usuario>***@", gatilho="@"),
+            RegraMascara("senha", r"(?i:senha=\S+)", "senha=****", gatilho="Senha"),
+        ])
+        assert motor.mascarar("joao.silva@exemplo.com") == "j***@exemplo.com"
+        assert motor.mascarar("SENHA=abc login=x@y") == "senha=**** login=x***@y"
+        assert motor.mascarar("sem dados 123") == "sem dados 123"
+    
+    def test_descrever_argumento(self):
+        motor = utils._motor_mascaramento
+        conta = Conta(numero_conta=7, usuario={"nome": "Ana"})
+        assert motor.descrever_argumento(conta) == "conta=7 titular=Ana"
+        assert motor.descrever_argumento("12345678900") == "123.***.***-**"
+        assert motor.descrever_argumento([1, 2]) == "lista(2 items)"
+        assert motor.descrever_argumento("x" * 60) == "str"
+
+
+class TestAuditoriaEstruturada:
+    """Testes do log de auditoria em JSON por linha com índice lateral."""
+    
+    def _operar(self, monkeypatch):
+        monkeypatch.setattr(utils, "LOG_ESTRUTURADO", True)
+        utils.configurar_persistencia("journal")
+        usuarios = [models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A, 1")]
+        contas = []
+        for numero in (1, 2):
+            models.criar_conta(AGENCIA_PADRAO, numero, usuarios[0], contas, usuarios)
+        models.depositar_obj(contas[0], 100.0, usuarios, contas)
+        models.sacar_obj(contas[0], 30.0, usuarios, contas)
+        with pytest.raises(ValueError):
+            models.sacar_obj(contas[1], 10.0, usuarios, contas)
+        models.transferir_obj(1, 2, 20.0, usuarios, contas)
+        utils.registrar_consulta_extrato(2, "Ana")
+        utils.descarregar_log()
+        return utils.DIRETORIO_AUDITORIA
+    
+    def test_consulta_por_conta_tipo_e_status(self, arquivos_temporarios, monkeypatch):
+        diretorio = self._operar(monkeypatch)
+        
+        falhas = list(auditoria.consultar(diretorio, conta=2, tipo="saque", status="ERRO"))
+        assert [(r["funcao"], r["contas"]) for r in falhas] == [("sacar_obj", [2])]
+        assert falhas[0]["erro"].startswith("ValueError")
+        assert [r["tipo"] for r in auditoria.consultar(diretorio, conta=2)] == [
+            "Criação de Conta", "Saque", "Transferência", "Consulta de Extrato"]
+        assert [r["contas"] for r in auditoria.consultar(diretorio, tipo="Transferência")] == [[1, 2]]
+        assert [r["contas"] for r in auditoria.consultar(diretorio, tipo="transferencia")] == [[1, 2]]
+        assert [r["tipo"] for r in auditoria.consultar(diretorio, tipo="DEPOSITO")] == ["Depósito"]
+        hoje = datetime.now().strftime("%Y-%m-%d")
+        assert list(auditoria.consultar(diretorio, desde="2000-01-01", ate="2000-01-02")) == []
+        assert len(list(auditoria.consultar(diretorio, desde=hoje, ate=hoje))) == 7
+    
+    def test_indice_invertido_por_conta_tipo_e_status(self, arquivos_temporarios, monkeypatch):
+        diretorio = self._operar(monkeypatch)
+        arquivo_dados, arquivo_indice = auditoria.arquivos_do_dia(diretorio, auditoria.dias_com_registros(diretorio)[0])
+        
+        fim, posicoes = auditoria._ler_indice(arquivo_indice, [("conta", "2"), ("tipo", "saque"), ("status", "ERRO")])
+        assert fim == arquivo_dados.stat().st_size
+        assert len(posicoes["conta", "2"]) == 4
+        assert len(posicoes["tipo", "saque"]) == 2
+        assert posicoes["conta", "2"] & posicoes["tipo", "saque"] & posicoes["status", "ERRO"] == posicoes["status", "ERRO"]
+    
+    def test_consulta_nao_altera_o_indice(self, arquivos_temporarios, monkeypatch):
+        diretorio = self._operar(monkeypatch)
+        dia = auditoria.dias_com_registros(diretorio)[0]
+        _, arquivo_indice = auditoria.arquivos_do_dia(diretorio, dia)
+        arquivo_indice.write_text("", encoding="utf-8")  # índice perdido
+        
+        assert len(list(auditoria.consultar(diretorio, conta=1))) == 4  # lidos do .jsonl
+        assert arquivo_indice.read_text(encoding="utf-8") == ""
+        assert auditoria.reindexar(diretorio, dia) == 7
+        assert auditoria._ler_indice(arquivo_indice, [("conta", "1")])[1]["conta", "1"]
+        assert len(list(auditoria.consultar(diretorio, conta=1))) == 4
+    
+    def test_escritora_indexa_registros_sem_indice(self, arquivos_temporarios, monkeypatch):
+        diretorio = self._operar(monkeypatch)
+        arquivo_dados, arquivo_indice = auditoria.arquivos_do_dia(diretorio, auditoria.dias_com_registros(diretorio)[0])
+        arquivo_indice.unlink()
+        with open(arquivo_dados, "ab") as f:
+            f.write(b'{"ts":"2025-03-14T10:00:00","tipo":"Saq')  # registro interrompido por uma queda
+        escritor = auditoria.EscritorAuditoria(lambda: diretorio)
+        escritor.gravar([{"ts": datetime.now().isoformat(), "tipo": "Saque", "status": "OK", "contas": [1]}])
+        
+        fim, posicoes = auditoria._ler_indice(arquivo_indice, [("conta", "1")])
+        assert fim == arquivo_dados.stat().st_size
+        assert len(posicoes["conta", "1"]) == 5
+        assert len(list(auditoria.consultar(diretorio, conta=1))) == 5
+        assert len(list(auditoria.consultar(diretorio))) == 8
+    
+    def test_desativado_por_padrao(self, arquivos_temporarios):
+        assert utils.LOG_ESTRUTURADO is False
+        utils.registrar_consulta_extrato(1, "Ana")
+        utils.descarregar_log()
+        assert not utils.DIRETORIO_AUDITORIA.exists()
+    
+    def test_cli(self, arquivos_temporarios, monkeypatch, capsys):
+        diretorio = self._operar(monkeypatch)
+        auditoria.main(["--diretorio", str(diretorio), "--conta", "1", "--status", "OK", "--dias", "1"])
+        saida = capsys.readouterr()
+        assert [json.loads(linha)["funcao"] for linha in saida.out.splitlines()] == [
+            "criar_conta", "depositar_obj", "sacar_obj", "transferir_obj"]
+        assert "4 registro(s)" in saida.err
+        
+        auditoria.main(["--diretorio", str(diretorio), "--reindexar"])
+        assert "7 registro(s) indexado(s)" in capsys.readouterr().err
+
+
+class TestRotacaoLog:
+    """Testes da rotação do log por tamanho e por período."""
+    
+    def test_rotacao_por_tamanho_com_compressao_e_retencao(self, tmp_path):
+        arquivo = tmp_path / "log.txt"
+        rotacao = RotacaoLog(tamanho_maximo=100, manter=2)
+        escritor = EscritorLogAssincrono(lambda: arquivo, tamanho_lote=1, intervalo=0, rotacao=rotacao)
+        linhas = [f"linha {i:03d} " + "x" * 40 for i in range(12)]
+        for linha in linhas:
+            escritor.gravar([linha])
+        escritor.fechar()
+        rotacao.aguardar()
+        
+        segmentos = RotacaoLog.segmentos(arquivo)
+        assert rotacao.rotacoes == 5
+        assert [s.suffix for s in segmentos] == [".gz", ".gz"]
+        conteudo = b"".join(gzip.decompress(s.read_bytes()) for s in segmentos).decode("utf-8")
+        conteudo += arquivo.read_text(encoding="utf-8")
+        assert conteudo.splitlines() == linhas[-6:]
+    
+    def test_rotacao_por_periodo(self, tmp_path):
+        arquivo = tmp_path / "log.txt"
+        arquivo.write_text("ontem\n", encoding="utf-8")
+        ontem = time.time() - 86400
+        os.utime(arquivo, (ontem, ontem))
+        rotacao = RotacaoLog(intervalo=86400, comprimir=False)
+        escritor = EscritorLogAssincrono(lambda: arquivo, rotacao=rotacao)
+        escritor.enviar("hoje 1")
+        escritor.enviar("hoje 2")
+        escritor.fechar()
+        rotacao.aguardar()
+        
+        [segmento] = RotacaoLog.segmentos(arquivo)
+        assert segmento.read_text(encoding="utf-8") == "ontem\n"
+        assert arquivo.read_text(encoding="utf-8") == "hoje 1\nhoje 2\n"
+    
+    def test_log_sincrono_tambem_rotaciona(self, arquivos_temporarios, monkeypatch):
+        monkeypatch.setattr(utils, "LOG_ASSINCRONO", False)
+        monkeypatch.setattr(utils._escritor_log.rotacao, "tamanho_maximo", 200)
+        for i in range(10):
+            utils.registrar_consulta_extrato(i, "Ana")
+        utils._escritor_log.rotacao.aguardar()
+        
+        assert len(RotacaoLog.segmentos(utils.ARQUIVO_LOG)) >= 2
+        assert utils.ARQUIVO_LOG.read_text(encoding="utf-8").splitlines()[-1].count("conta=9") == 1
+    
+    def test_encerramento_espera_compressao(self, tmp_path, monkeypatch):
+        import escritor_log
+        registrados = []
+        monkeypatch.setattr(escritor_log.atexit, "register", registrados.append)
+        arquivo = tmp_path / "log.txt"
+        rotacao = RotacaoLog(tamanho_maximo=10)
+        escritor = EscritorLogAssincrono(lambda: arquivo, rotacao=rotacao)
+        for i in range(3):
+            escritor.enviar(f"linha {i} " + "x" * 4000)
+            escritor.descarregar()
+        escritor.fechar()  # sem rotacao.aguardar()
+        
+        assert registrados == [rotacao.aguardar]
+        assert [s.suffix for s in RotacaoLog.segmentos(arquivo)] == [".gz", ".gz"]
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+class TestMetricas:
+    """Testes dos histogramas de latência e da medição das operações."""
+    
+    def test_percentis_do_histograma(self):
+        histograma = HistogramaLatencia()
+        amostras = list(range(1000, 1_001_000, 1000))  # 1 µs a 1 ms
+        for ns in amostras:
+            histograma.registrar(ns)
+        
+        resumo = histograma.resumo()
+        assert resumo["contagem"] == 1000
+        assert resumo["max_us"] == 1000.0
+        assert resumo["media_us"] == pytest.approx(500.5)
+        for chave, esperado in (("p50_us", 500), ("p95_us", 950), ("p99_us", 990)):
+            assert resumo[chave] == pytest.approx(esperado, rel=0.04)
+        assert len(histograma.faixas) < 200
+    
+    def test_operacoes_e_persistencia_medidas(self, arquivos_temporarios, monkeypatch):
+        monkeypatch.setattr(utils, "metricas", ColetorMetricas())
+        utils.configurar_persistencia("journal")
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        models.criar_conta(AGENCIA_PADRAO, 2, usuario, contas, usuarios)
+        for _ in range(3):
+            models.depositar_obj(contas[0], 10.0, usuarios, contas)
+        with pytest.raises(ValueError):
+            models.sacar_obj(contas[1], 10.0, usuarios, contas)
+        models.transferir_obj(1, 2, 5.0, usuarios, contas)
+        
+        relatorio = utils.metricas.relatorio()
+        assert relatorio["depositar_obj"]["contagem"] == 3
+        assert relatorio["depositar_obj.salvar_dados"]["contagem"] == 3
+        assert relatorio["sacar_obj"]["contagem"] == 1
+        assert "sacar_obj.salvar_dados" not in relatorio
+        assert relatorio["transferir_obj"]["contagem"] == 1
+        assert relatorio["criar_conta"]["contagem"] == 2
+        assert relatorio["depositar_obj"]["max_us"] >= relatorio["depositar_obj.salvar_dados"]["max_us"]
+        assert utils.metricas.operacao_atual() is None
+        
+        arquivo = arquivos_temporarios / "metricas.json"
+        utils.metricas.salvar(arquivo)
+        assert json.loads(arquivo.read_text(encoding="utf-8")) == relatorio
+        assert "depositar_obj.salvar_dados" in utils.metricas.formatar_relatorio()
+    
+    def test_desativadas(self, arquivos_temporarios, monkeypatch):
+        monkeypatch.setattr(utils, "metricas", ColetorMetricas(ativo=False))
+        usuario = models.criar_usuario_obj("Ana", "11144477735", "01-01-1990", "Rua A")
+        usuarios, contas = [usuario], []
+        models.criar_conta(AGENCIA_PADRAO, 1, usuario, contas, usuarios)
+        models.depositar_obj(contas[0], 10.0, usuarios, contas)
+        assert utils.metricas.relatorio() == {}
+
+
+class TestPerfil:
+    """Testes do perfilamento opcional dos pontos de entrada."""
+    
+    def test_desligado_nao_envolve_a_funcao(self, monkeypatch):
+        monkeypatch.delenv("BANCO_PERFIL", raising=False)
+        
+        def operacao():
+            return 1
+        
+        assert perfil.perfilavel()(operacao) is operacao
+        assert models.depositar_obj.__wrapped__.__name__ == "depositar_obj"  # apenas log_transacao
+    
+    def test_pontos_configurados(self, monkeypatch):
+        monkeypatch.setenv("BANCO_PERFIL", "cpu")
+        monkeypatch.setenv("BANCO_PERFIL_PONTOS", "salvar_dados")
+        monkeypatch.setattr(perfil, "_sessao", perfil.SessaoPerfil("nao_usado", {"cpu"}))
+        
+        def carregar_dados():
+            return 1
+        
+        def salvar_dados():
+            return 2
+        
+        assert perfil.perfilavel()(carregar_dados) is carregar_dados
+        assert perfil.perfilavel()(salvar_dados) is not salvar_dados
+    
+    def test_sessao_grava_perfis_e_resumo(self, tmp_path):
+        sessao = perfil.SessaoPerfil(tmp_path, {"cpu", "memoria"}, top=5)
+        
+        def interno(n):
+            return sum(range(n))
+        
+        def externo(n):
+            return sessao.executar("interno", interno, (n,), {}) + len([0] * n)
+        
+        try:
+            for _ in range(3):
+                assert sessao.executar("externo", externo, (1000,), {}) == sum(range(1000)) + 1000
+            destino = sessao.gravar()
+        finally:
+            tracemalloc.stop()
+        
+        assert sorted(p.name for p in destino.iterdir()) == ["externo.prof", "resumo.txt"]
+        resumo = (destino / "resumo.txt").read_text(encoding="utf-8")
+        assert "externo: 3 chamada(s)" in resumo
+        assert "interno" in resumo  # aparece dentro do perfil de quem chamou
+        assert "pico de memória" in resumo
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Trabalhador de segundo plano: executa tarefas em ordem numa thread dedicada."""
+
+import queue
+import threading
+
+_PARAR = object()
+
+
+class TrabalhadorSegundoPlano:
+    """Executa tarefas (operações com gravação em disco) fora da thread da interface.
+
+    As tarefas enviadas com `enviar` rodam uma de cada vez, na ordem de envio,
+    numa única thread. Os resultados não chamam a interface diretamente: ficam
+    numa fila de concluídas e os retornos (`ao_concluir`/`ao_falhar`) só rodam
+    quando a thread da interface chama `processar_resultados` (na GUI, a cada
+    `root.after`), também na ordem de envio.
+    """
+    def __init__(self, nome="trabalhador"):
+        self.nome = nome
+        self._tarefas = queue.Queue()
+        self._concluidas = queue.Queue()
+        self._pendentes = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def pendentes(self):
+        """Tarefas enviadas cujo retorno ainda não foi processado."""
+        return self._pendentes
+
+    def _iniciar(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name=self.nome, daemon=True)
+                self._thread.start()
+
+    def enviar(self, funcao, *args, ao_concluir=None, ao_falhar=None):
+        """Enfileira `funcao(*args)`; `ao_concluir(resultado)` ou `ao_falhar(erro)` rodam depois."""
+        self._iniciar()
+        with self._lock:
+            self._pendentes += 1
+        self._tarefas.put((funcao, args, ao_concluir, ao_falhar))
+
+    def processar_resultados(self):
+        """Chama os retornos das tarefas já concluídas; deve rodar na thread da interface."""
+        processadas = 0
+        while True:
+            try:
+                ao_concluir, ao_falhar, resultado, erro = self._concluidas.get_nowait()
+            except queue.Empty:
+                return processadas
+            with self._lock:
+                self._pendentes -= 1
+            processadas += 1
+            if erro is not None:
+                if ao_falhar is not None:
+                    ao_falhar(erro)
+                else:
+                    print(f"[AVISO] Falha em tarefa de segundo plano: {erro}")
+            elif ao_concluir is not None:
+                ao_concluir(resultado)
+
+    def aguardar(self):
+        """Bloqueia até que todas as tarefas enviadas tenham sido executadas."""
+        self._tarefas.join()
+
+    def fechar(self):
+        """Executa as tarefas pendentes e encerra a thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._tarefas.put(_PARAR)
+            self._thread.join()
+        self._thread = None
+
+    def _executar(self):
+        while True:
+            item = self._tarefas.get()
+            if item is _PARAR:
+                self._tarefas.task_done()
+                return
+            funcao, args, ao_concluir, ao_falhar = item
+            resultado, erro = None, None
+            try:
+                resultado = funcao(*args)
+            except Exception as e:
+                erro = e
+            self._concluidas.put((ao_concluir, ao_falhar, resultado, erro))
+            self._tarefas.task_done()
@@ -1,19 +1,68 @@
 # -*- coding: utf-8 -*-
 """Utilitários e funções comuns do sistema bancário."""
 
+import atexit
+import csv
+import inspect
 import json
+import os
 import re
+import time
 import unicodedata
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
 
+from auditoria import EscritorAuditoria
+from entidades import Conta
+from escritor_log import EscritorLogAssincrono, RotacaoLog
+from limites import ControleLimites
+from mascaramento import MotorMascaramento
+from metricas import ColetorMetricas
+from perfil import perfilavel
+from persistencia import BackendJSON, BackendJournal, BackendSQLite
+
 # ============= CONFIGURAÇÕES =============
 AGENCIA_PADRAO = "0001"
 LIMITE_SAQUE = 500
 LIMITE_SAQUES_DIARIOS = 3
+TAMANHO_PAGINA_EXTRATO = 10  # transações por página nas telas de extrato
 ARQUIVO_DADOS = Path("dados_bancarios.json")
 ARQUIVO_LOG = Path("log.txt")
+ARQUIVO_JOURNAL = Path("dados_bancarios.journal")
+ARQUIVO_SQLITE = Path("dados_bancarios.db")
+ARQUIVO_LIMITES = Path("limites_contas.json")  # limites de saque específicos por conta
+DIRETORIO_AUDITORIA = Path("auditoria")         # log estruturado (um .jsonl + índice por dia)
+
+# Backend de persistência: "json" (reescreve o arquivo inteiro a cada operação),
+# "journal" (anexa um registro por operação e compacta periodicamente) ou
+# "sqlite" (atualiza apenas as linhas afetadas)
+MODO_PERSISTENCIA = os.environ.get("BANCO_PERSISTENCIA", "json")
+JOURNAL_FSYNC_LOTE = 50            # registros acumulados antes de um fsync
+JOURNAL_FSYNC_INTERVALO = 1.0      # segundos máximos entre fsyncs
+JOURNAL_LIMITE_COMPACTACAO = 1000  # registros antes de gerar novo snapshot
+# Carregamento preguiçoso do snapshot JSON (json/journal): as transações de cada
+# conta só são lidas no primeiro acesso (BANCO_CARREGAMENTO_PREGUICOSO=1 ativa)
+CARREGAMENTO_PREGUICOSO = os.environ.get("BANCO_CARREGAMENTO_PREGUICOSO", "0") != "0"
+
+# Log de auditoria gravado em segundo plano (BANCO_LOG_ASSINCRONO=0 desativa)
+LOG_ASSINCRONO = os.environ.get("BANCO_LOG_ASSINCRONO", "1") != "0"
+LOG_TAMANHO_FILA = 10000           # linhas aguardando gravação
+LOG_TAMANHO_LOTE = 200             # linhas gravadas por vez
+LOG_INTERVALO = 0.5                # segundos máximos de espera por um lote
+LOG_POLITICA_FILA_CHEIA = os.environ.get("BANCO_LOG_POLITICA", "bloquear")  # ou "descartar"
+# Rotação do log.txt: por tamanho (bytes) e/ou período (segundos; 0 desativa),
+# mantendo os LOG_ROTACAO_MANTER segmentos mais recentes, compactados em .gz
+LOG_ROTACAO_TAMANHO = int(os.environ.get("BANCO_LOG_ROTACAO_TAMANHO", 10 * 1024 * 1024))
+LOG_ROTACAO_INTERVALO = int(os.environ.get("BANCO_LOG_ROTACAO_INTERVALO", 0))
+LOG_ROTACAO_MANTER = int(os.environ.get("BANCO_LOG_ROTACAO_MANTER", 5))
+LOG_ROTACAO_COMPRIMIR = os.environ.get("BANCO_LOG_ROTACAO_COMPRIMIR", "1") != "0"
+# Registros de auditoria em JSON por linha, além do log.txt (BANCO_LOG_ESTRUTURADO=1 ativa)
+LOG_ESTRUTURADO = os.environ.get("BANCO_LOG_ESTRUTURADO", "0") != "0"
+# Histogramas de latência das operações em memória (BANCO_METRICAS=0 desativa)
+METRICAS_ATIVAS = os.environ.get("BANCO_METRICAS", "1") != "0"
+# Parâmetros das operações que identificam contas, indexadas no log estruturado
+PARAMETROS_CONTA = ("conta", "numero_conta", "numero_origem", "numero_destino")
 
 
 # ============= UTILIDADES GERAIS =============
@@ -64,87 +113,181 @@ def filtrar_usuario_por_cpf(usuarios, cpf):
     return None
 
 
+def ler_operacoes_lote(caminho):
+    """Lê operações de lote de um arquivo CSV (com cabeçalho) ou JSONL.
+
+    Colunas/chaves esperadas: tipo, conta, valor e, nas transferências, destino.
+    """
+    caminho = Path(caminho)
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        if caminho.suffix.lower() == ".csv":
+            return [
+                {chave.strip(): (valor.strip() if isinstance(valor, str) else valor) for chave, valor in linha.items() if chave}
+                for linha in csv.DictReader(f)
+            ]
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
 # ============= PERSISTÊNCIA DE DADOS =============
 
-def salvar_dados(usuarios, contas, proximo_numero_conta):
-    """Salva usuários e contas em arquivo JSON."""
-    dados = {
-        "usuarios": usuarios,
-        "contas": contas,
-        "proximo_numero_conta": proximo_numero_conta
-    }
-    with open(ARQUIVO_DADOS, "w", encoding="utf-8") as f:
-        json.dump(dados, f, ensure_ascii=False, indent=2)
+_backend = None
+
+
+def criar_backend(modo=None, preguicoso=None):
+    """Cria o backend de armazenamento configurado ("json", "journal" ou "sqlite")."""
+    modo = modo or MODO_PERSISTENCIA
+    preguicoso = CARREGAMENTO_PREGUICOSO if preguicoso is None else preguicoso
+    if modo == "json":
+        return BackendJSON(ARQUIVO_DADOS, preguicoso=preguicoso)
+    if modo == "journal":
+        return BackendJournal(
+            ARQUIVO_DADOS, ARQUIVO_JOURNAL,
+            fsync_lote=JOURNAL_FSYNC_LOTE,
+            fsync_intervalo=JOURNAL_FSYNC_INTERVALO,
+            limite_compactacao=JOURNAL_LIMITE_COMPACTACAO,
+            preguicoso=preguicoso,
+        )
+    if modo == "sqlite":
+        return BackendSQLite(ARQUIVO_SQLITE)
+    raise ValueError(f"Modo de persistência desconhecido: {modo}")
+
+
+def configurar_persistencia(modo=None, preguicoso=None):
+    """Define o backend usado por salvar_dados/carregar_dados, fechando o anterior."""
+    global _backend
+    novo_backend = criar_backend(modo, preguicoso)
+    if _backend is not None:
+        _backend.fechar()
+    _backend = novo_backend
+    return _backend
+
+
+def obter_backend():
+    """Retorna o backend ativo, criando-o a partir da configuração se necessário."""
+    if _backend is None:
+        configurar_persistencia()
+    return _backend
+
+
+@atexit.register
+def _fechar_backend():
+    if _backend is not None:
+        _backend.fechar()
+
 
+@perfilavel()
+def salvar_dados(usuarios, contas, proximo_numero_conta, alteracoes=None):
+    """Salva usuários e contas no backend ativo.
 
+    `alteracoes` descreve apenas o que a operação mudou; backends incrementais
+    (journal, SQLite) gravam só esses registros, e o backend JSON reescreve o
+    arquivo inteiro. O tempo gasto entra nas métricas como etapa
+    "salvar_dados" da operação em andamento.
+    """
+    with metricas.medir_etapa("salvar_dados"):
+        obter_backend().salvar(usuarios, contas, proximo_numero_conta, alteracoes)
+
+
+@perfilavel()
 def carregar_dados():
-    """Carrega usuários e contas do arquivo JSON."""
-    usuarios = []
-    contas = []
-    proximo_numero_conta = 1
-    
-    if ARQUIVO_DADOS.exists():
-        try:
-            with open(ARQUIVO_DADOS, "r", encoding="utf-8") as f:
-                dados = json.load(f)
-                usuarios = dados.get("usuarios", [])
-                contas = dados.get("contas", [])
-                proximo_numero_conta = dados.get("proximo_numero_conta", 1)
-        except (json.JSONDecodeError, KeyError):
-            pass
-    
-    return usuarios, contas, proximo_numero_conta
+    """Carrega usuários e contas do backend ativo."""
+    return obter_backend().carregar()
+
+
+# ============= LIMITES DE SAQUE =============
+
+# Limites padrão (LIMITE_SAQUE/LIMITE_SAQUES_DIARIOS) e os específicos de cada
+# conta, gravados em ARQUIVO_LIMITES
+controle_limites = ControleLimites(lambda: ARQUIVO_LIMITES, LIMITE_SAQUE, LIMITE_SAQUES_DIARIOS)
+
+
+# ============= MÉTRICAS DE DESEMPENHO =============
+
+# Latência de cada operação decorada com log_transacao e das etapas internas
+metricas = ColetorMetricas(ativo=METRICAS_ATIVAS)
 
 
 # ============= SISTEMA DE LOGS E AUDITORIA =============
 
+_escritor_log = EscritorLogAssincrono(
+    lambda: ARQUIVO_LOG,
+    tamanho_fila=LOG_TAMANHO_FILA,
+    tamanho_lote=LOG_TAMANHO_LOTE,
+    intervalo=LOG_INTERVALO,
+    politica=LOG_POLITICA_FILA_CHEIA,
+    rotacao=RotacaoLog(
+        tamanho_maximo=LOG_ROTACAO_TAMANHO or None,
+        intervalo=LOG_ROTACAO_INTERVALO or None,
+        manter=LOG_ROTACAO_MANTER,
+        comprimir=LOG_ROTACAO_COMPRIMIR,
+    ),
+)
+atexit.register(_escritor_log.fechar)
+
+_escritor_auditoria = EscritorAuditoria(
+    lambda: DIRETORIO_AUDITORIA,
+    tamanho_fila=LOG_TAMANHO_FILA,
+    tamanho_lote=LOG_TAMANHO_LOTE,
+    intervalo=LOG_INTERVALO,
+    politica=LOG_POLITICA_FILA_CHEIA,
+)
+atexit.register(_escritor_auditoria.fechar)
+
+
+def escrever_log(linha_log):
+    """Envia uma linha ao log.txt, pela fila assíncrona ou diretamente."""
+    if LOG_ASSINCRONO:
+        _escritor_log.enviar(linha_log)
+    else:
+        _escritor_log.gravar([linha_log])
+
+
+def escrever_auditoria(registro):
+    """Envia um registro ao log estruturado, pela fila assíncrona ou diretamente."""
+    if LOG_ASSINCRONO:
+        _escritor_auditoria.enviar(registro)
+    else:
+        _escritor_auditoria.gravar([registro])
+
+
+def descarregar_log():
+    """Aguarda a gravação de todas as linhas de log pendentes."""
+    _escritor_log.descarregar()
+    _escritor_auditoria.descarregar()
+
+
+# Regras de mascaramento (CPF, números longos, endereços) compiladas uma única vez
+_motor_mascaramento = MotorMascaramento()
+
+
 def mascarar_dados_sensiveis(valor):
-    """Mascara dados sensíveis como CPF, valores bancários e senhas."""
-    if valor is None:
-        return "None"
-    
-    # Converter para string
-    valor_str = str(valor)
-    
-    # Mascarar CPF (padrão: 123.456.789-00 ou 12345678900)
-    # Formato: XXX.***.***.***-** (mostra apenas primeiros 3 dígitos)
-    valor_str = re.sub(r'\b(\d{3})\.?(\d{3})\.?(\d{3})\-?(\d{2})\b', r'\1.***.***-**', valor_str)
-    
-    # Mascarar valores monetários grandes (provavelmente saldos/valores)
-    # Substitui números com 4+ dígitos por ****
-    valor_str = re.sub(r'\b\d{4,}\b', '****', valor_str)
-    
-    # Mascarar endereço se contiver rua/avenida (reduz a apenas tipo e parcial)
-    if 'endereco' in valor_str.lower():
-        valor_str = re.sub(r'(rua|avenida|av\.|r\.)\s+[^,]+', r'\1 ****', valor_str, flags=re.IGNORECASE)
-    
-    return valor_str
+    """Mascara dados sensíveis como CPF, valores bancários e endereços.
 
+    - CPF (123.456.789-00 ou 12345678900) vira 123.***.***-**;
+    - números com 4 ou mais dígitos viram ****;
+    - em textos com "endereco", o logradouro (rua/avenida) é reduzido ao tipo.
+    """
+    return _motor_mascaramento.mascarar(valor)
 
-def registrar_log(tipo_transacao, nome_funcao, status, duracao, args, kwargs, resultado=None, erro=None, titular=None):
-    """Registra operação em log.txt com formato padronizado e dados mascarados."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-    
-    # Preparar argumentos mascarados
-    args_mascarados = []
-    for arg in args:
-        if isinstance(arg, dict) and arg.get("numero_conta"):
-            # Extrair informações da conta para log
-            numero_conta = arg.get('numero_conta')
-            usuario_info = arg.get('usuario', {})
-            nome_usuario = usuario_info.get('nome', 'Desconhecido')
-            args_mascarados.append(f"conta={numero_conta} titular={nome_usuario}")
-        elif isinstance(arg, (int, str, float)) and len(str(arg)) < 50:
-            args_mascarados.append(mascarar_dados_sensiveis(arg))
-        elif isinstance(arg, list):
-            args_mascarados.append(f"lista({len(arg)} items)")
-        else:
-            args_mascarados.append(type(arg).__name__)
+
+def registrar_log(tipo_transacao, nome_funcao, status, duracao, args, kwargs, resultado=None, erro=None, titular=None,
+                  contas=None):
+    """Registra operação em log.txt com formato padronizado e dados mascarados.
+
+    Com LOG_ESTRUTURADO, grava também um registro JSON no log de auditoria,
+    indexado pelas `contas` envolvidas (números de conta) e pelo tipo.
+    """
+    agora = datetime.now()
+    timestamp = agora.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
     
-    args_str = ", ".join(args_mascarados) if args_mascarados else "sem_args"
+    # Preparar argumentos mascarados (contas, valores e listas têm regras próprias)
+    args_str = ", ".join(map(_motor_mascaramento.descrever_argumento, args)) if args else "sem_args"
     
     # Preparar resultado
-    resultado_str = mascarar_dados_sensiveis(resultado) if resultado else "None"
+    if isinstance(resultado, list):
+        resultado_str = f"lista({len(resultado)} items)"
+    else:
+        resultado_str = _motor_mascaramento.mascarar(resultado) if resultado else "None"
     
     # Adicionar titular se fornecido
     titular_str = f" | titular={titular}" if titular else ""
@@ -155,57 +298,110 @@ def registrar_log(tipo_transacao, nome_funcao, status, duracao, args, kwargs, re
     if erro:
         linha_log += f" | ERRO: {erro}"
     
-    # Escrever no arquivo
+    escrever_log(linha_log)
+    
+    if LOG_ESTRUTURADO:
+        escrever_auditoria({
+            "ts": agora.isoformat(timespec="milliseconds"),
+            "funcao": nome_funcao,
+            "tipo": tipo_transacao,
+            "status": status,
+            "contas": contas or [],
+            "duracao": round(duracao, 6),
+            "args": [_motor_mascaramento.descrever_argumento(arg) for arg in args],
+            "resultado": resultado_str,
+            "titular": titular,
+            "erro": erro,
+        })
+
+
+def _localizar_parametros_conta(func):
+    """[(posição, nome)] dos parâmetros de `func` que identificam contas (PARAMETROS_CONTA)."""
     try:
-        with open(ARQUIVO_LOG, "a", encoding="utf-8") as f:
-            f.write(linha_log + "\n")
-    except Exception as e:
-        print(f"[AVISO] Não foi possível registrar log: {e}")
+        parametros = list(inspect.signature(func).parameters)
+    except (TypeError, ValueError):
+        return []
+    return [(posicao, nome) for posicao, nome in enumerate(parametros) if nome in PARAMETROS_CONTA]
+
+
+def _contas_da_chamada(parametros_conta, args, kwargs):
+    """Números das contas envolvidas na chamada (contas ou números de conta nos argumentos)."""
+    contas = []
+    for posicao, nome in parametros_conta:
+        valor = args[posicao] if posicao < len(args) else kwargs.get(nome)
+        if isinstance(valor, (dict, Conta)):
+            valor = valor.get("numero_conta")
+        if isinstance(valor, int) and valor not in contas:
+            contas.append(valor)
+    return contas
 
 
 def log_transacao(tipo_transacao):
-    """Decorador que registra a data/hora, argumentos e resultado de transações em log.txt."""
+    """Decorador que registra a data/hora, argumentos e resultado de transações em log.txt.
+
+    A duração é medida com `time.perf_counter_ns` e também entra nas métricas,
+    com o nome qualificado da função (ex.: "depositar_obj").
+    """
     def decorator(func):
+        parametros_conta = _localizar_parametros_conta(func)
+        nome_metrica = func.__qualname__
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            inicio = datetime.now()
+            anterior = metricas.iniciar_operacao(nome_metrica) if metricas.ativo else None
+            inicio = time.perf_counter_ns()
             try:
                 resultado = func(*args, **kwargs)
-                duracao = (datetime.now() - inicio).total_seconds()
-                registrar_log(
-                    tipo_transacao=tipo_transacao,
-                    nome_funcao=func.__name__,
-                    status="OK",
-                    duracao=duracao,
-                    args=args,
-                    kwargs=kwargs,
-                    resultado=resultado
-                )
-                return resultado
             except Exception as e:
-                duracao = (datetime.now() - inicio).total_seconds()
+                decorrido = time.perf_counter_ns() - inicio
+                if metricas.ativo:
+                    metricas.concluir_operacao(nome_metrica, decorrido, anterior)
                 erro_info = f"{type(e).__name__}: {str(e)}"
                 registrar_log(
                     tipo_transacao=tipo_transacao,
                     nome_funcao=func.__name__,
                     status="ERRO",
-                    duracao=duracao,
+                    duracao=decorrido / 1e9,
                     args=args,
                     kwargs=kwargs,
-                    erro=erro_info
+                    erro=erro_info,
+                    contas=_contas_da_chamada(parametros_conta, args, kwargs) if LOG_ESTRUTURADO else None,
                 )
                 raise
+            decorrido = time.perf_counter_ns() - inicio
+            if metricas.ativo:
+                metricas.concluir_operacao(nome_metrica, decorrido, anterior)
+            registrar_log(
+                tipo_transacao=tipo_transacao,
+                nome_funcao=func.__name__,
+                status="OK",
+                duracao=decorrido / 1e9,
+                args=args,
+                kwargs=kwargs,
+                resultado=resultado,
+                contas=_contas_da_chamada(parametros_conta, args, kwargs) if LOG_ESTRUTURADO else None,
+            )
+            return resultado
         return wrapper
     return decorator
 
 
 def registrar_consulta_extrato(numero_conta, titular):
     """Registra consulta de extrato de uma conta."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    agora = datetime.now()
+    timestamp = agora.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
     linha_log = f"[{timestamp}] consulta_extrato      | Consulta de Extrato      | conta={numero_conta} titular={titular} | OK     | 0.000s"
-    
-    try:
-        with open(ARQUIVO_LOG, "a", encoding="utf-8") as f:
-            f.write(linha_log + "\n")
-    except Exception as e:
-        print(f"[AVISO] Não foi possível registrar log: {e}")
+    escrever_log(linha_log)
+    if LOG_ESTRUTURADO:
+        escrever_auditoria({
+            "ts": agora.isoformat(timespec="milliseconds"),
+            "funcao": "consulta_extrato",
+            "tipo": "Consulta de Extrato",
+            "status": "OK",
+            "contas": [numero_conta],
+            "duracao": 0.0,
+            "args": [],
+            "resultado": None,
+            "titular": titular,
+            "erro": None,
+        })